@@ -162,17 +162,154 @@ CREATE INDEX IF NOT EXISTS idx_sensor_area_sensor ON sensor_area(id_sensor);
 CREATE INDEX IF NOT EXISTS idx_sensor_area_area ON sensor_area(id_area);
 CREATE INDEX IF NOT EXISTS idx_sensor_area_instalacao ON sensor_area(data_instalacao);
 
+-- Índices para a tabela manutencao
+CREATE INDEX IF NOT EXISTS idx_manutencao_sensor ON manutencao(id_sensor);
+
 -- Índices para a tabela leitura
 CREATE INDEX IF NOT EXISTS idx_leitura_sensor ON leitura(id_sensor);
-CREATE INDEX IF NOT EXISTS idx_leitura_area ON leitura(id_area);
 CREATE INDEX IF NOT EXISTS idx_leitura_data ON leitura(data_hora);
+-- Índice composto (área, data): atende filtros por área com ordenação/paginação por
+-- (data_hora, id_leitura) sem ordenação extra; substitui o antigo idx_leitura_area
+DROP INDEX IF EXISTS idx_leitura_area;
+CREATE INDEX IF NOT EXISTS idx_leitura_area_data ON leitura(id_area, data_hora);
 
 -- Índices para a tabela irrigacao
-CREATE INDEX IF NOT EXISTS idx_irrigacao_area ON irrigacao(id_area);
 CREATE INDEX IF NOT EXISTS idx_irrigacao_inicio ON irrigacao(inicio_timestamp);
+DROP INDEX IF EXISTS idx_irrigacao_area;
+CREATE INDEX IF NOT EXISTS idx_irrigacao_area_inicio ON irrigacao(id_area, inicio_timestamp);
+-- Índice parcial: contém apenas as irrigações em andamento (fim_timestamp IS NULL)
+CREATE INDEX IF NOT EXISTS idx_irrigacao_ativa ON irrigacao(id_area, inicio_timestamp) WHERE fim_timestamp IS NULL;
 
 -- Índices para a tabela alerta
-CREATE INDEX IF NOT EXISTS idx_alerta_area ON alerta(id_area);
+DROP INDEX IF EXISTS idx_alerta_area;
+CREATE INDEX IF NOT EXISTS idx_alerta_area_timestamp ON alerta(id_area, timestamp);
 CREATE INDEX IF NOT EXISTS idx_alerta_sensor ON alerta(id_sensor);
 CREATE INDEX IF NOT EXISTS idx_alerta_timestamp ON alerta(timestamp);
-CREATE INDEX IF NOT EXISTS idx_alerta_resolvido ON alerta(resolvido);
\ No newline at end of file
+-- Índice parcial: contém apenas os alertas não resolvidos. Substitui o antigo
+-- idx_alerta_resolvido, de baixa cardinalidade (apenas os valores 0 e 1)
+DROP INDEX IF EXISTS idx_alerta_resolvido;
+CREATE INDEX IF NOT EXISTS idx_alerta_pendente ON alerta(id_area, timestamp) WHERE resolvido = 0;
+
+-- Contadores de alertas ativos por área
+
+-- Tabela de resumo mantida pelos gatilhos abaixo, para que "alertas ativos por área"
+-- seja uma consulta por chave primária em vez de uma agregação sobre a tabela alerta
+CREATE TABLE IF NOT EXISTS resumo_alertas_area (
+    id_area INTEGER PRIMARY KEY,
+    alertas_ativos INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (id_area) REFERENCES area_monitorada (id_area)
+);
+
+-- Preenche os contadores de bancos criados antes da tabela de resumo
+INSERT OR IGNORE INTO resumo_alertas_area (id_area, alertas_ativos)
+SELECT id_area, COUNT(*) FROM alerta WHERE resolvido = 0 GROUP BY id_area;
+
+CREATE TRIGGER IF NOT EXISTS trg_alerta_inserido
+AFTER INSERT ON alerta
+WHEN NEW.resolvido = 0
+BEGIN
+    INSERT INTO resumo_alertas_area (id_area, alertas_ativos) VALUES (NEW.id_area, 1)
+    ON CONFLICT (id_area) DO UPDATE SET alertas_ativos = alertas_ativos + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_alerta_atualizado
+AFTER UPDATE OF resolvido, id_area ON alerta
+WHEN (OLD.resolvido = 0) != (NEW.resolvido = 0) OR OLD.id_area != NEW.id_area
+BEGIN
+    UPDATE resumo_alertas_area SET alertas_ativos = alertas_ativos - 1
+    WHERE OLD.resolvido = 0 AND id_area = OLD.id_area;
+    INSERT INTO resumo_alertas_area (id_area, alertas_ativos)
+    SELECT NEW.id_area, 1 WHERE NEW.resolvido = 0
+    ON CONFLICT (id_area) DO UPDATE SET alertas_ativos = alertas_ativos + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_alerta_excluido
+AFTER DELETE ON alerta
+WHEN OLD.resolvido = 0
+BEGIN
+    UPDATE resumo_alertas_area SET alertas_ativos = alertas_ativos - 1
+    WHERE id_area = OLD.id_area;
+END;
+
+-- Versão da topologia (fazenda -> área -> sensor)
+
+-- Contador incrementado por gatilhos a cada alteração nas tabelas da hierarquia,
+-- por qualquer conexão. Permite invalidar caches da topologia com uma leitura por chave.
+CREATE TABLE IF NOT EXISTS versao_topologia (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    versao INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO versao_topologia (id, versao) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS trg_topologia_fazenda_inserido
+AFTER INSERT ON fazenda
+BEGIN
+    UPDATE versao_topologia SET versao = versao + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_topologia_fazenda_atualizado
+AFTER UPDATE ON fazenda
+BEGIN
+    UPDATE versao_topologia SET versao = versao + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_topologia_fazenda_excluido
+AFTER DELETE ON fazenda
+BEGIN
+    UPDATE versao_topologia SET versao = versao + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_topologia_area_monitorada_inserido
+AFTER INSERT ON area_monitorada
+BEGIN
+    UPDATE versao_topologia SET versao = versao + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_topologia_area_monitorada_atualizado
+AFTER UPDATE ON area_monitorada
+BEGIN
+    UPDATE versao_topologia SET versao = versao + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_topologia_area_monitorada_excluido
+AFTER DELETE ON area_monitorada
+BEGIN
+    UPDATE versao_topologia SET versao = versao + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_topologia_sensor_inserido
+AFTER INSERT ON sensor
+BEGIN
+    UPDATE versao_topologia SET versao = versao + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_topologia_sensor_atualizado
+AFTER UPDATE ON sensor
+BEGIN
+    UPDATE versao_topologia SET versao = versao + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_topologia_sensor_excluido
+AFTER DELETE ON sensor
+BEGIN
+    UPDATE versao_topologia SET versao = versao + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_topologia_sensor_area_inserido
+AFTER INSERT ON sensor_area
+BEGIN
+    UPDATE versao_topologia SET versao = versao + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_topologia_sensor_area_atualizado
+AFTER UPDATE ON sensor_area
+BEGIN
+    UPDATE versao_topologia SET versao = versao + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_topologia_sensor_area_excluido
+AFTER DELETE ON sensor_area
+BEGIN
+    UPDATE versao_topologia SET versao = versao + 1 WHERE id = 1;
+END;
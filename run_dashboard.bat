@@ -8,5 +8,5 @@ echo Criando o banco de dados...
 python src/initialize_database.py
 echo.
 echo Iniciando o dashboard...
-streamlit run src/dashboard.py
+streamlit run src/dashboard.py --server.enableStaticServing true
 pause
\ No newline at end of file
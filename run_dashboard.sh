@@ -5,4 +5,4 @@ echo "Instalando dependencias necessarias..."
 pip install streamlit pandas numpy matplotlib plotly
 echo ""
 echo "Iniciando o dashboard..."
-streamlit run src/dashboard.py
\ No newline at end of file
+streamlit run src/dashboard.py --server.enableStaticServing true
\ No newline at end of file
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark das formas de leitura do Sistema de Irrigação Inteligente Expandido
+Gera um banco temporário com N leituras e compara o tempo e o tamanho do
+resultado de cada caminho de consulta. Também mede os indicadores da frota
+(listar_indicadores_areas) em um banco com muitas áreas.
+"""
+
+import os
+import time
+import random
+import argparse
+import datetime
+import tempfile
+import tracemalloc
+import sqlite3
+import pandas as pd
+from db_manager_expandido_completo import SistemaIrrigacaoDB
+
+def popular_banco(db, num_leituras):
+    """Insere uma fazenda, uma área, quatro sensores e num_leituras leituras"""
+    id_fazenda = db.adicionar_fazenda("Fazenda Benchmark", "Latitude: 0, Longitude: 0", 100.0)
+    id_area = db.adicionar_area(id_fazenda, "Área Benchmark", "Polígono: []")
+    sensores = [
+        db.adicionar_sensor("umidade", "DHT22", "%"),
+        db.adicionar_sensor("ph", "pH-Meter-SEN0161", "pH"),
+        db.adicionar_sensor("fosforo", "NPK-Sensor-v1", "mg/kg"),
+        db.adicionar_sensor("potassio", "NPK-Sensor-v1", "mg/kg"),
+    ]
+
+    inicio = datetime.datetime(2024, 1, 1)
+    linhas = (
+        (sensores[i % 4], id_area, random.uniform(0, 100),
+         (inicio + datetime.timedelta(minutes=i // 4)).strftime("%Y-%m-%d %H:%M:%S"))
+        for i in range(num_leituras)
+    )
+    db.conn.executemany(
+        "INSERT INTO leitura (id_sensor, id_area, valor, data_hora) VALUES (?, ?, ?, ?)",
+        linhas
+    )
+    db.conn.commit()
+    return id_area
+
+def popular_frota(db, num_areas, instantes_por_area=10):
+    """Insere num_areas áreas (100 por fazenda), cada uma com os quatro tipos de sensor,
+    instantes_por_area instantes de leituras, duas irrigações e um alerta ativo a cada 10 áreas"""
+    sensores = [db.adicionar_sensor(tipo, "Modelo Frota", unidade)
+                for tipo, unidade in (("umidade", "%"), ("ph", "pH"), ("fosforo", "mg/kg"), ("potassio", "mg/kg"))]
+    agora = datetime.datetime.now()  # hora local, como gravam os demais módulos
+    texto = lambda instante: instante.strftime("%Y-%m-%d %H:%M:%S")
+    areas = []
+    for indice in range(num_areas):
+        if indice % 100 == 0:
+            id_fazenda = db.adicionar_fazenda(f"Fazenda {indice // 100 + 1}", "Latitude: 0, Longitude: 0", 100.0)
+        db.cursor.execute("INSERT INTO area_monitorada (id_fazenda, nome_area, coordenadas) VALUES (?, ?, ?)",
+                          (id_fazenda, f"Área {indice + 1}", "Polígono: []"))
+        areas.append(db.cursor.lastrowid)
+
+    db.conn.executemany(
+        "INSERT INTO leitura (id_sensor, id_area, valor, data_hora) VALUES (?, ?, ?, ?)",
+        ((id_sensor, id_area, random.uniform(0, 100), texto(agora - datetime.timedelta(hours=instante)))
+         for id_area in areas for instante in range(instantes_por_area) for id_sensor in sensores)
+    )
+    db.conn.executemany(
+        "INSERT INTO irrigacao (id_area, inicio_timestamp, fim_timestamp, volume_agua, modo) VALUES (?, ?, ?, ?, ?)",
+        ((id_area, texto(agora - datetime.timedelta(days=dias)), texto(agora - datetime.timedelta(days=dias, hours=-1)),
+          500.0, "automatico") for id_area in areas for dias in (2, 20))
+    )
+    db.conn.executemany(
+        "INSERT INTO alerta (id_area, id_sensor, tipo_alerta, descricao, timestamp) VALUES (?, ?, ?, ?, ?)",
+        ((id_area, sensores[0], "umidade_baixa", "Umidade baixa", texto(agora)) for id_area in areas[::10])
+    )
+    db.conn.commit()
+
+def medir(nome, funcao):
+    """Executa a função, imprime o tempo gasto e retorna o resultado"""
+    inicio = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    print(f"{nome:<40} {duracao:8.2f} s")
+    return resultado
+
+def caminho_dicts(db, num_leituras):
+    """Caminho atual: lista de dicionários convertida em DataFrame"""
+    return pd.DataFrame(db.listar_leituras(limite=num_leituras))
+
+def caminho_read_sql(db):
+    """Caminho do dashboard: pd.read_sql_query sobre a junção com colunas texto"""
+    conn = sqlite3.connect(db.db_path)
+    try:
+        df = pd.read_sql_query("""
+            SELECT l.data_hora, s.tipo_sensor, s.unidade_medida, l.valor, a.nome_area
+            FROM leitura l
+            JOIN sensor s ON l.id_sensor = s.id_sensor
+            JOIN area_monitorada a ON l.id_area = a.id_area
+            ORDER BY l.data_hora
+        """, conn)
+        df['data_hora'] = pd.to_datetime(df['data_hora'])
+        return df
+    finally:
+        conn.close()
+
+def medir_memoria(nome, funcao):
+    """Executa a função e imprime o pico de memória alocada (tracemalloc)"""
+    tracemalloc.start()
+    try:
+        resultado = funcao()
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    print(f"{nome:<40} {pico / 1e6:8.1f} MB")
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark das consultas de leituras')
+    parser.add_argument('--leituras', type=int, default=1_000_000, help='Número de leituras geradas (padrão: 1000000)')
+    parser.add_argument('--areas', type=int, default=10_000, help='Número de áreas no banco da frota (padrão: 10000)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        db = SistemaIrrigacaoDB(os.path.join(diretorio, "benchmark.db"))
+        medir("Geração dos dados", lambda: popular_banco(db, args.leituras))
+
+        print(f"\n=== Consulta de {args.leituras} leituras ===")
+        resultados = {
+            "listar_leituras + DataFrame": medir("listar_leituras + DataFrame",
+                                                 lambda: caminho_dicts(db, args.leituras)),
+            "pd.read_sql_query (dashboard)": medir("pd.read_sql_query (dashboard)",
+                                                   lambda: caminho_read_sql(db)),
+            "listar_leituras_colunar": medir("listar_leituras_colunar",
+                                             lambda: db.listar_leituras_colunar()),
+        }
+
+        print("\n=== Memória ocupada pelo resultado ===")
+        for nome, df in resultados.items():
+            print(f"{nome:<40} {df.memory_usage(deep=True).sum() / 1e6:8.1f} MB")
+
+        print(f"\n=== listar_leituras: dicts x registros compactos ({args.leituras} leituras) ===")
+        db_compacto = SistemaIrrigacaoDB(db.db_path, registros_compactos=True)
+        medir("dict por linha", lambda: db.listar_leituras(limite=args.leituras))
+        medir("registros compactos", lambda: db_compacto.listar_leituras(limite=args.leituras))
+        medir_memoria("dict por linha (pico)", lambda: db.listar_leituras(limite=args.leituras))
+        medir_memoria("registros compactos (pico)", lambda: db_compacto.listar_leituras(limite=args.leituras))
+        db_compacto.fechar()
+
+        db.fechar()
+
+        print(f"\n=== Indicadores da frota ({args.areas} áreas) ===")
+        db_frota = SistemaIrrigacaoDB(os.path.join(diretorio, "frota.db"))
+        medir("Geração dos dados", lambda: popular_frota(db_frota, args.areas))
+        medir("listar_indicadores_areas (dicts)", lambda: db_frota.listar_indicadores_areas())
+        medir("listar_indicadores_areas (DataFrame)", lambda: db_frota.listar_indicadores_areas(como_dataframe=True))
+        medir("listar_indicadores_areas (uma fazenda)", lambda: db_frota.listar_indicadores_areas(id_fazenda=1))
+        db_frota.fechar()
+
+if __name__ == "__main__":
+    main()
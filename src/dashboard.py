@@ -2,12 +2,26 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+import os
 import sqlite3
 import datetime
+import threading
+import time
 from datetime import timedelta
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from db_manager_expandido_completo import SistemaIrrigacaoDB
+from subamostragem import subamostrar
+from exportacao import exportar_leituras
+
+# Caminho do banco de dados usado pelo dashboard
+DB_PATH = "../db/exemplo_irrigacao.db"
+
+# Arquivos exportados, servidos em app/static/exportacoes quando o servidor é iniciado com
+# --server.enableStaticServing true; são apagados depois de EXPORTACAO_VALIDADE segundos
+PASTA_EXPORTACOES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "exportacoes")
+EXPORTACAO_VALIDADE = 3600
 
 # Configuração da página
 st.set_page_config(
@@ -19,34 +33,246 @@ st.set_page_config(
 # Função para conectar ao banco de dados
 @st.cache_resource
 def get_connection():
-    return sqlite3.connect("../db/exemplo_irrigacao.db", check_same_thread=False)
+    return sqlite3.connect(DB_PATH, check_same_thread=False)
 
-# Função para carregar dados das leituras
-@st.cache_data(ttl=60)
-def load_leituras(_conn, id_area=None, dias=7):
-    query = """
-    SELECT l.data_hora, s.tipo_sensor, s.unidade_medida, l.valor, a.nome_area, f.nome as nome_fazenda
-    FROM leitura l
-    JOIN sensor s ON l.id_sensor = s.id_sensor
-    JOIN area_monitorada a ON l.id_area = a.id_area
-    JOIN fazenda f ON a.id_fazenda = f.id_fazenda
-    WHERE l.data_hora >= datetime('now', ?)
-    """
-    params = [f'-{dias} days']
+# A conexão acima é compartilhada pelas threads de todas as sessões: cada uso (consulta,
+# geração dos dados simulados ou gravação do formulário) acontece sob esta trava
+@st.cache_resource
+def get_trava_conexao():
+    return threading.Lock()
+
+# Gerenciador do banco compartilhado entre as sessões (mantém caches em memória); as
+# chamadas de threads diferentes são serializadas pela trava interna (sincronizar=True)
+@st.cache_resource
+def get_db():
+    return SistemaIrrigacaoDB(DB_PATH, check_same_thread=False, sincronizar=True)
+
+# Versão dos dados usada como chave dos caches compartilhados entre as sessões: muda assim
+# que qualquer conexão grava no banco, então os resultados são reaproveitados por todos os
+# usuários enquanto nada mudar e recalculados logo após a chegada de novos dados
+def versao_dados():
+    return get_db().obter_versao_dados()
+
+# Minuto atual, usado junto com a versão nas chaves dos caches cujas consultas dependem de
+# datetime('now'): sem ele a janela de N dias não avançaria enquanto não houvesse gravações
+def minuto_atual():
+    return int(time.time() // 60)
+
+# Leituras de uma área em uma janela móvel de N dias, no formato largo (data_hora, umidade,
+# ph, fosforo, potassio, ...) pivotado no SQLite. A cada atualização busca apenas os instantes
+# com leituras acima da marca d'água (maior id_leitura já visto) e descarta as linhas que
+# saíram da janela, de modo que o custo acompanha o volume de dados novos
+class JanelaLeituras:
+    def __init__(self, id_area, dias):
+        self.id_area = id_area
+        self.dias = dias
+        self.df = None
+        self.marca = 0
+        self.trava = threading.Lock()
+    
+    def atualizar(self, db):
+        with self.trava:
+            # Equivalente a datetime('now', '-N days') do SQLite
+            inicio = (datetime.datetime.now(datetime.timezone.utc) - timedelta(days=self.dias)).strftime("%Y-%m-%d %H:%M:%S")
+            # A marca é lida antes da consulta: leituras inseridas durante a consulta são
+            # buscadas de novo na próxima atualização (os instantes são substituídos, não somados)
+            marca = db.obter_ultimo_id_leitura()
+            
+            if self.df is None or marca < self.marca:
+                # Primeira carga, ou leituras excluídas/banco substituído: consulta completa
+                df = db.listar_leituras_pivotadas(id_area=self.id_area, data_inicio=inicio, como_dataframe=True)
+            elif marca > self.marca:
+                novos = db.listar_leituras_pivotadas(id_area=self.id_area, data_inicio=inicio,
+                                                     como_dataframe=True, apos_id_leitura=self.marca)
+                if novos is not None and list(novos.columns) != list(self.df.columns):
+                    # Novo tipo de sensor cadastrado: refaz a janela inteira
+                    df = db.listar_leituras_pivotadas(id_area=self.id_area, data_inicio=inicio, como_dataframe=True)
+                elif novos is not None:
+                    df = pd.concat([self.df[~self.df['data_hora'].isin(novos['data_hora'])], novos],
+                                   ignore_index=True)
+                    if not df['data_hora'].is_monotonic_increasing:
+                        df = df.sort_values('data_hora', ignore_index=True)
+                else:
+                    df = None
+            else:
+                df = self.df
+            
+            if df is not None and marca >= 0:
+                self.df, self.marca = df, marca
+            if self.df is None:
+                return pd.DataFrame(columns=['data_hora'])
+            
+            # Descarta as linhas que saíram da janela (data_hora está ordenada)
+            corte = self.df['data_hora'].searchsorted(pd.Timestamp(inicio))
+            if corte:
+                self.df = self.df.iloc[corte:].reset_index(drop=True)
+            return self.df
+
+# Uma janela por (área, período), compartilhada entre as sessões
+@st.cache_resource(max_entries=64)
+def get_janela_leituras(id_area, dias):
+    return JanelaLeituras(id_area, dias)
+
+# Função para carregar dados das leituras (atualização incremental da janela)
+def load_leituras(db, id_area=None, dias=7):
+    df = get_janela_leituras(id_area or None, dias).atualizar(db)
+    # Mantém apenas os tipos de sensor com leituras no período, como fazia o pivot_table
+    return df.dropna(axis=1, how='all')
+
+# Série de um sensor reduzida para o gráfico (picos preservados), sem os instantes
+# em que o sensor não tem leitura no formato largo; retorna os argumentos x/y do go.Scatter
+def serie_grafico(df, coluna, pontos):
+    x, y = subamostrar(df['data_hora'].to_numpy(), df[coluna].to_numpy(), pontos)
+    return {'x': x, 'y': y}
+
+# Períodos de irrigação mesclados: ciclos em andamento terminam em `agora` e ciclos
+# sobrepostos ou adjacentes viram um único intervalo (início, fim), em operações vetorizadas
+def periodos_irrigacao(df, agora):
+    if df.empty:
+        return np.array([], dtype='datetime64[ns]'), np.array([], dtype='datetime64[ns]')
+    df = df.sort_values('inicio_timestamp')
+    inicios = df['inicio_timestamp'].to_numpy()
+    fins = df['fim_timestamp'].fillna(pd.Timestamp(agora)).to_numpy()
+    # Um novo grupo começa quando o ciclo inicia depois do maior fim anterior
+    fim_acumulado = np.maximum.accumulate(fins)
+    novo_grupo = np.concatenate([[True], inicios[1:] > fim_acumulado[:-1]])
+    primeiros = np.flatnonzero(novo_grupo)
+    ultimos = np.append(primeiros[1:], len(inicios)) - 1
+    return inicios[primeiros], fim_acumulado[ultimos]
+
+# Um único trace preenchido com todos os períodos de irrigação (retângulos de y0 a y1
+# separados por lacunas), em vez de uma forma de layout por ciclo
+def trace_irrigacao(inicios, fins, y0=0, y1=100):
+    x = np.empty(len(inicios) * 5, dtype=object)
+    inicios = np.datetime_as_string(inicios, unit='s')
+    fins = np.datetime_as_string(fins, unit='s')
+    x[0::5], x[1::5], x[2::5], x[3::5], x[4::5] = inicios, inicios, fins, fins, None
+    y = np.tile(np.array([y0, y1, y1, y0, None], dtype=object), len(inicios))
+    return go.Scatter(
+        x=x, y=y,
+        fill='toself',
+        fillcolor="rgba(0, 255, 0, 0.2)",
+        line_width=0,
+        mode='lines',
+        name="Irrigação",
+        hoverinfo='skip'
+    )
+
+# Cartões com as métricas principais da área (um espaço reservado por cartão, para que
+# o modo ao vivo possa substituí-los sem redesenhar a página)
+def exibir_metricas(cartoes, df_pivot, df_irrigacoes, df_alertas, agora):
+    # Últimos valores registrados
+    ultima_umidade = df_pivot['umidade'].iloc[-1] if 'umidade' in df_pivot else 0
+    ultimo_ph = df_pivot['ph'].iloc[-1] if 'ph' in df_pivot else 0
     
-    if id_area:
-        query += " AND l.id_area = ?"
-        params.append(id_area)
+    # Status da irrigação: algum ciclo sem fim ou terminando no futuro
+    irrigacao_ativa = bool((df_irrigacoes['fim_timestamp'].isna() |
+                            (df_irrigacoes['fim_timestamp'] > agora)).any())
     
-    query += " ORDER BY l.data_hora"
+    # Alertas ativos
+    alertas_ativos = len(df_alertas[df_alertas['resolvido'] == 0])
     
-    df = pd.read_sql_query(query, _conn, params=params)
-    df['data_hora'] = pd.to_datetime(df['data_hora'])
-    return df
+    # Exibe métricas
+    cartoes[0].metric("Umidade do Solo", f"{ultima_umidade:.1f}%", 
+                      delta="Normal" if 30 <= ultima_umidade <= 70 else "Crítico")
+    
+    cartoes[1].metric("pH", f"{ultimo_ph:.1f}", 
+                      delta="Normal" if 5.5 <= ultimo_ph <= 7.0 else "Crítico")
+    
+    cartoes[2].metric("Irrigação", "ATIVA" if irrigacao_ativa else "DESATIVADA")
+    
+    cartoes[3].metric("Alertas Ativos", alertas_ativos, 
+                      delta="Nenhum" if alertas_ativos == 0 else f"{alertas_ativos} alerta(s)")
+
+# Gráfico de umidade com períodos de irrigação
+def figura_umidade(df_pivot, df_irrigacoes, agora, pontos):
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    
+    # Adiciona os períodos de irrigação (um único trace, antes da umidade para ficar atrás)
+    inicios, fins = periodos_irrigacao(df_irrigacoes, agora)
+    if len(inicios):
+        fig.add_trace(trace_irrigacao(inicios, fins), secondary_y=False)
+    
+    # Adiciona linha de umidade
+    if 'umidade' in df_pivot:
+        fig.add_trace(
+            go.Scatter(
+                **serie_grafico(df_pivot, 'umidade', pontos),
+                name="Umidade (%)",
+                line=dict(color='blue', width=2)
+            ),
+            secondary_y=False
+        )
+    
+    # Adiciona linhas de limite
+    fig.add_hline(y=30, line_dash="dash", line_color="red", 
+                 annotation_text="Limite inferior", annotation_position="bottom right")
+    fig.add_hline(y=70, line_dash="dash", line_color="red", 
+                 annotation_text="Limite superior", annotation_position="top right")
+    
+    fig.update_layout(
+        title="Umidade do Solo e Períodos de Irrigação",
+        xaxis_title="Data/Hora",
+        yaxis_title="Umidade (%)",
+        height=500
+    )
+    return fig
+
+# Gráfico de pH e nutrientes
+def figura_nutrientes(df_pivot, pontos):
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    
+    # Adiciona linha de pH
+    if 'ph' in df_pivot:
+        fig.add_trace(
+            go.Scatter(
+                **serie_grafico(df_pivot, 'ph', pontos),
+                name="pH",
+                line=dict(color='purple', width=2)
+            ),
+            secondary_y=False
+        )
+    
+    # Adiciona linhas de nutrientes
+    if 'fosforo' in df_pivot:
+        fig.add_trace(
+            go.Scatter(
+                **serie_grafico(df_pivot, 'fosforo', pontos),
+                name="Fósforo (mg/kg)",
+                line=dict(color='green', width=2)
+            ),
+            secondary_y=True
+        )
+    
+    if 'potassio' in df_pivot:
+        fig.add_trace(
+            go.Scatter(
+                **serie_grafico(df_pivot, 'potassio', pontos),
+                name="Potássio (mg/kg)",
+                line=dict(color='orange', width=2)
+            ),
+            secondary_y=True
+        )
+    
+    # Adiciona linhas de limite para pH
+    fig.add_hline(y=5.5, line_dash="dash", line_color="red", 
+                 annotation_text="pH mínimo", annotation_position="bottom right")
+    fig.add_hline(y=7.0, line_dash="dash", line_color="red", 
+                 annotation_text="pH máximo", annotation_position="top right")
+    
+    fig.update_layout(
+        title="pH e Níveis de Nutrientes",
+        xaxis_title="Data/Hora",
+        height=500
+    )
+    
+    fig.update_yaxes(title_text="pH", secondary_y=False)
+    fig.update_yaxes(title_text="Nutrientes (mg/kg)", secondary_y=True)
+    return fig
 
 # Função para carregar dados de irrigação
-@st.cache_data(ttl=60)
-def load_irrigacoes(_conn, id_area=None, dias=7):
+@st.cache_data(max_entries=256)
+def load_irrigacoes(_conn, id_area=None, dias=7, versao=None, minuto=None):
     query = """
     SELECT i.*, a.nome_area, f.nome as nome_fazenda
     FROM irrigacao i
@@ -62,14 +288,15 @@ def load_irrigacoes(_conn, id_area=None, dias=7):
     
     query += " ORDER BY i.inicio_timestamp"
     
-    df = pd.read_sql_query(query, _conn, params=params)
+    with get_trava_conexao():
+        df = pd.read_sql_query(query, _conn, params=params)
     df['inicio_timestamp'] = pd.to_datetime(df['inicio_timestamp'])
     df['fim_timestamp'] = pd.to_datetime(df['fim_timestamp'])
     return df
 
 # Função para carregar dados de alertas
-@st.cache_data(ttl=60)
-def load_alertas(_conn, id_area=None, dias=7):
+@st.cache_data(max_entries=256)
+def load_alertas(_conn, id_area=None, dias=7, versao=None, minuto=None):
     query = """
     SELECT a.*, ar.nome_area, f.nome as nome_fazenda, s.tipo_sensor
     FROM alerta a
@@ -86,24 +313,60 @@ def load_alertas(_conn, id_area=None, dias=7):
     
     query += " ORDER BY a.timestamp DESC"
     
-    df = pd.read_sql_query(query, _conn, params=params)
+    with get_trava_conexao():
+        df = pd.read_sql_query(query, _conn, params=params)
     df['timestamp'] = pd.to_datetime(df['timestamp'])
     return df
 
 # Função para carregar lista de fazendas e áreas
-@st.cache_data(ttl=300)
-def load_fazendas_areas(_conn):
-    fazendas = pd.read_sql_query("SELECT id_fazenda, nome FROM fazenda ORDER BY nome", _conn)
-    areas = pd.read_sql_query("""
-        SELECT a.id_area, a.nome_area, f.nome as nome_fazenda, f.id_fazenda
-        FROM area_monitorada a
-        JOIN fazenda f ON a.id_fazenda = f.id_fazenda
-        ORDER BY f.nome, a.nome_area
-    """, _conn)
+# A hierarquia fica em memória no gerenciador e só é recarregada quando a topologia muda
+def load_fazendas_areas(db):
+    hierarquia = db.obter_hierarquia()
+    fazendas = pd.DataFrame(
+        [(f.id_fazenda, f.nome) for f in hierarquia.fazendas.values()],
+        columns=['id_fazenda', 'nome']
+    )
+    areas = pd.DataFrame(
+        [(id_area, hierarquia.areas[id_area].nome_area, fazenda.nome, fazenda.id_fazenda)
+         for fazenda in hierarquia.fazendas.values()
+         for id_area in hierarquia.areas_por_fazenda[fazenda.id_fazenda]],
+        columns=['id_area', 'nome_area', 'nome_fazenda', 'id_fazenda']
+    )
     return fazendas, areas
 
-# Função para gerar dados simulados se o banco estiver vazio
-def gerar_dados_simulados(conn):
+# Tamanho do conjunto de dados de demonstração gerado quando o banco está vazio
+# (horizonte em dias, fazendas, áreas por fazenda e intervalo entre leituras em minutos).
+# Ex.: IRRIGACAO_DEMO_DIAS=365 IRRIGACAO_DEMO_FAZENDAS=5 IRRIGACAO_DEMO_AREAS=10 gera ~17 milhões de leituras
+DEMO_DIAS = int(os.environ.get('IRRIGACAO_DEMO_DIAS', 7))
+DEMO_FAZENDAS = int(os.environ.get('IRRIGACAO_DEMO_FAZENDAS', 1))
+DEMO_AREAS_POR_FAZENDA = int(os.environ.get('IRRIGACAO_DEMO_AREAS', 1))
+DEMO_INTERVALO_MINUTOS = int(os.environ.get('IRRIGACAO_DEMO_INTERVALO', 60))
+
+# Sensores instalados em cada área simulada: (tipo, modelo, unidade)
+SENSORES_DEMO = [
+    ("umidade", "DHT22", "%"),
+    ("ph", "pH-Meter-SEN0161", "pH"),
+    ("fosforo", "NPK-Sensor-v1", "mg/kg"),
+    ("potassio", "NPK-Sensor-v1", "mg/kg"),
+]
+
+# Séries simuladas de uma área, calculadas de uma vez com NumPy para todos os instantes
+def series_simuladas(rng, horas, fase=0.0):
+    n = len(horas)
+    progresso = horas / max(horas[-1], 1)
+    # Umidade diminui durante o dia e aumenta à noite, limitada entre 20% e 80%
+    umidade = np.clip(50 + 20 * np.sin(horas / 12 * np.pi + fase) + rng.uniform(-5, 5, n), 20, 80)
+    # pH varia pouco
+    ph = 6.5 + rng.uniform(-0.5, 0.5, n)
+    # Fósforo e potássio diminuem gradualmente
+    fosforo = np.maximum(0.2, 0.8 - progresso * 0.3 + rng.uniform(-0.1, 0.1, n))
+    potassio = np.maximum(0.2, 0.7 - progresso * 0.2 + rng.uniform(-0.1, 0.1, n))
+    return umidade, ph, fosforo, potassio
+
+# Função para gerar dados simulados se o banco estiver vazio. Todas as séries são geradas
+# com NumPy e gravadas com inserções em lote em uma única transação
+def gerar_dados_simulados(conn, dias=DEMO_DIAS, num_fazendas=DEMO_FAZENDAS,
+                          areas_por_fazenda=DEMO_AREAS_POR_FAZENDA, intervalo_minutos=DEMO_INTERVALO_MINUTOS):
     # Verifica se já existem dados
     cursor = conn.cursor()
     cursor.execute("SELECT COUNT(*) FROM fazenda")
@@ -112,79 +375,103 @@ def gerar_dados_simulados(conn):
     if count > 0:
         return False  # Não precisa gerar dados
     
-    # Cria dados simulados
-    from db_manager_expandido_completo import SistemaIrrigacaoDB
-    import random
-    
-    db = SistemaIrrigacaoDB("../db/exemplo_irrigacao.db")
-    
-    # Adiciona fazendas
-    id_fazenda = db.adicionar_fazenda("Fazenda Modelo", "Latitude: -23.5505, Longitude: -46.6333", 150.5)
-    
-    # Adiciona áreas
-    id_area = db.adicionar_area(id_fazenda, "Horta Orgânica", "Polígono: [(-23.55,-46.63), (-23.55,-46.62), (-23.54,-46.62), (-23.54,-46.63)]")
-    
-    # Adiciona sensores
-    id_sensor_umidade = db.adicionar_sensor("umidade", "DHT22", "%")
-    id_sensor_ph = db.adicionar_sensor("ph", "pH-Meter-SEN0161", "pH")
-    id_sensor_fosforo = db.adicionar_sensor("fosforo", "NPK-Sensor-v1", "mg/kg")
-    id_sensor_potassio = db.adicionar_sensor("potassio", "NPK-Sensor-v1", "mg/kg")
-    
-    # Associa sensores à área
-    db.associar_sensor_area(id_sensor_umidade, id_area)
-    db.associar_sensor_area(id_sensor_ph, id_area)
-    db.associar_sensor_area(id_sensor_fosforo, id_area)
-    db.associar_sensor_area(id_sensor_potassio, id_area)
-    
-    # Gera leituras para os últimos 7 dias
-    now = datetime.datetime.now()
-    for i in range(7*24):  # Uma leitura por hora por 7 dias
-        data_hora = (now - timedelta(hours=7*24-i)).strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Simula padrões realistas
-        hora = i % 24
-        # Umidade diminui durante o dia e aumenta à noite
-        umidade = 50 + 20 * np.sin(i/12 * np.pi) + random.uniform(-5, 5)
-        umidade = max(20, min(80, umidade))  # Limita entre 20% e 80%
-        
-        # pH varia pouco
-        ph = 6.5 + random.uniform(-0.5, 0.5)
+    rng = np.random.default_rng()
+    
+    # Instantes das leituras: do início do horizonte até agora, a cada intervalo_minutos.
+    # Os textos de data/hora são montados uma única vez e compartilhados por todas as áreas
+    now = np.datetime64(datetime.datetime.now().replace(microsecond=0), 's')
+    passos = np.arange(dias * 24 * 60 // intervalo_minutos)
+    instantes = now - np.timedelta64(dias * 24 * 60, 'm') + passos * np.timedelta64(intervalo_minutos, 'm')
+    datas = np.char.replace(np.datetime_as_string(instantes, unit='s'), 'T', ' ').tolist()
+    horas = passos * (intervalo_minutos / 60)
+    n = len(datas)
+    
+    # Uma amostra a cada ~2 dias é verificada para alertas, como na simulação horária
+    indices_alerta = np.arange(0, n, max(1, 50 * 60 // intervalo_minutos))
+    
+    with conn:
+        # Transação explícita para que a remoção e a recriação dos índices façam parte dela
+        cursor.execute("BEGIN")
+        # Os índices de leitura são recriados no final: ordenar todas as linhas uma única
+        # vez é bem mais barato que atualizar três índices a cada inserção
+        indices_leitura = cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'leitura' AND sql IS NOT NULL"
+        ).fetchall()
+        for nome, _ in indices_leitura:
+            cursor.execute(f'DROP INDEX "{nome}"')
         
-        # Fósforo e potássio diminuem gradualmente
-        fosforo = max(0.2, 0.8 - i/(7*24) * 0.3 + random.uniform(-0.1, 0.1))
-        potassio = max(0.2, 0.7 - i/(7*24) * 0.2 + random.uniform(-0.1, 0.1))
-        
-        # Registra leituras
-        db.adicionar_leitura(id_sensor_umidade, id_area, umidade, data_hora)
-        db.adicionar_leitura(id_sensor_ph, id_area, ph, data_hora)
-        db.adicionar_leitura(id_sensor_fosforo, id_area, fosforo, data_hora)
-        db.adicionar_leitura(id_sensor_potassio, id_area, potassio, data_hora)
-        
-        # Adiciona irrigação quando umidade está baixa
-        if umidade < 30 and random.random() > 0.5:
-            inicio = data_hora
-            duracao = random.uniform(20, 40)  # 20-40 minutos
-            fim = (datetime.datetime.strptime(data_hora, "%Y-%m-%d %H:%M:%S") + 
-                   timedelta(minutes=duracao)).strftime("%Y-%m-%d %H:%M:%S")
-            volume = duracao * 3  # 3 litros por minuto
+        for f in range(num_fazendas):
+            cursor.execute(
+                "INSERT INTO fazenda (nome, localizacao, tamanho_hectares) VALUES (?, ?, ?)",
+                ("Fazenda Modelo" if num_fazendas == 1 else f"Fazenda Modelo {f + 1}",
+                 f"Latitude: {-23.5505 - f * 0.1:.4f}, Longitude: {-46.6333 - f * 0.1:.4f}", 150.5)
+            )
+            id_fazenda = cursor.lastrowid
             
-            id_irrigacao = db.adicionar_irrigacao(id_area, "automatico", volume, inicio)
-            db.finalizar_irrigacao(id_irrigacao, volume, fim)
+            for a in range(areas_por_fazenda):
+                cursor.execute(
+                    "INSERT INTO area_monitorada (id_fazenda, nome_area, coordenadas) VALUES (?, ?, ?)",
+                    (id_fazenda, "Horta Orgânica" if areas_por_fazenda == 1 else f"Talhão {a + 1}",
+                     "Polígono: [(-23.55,-46.63), (-23.55,-46.62), (-23.54,-46.62), (-23.54,-46.63)]")
+                )
+                id_area = cursor.lastrowid
+                
+                # Sensores da área
+                id_sensores = []
+                for tipo, modelo, unidade in SENSORES_DEMO:
+                    cursor.execute(
+                        "INSERT INTO sensor (tipo_sensor, modelo, unidade_medida) VALUES (?, ?, ?)",
+                        (tipo, modelo, unidade)
+                    )
+                    id_sensores.append(cursor.lastrowid)
+                cursor.executemany(
+                    "INSERT INTO sensor_area (id_sensor, id_area, data_instalacao) VALUES (?, ?, ?)",
+                    [(id_sensor, id_area, datas[0]) for id_sensor in id_sensores]
+                )
+                
+                # Leituras: uma série por sensor, gravadas em ordem cronológica
+                series = series_simuladas(rng, horas, fase=rng.uniform(0, 2 * np.pi))
+                for id_sensor, valores in zip(id_sensores, series):
+                    cursor.executemany(
+                        "INSERT INTO leitura (id_sensor, id_area, valor, data_hora) VALUES (?, ?, ?, ?)",
+                        zip([id_sensor] * n, [id_area] * n, valores.tolist(), datas)
+                    )
+                umidade, ph, fosforo, potassio = series
+                
+                # Irrigação quando a umidade cruza abaixo de 30% (metade das vezes), 20-40 minutos a 3 L/min
+                inicios = np.flatnonzero((umidade < 30) & ~np.roll(umidade < 30, 1) & (rng.random(n) > 0.5))
+                duracoes = rng.uniform(20, 40, len(inicios))
+                fins = instantes[inicios] + (duracoes * 60).astype('timedelta64[s]')
+                fins_texto = np.char.replace(np.datetime_as_string(fins, unit='s'), 'T', ' ').tolist()
+                cursor.executemany(
+                    """INSERT INTO irrigacao (id_area, inicio_timestamp, fim_timestamp, duracao_minutos, volume_agua, modo)
+                       VALUES (?, ?, ?, ?, ?, 'automatico')""",
+                    zip([id_area] * len(inicios), [datas[i] for i in inicios], fins_texto,
+                        duracoes.tolist(), (duracoes * 3).tolist())
+                )
+                
+                # Alertas: o primeiro problema encontrado em cada amostra verificada
+                i = indices_alerta
+                condicoes = [umidade[i] < 25, (ph[i] < 5.5) | (ph[i] > 7.0), fosforo[i] < 0.4, potassio[i] < 0.4]
+                problema = np.select(condicoes, [0, 1, 2, 3], default=-1)
+                alertas = []
+                for indice, p in zip(i[problema >= 0].tolist(), problema[problema >= 0].tolist()):
+                    if p == 0:
+                        alerta = ("Umidade Crítica", "Umidade abaixo de 25%, verifique o sistema de irrigação")
+                    elif p == 1:
+                        alerta = ("pH Inadequado", f"pH de {ph[indice]:.1f} está fora da faixa ideal (5.5-7.0)")
+                    elif p == 2:
+                        alerta = ("Fósforo Baixo", "Nível de fósforo abaixo do recomendado")
+                    else:
+                        alerta = ("Potássio Baixo", "Nível de potássio abaixo do recomendado")
+                    alertas.append((id_area, id_sensores[p], datas[indice]) + alerta)
+                cursor.executemany(
+                    "INSERT INTO alerta (id_area, id_sensor, timestamp, tipo_alerta, descricao) VALUES (?, ?, ?, ?, ?)",
+                    alertas
+                )
         
-        # Adiciona alertas ocasionalmente
-        if i % 50 == 0:  # Aproximadamente a cada 2 dias
-            if umidade < 25:
-                db.adicionar_alerta(id_area, id_sensor_umidade, "Umidade Crítica", 
-                                   "Umidade abaixo de 25%, verifique o sistema de irrigação", data_hora)
-            elif ph < 5.5 or ph > 7.0:
-                db.adicionar_alerta(id_area, id_sensor_ph, "pH Inadequado", 
-                                   f"pH de {ph:.1f} está fora da faixa ideal (5.5-7.0)", data_hora)
-            elif fosforo < 0.4:
-                db.adicionar_alerta(id_area, id_sensor_fosforo, "Fósforo Baixo", 
-                                   "Nível de fósforo abaixo do recomendado", data_hora)
-            elif potassio < 0.4:
-                db.adicionar_alerta(id_area, id_sensor_potassio, "Potássio Baixo", 
-                                   "Nível de potássio abaixo do recomendado", data_hora)
+        for _, sql in indices_leitura:
+            cursor.execute(sql)
     
     return True
 
@@ -196,12 +483,13 @@ conn = get_connection()
 
 # Gera dados simulados se necessário
 with st.spinner("Verificando dados..."):
-    dados_gerados = gerar_dados_simulados(conn)
+    with get_trava_conexao():
+        dados_gerados = gerar_dados_simulados(conn)
     if dados_gerados:
         st.success("Dados simulados gerados com sucesso!")
 
 # Carrega lista de fazendas e áreas
-fazendas, areas = load_fazendas_areas(conn)
+fazendas, areas = load_fazendas_areas(get_db())
 
 # Sidebar para filtros
 st.sidebar.header("Filtros")
@@ -231,18 +519,37 @@ periodo = st.sidebar.slider(
     value=7
 )
 
+# Número de pontos por série nos gráficos (próximo da largura do gráfico em pixels);
+# séries maiores são subamostradas antes de plotar
+pontos_grafico = st.sidebar.select_slider(
+    "Pontos por série nos gráficos:",
+    options=[500, 1000, 2000, 4000],
+    value=1000
+)
+
+# Modo ao vivo: verifica a versão dos dados a cada intervalo e redesenha apenas os
+# cartões e gráficos cujos dados mudaram, sem executar a página inteira novamente
+modo_ao_vivo = st.sidebar.checkbox("Modo ao vivo", value=False)
+intervalo_ao_vivo = st.sidebar.select_slider(
+    "Intervalo de atualização (s):",
+    options=[1, 2, 5, 10, 30, 60],
+    value=5,
+    disabled=not modo_ao_vivo
+)
+
 # Botão para atualizar dados
 if st.sidebar.button("Atualizar Dados"):
     st.experimental_rerun()
 
 # Carrega os dados filtrados
 with st.spinner("Carregando dados..."):
-    df_leituras = load_leituras(conn, area_selecionada, periodo)
-    df_irrigacoes = load_irrigacoes(conn, area_selecionada, periodo)
-    df_alertas = load_alertas(conn, area_selecionada, periodo)
+    df_pivot = load_leituras(get_db(), area_selecionada, periodo)
+    versao, minuto = versao_dados(), minuto_atual()
+    df_irrigacoes = load_irrigacoes(conn, area_selecionada, periodo, versao, minuto)
+    df_alertas = load_alertas(conn, area_selecionada, periodo, versao, minuto)
 
 # Verifica se há dados
-if df_leituras.empty:
+if df_pivot.empty:
     st.warning("Não há dados de leituras para o período e área selecionados.")
 else:
     # Prepara os dados para visualização
@@ -251,44 +558,10 @@ else:
     
     st.header(f"Área: {nome_area} - {nome_fazenda}")
     
-    # Cria um DataFrame pivotado para facilitar a visualização
-    df_pivot = df_leituras.pivot_table(
-        index='data_hora', 
-        columns='tipo_sensor', 
-        values='valor',
-        aggfunc='mean'
-    ).reset_index()
-    
     # Métricas principais
-    col1, col2, col3, col4 = st.columns(4)
-    
-    # Últimos valores registrados
-    ultima_umidade = df_pivot['umidade'].iloc[-1] if 'umidade' in df_pivot else 0
-    ultimo_ph = df_pivot['ph'].iloc[-1] if 'ph' in df_pivot else 0
-    ultimo_fosforo = df_pivot['fosforo'].iloc[-1] if 'fosforo' in df_pivot else 0
-    ultimo_potassio = df_pivot['potassio'].iloc[-1] if 'potassio' in df_pivot else 0
-    
-    # Status da irrigação
-    irrigacao_ativa = False
-    for _, row in df_irrigacoes.iterrows():
-        if pd.isna(row['fim_timestamp']) or row['fim_timestamp'] > datetime.datetime.now():
-            irrigacao_ativa = True
-            break
-    
-    # Alertas ativos
-    alertas_ativos = len(df_alertas[df_alertas['resolvido'] == 0])
-    
-    # Exibe métricas
-    col1.metric("Umidade do Solo", f"{ultima_umidade:.1f}%", 
-               delta="Normal" if 30 <= ultima_umidade <= 70 else "Crítico")
-    
-    col2.metric("pH", f"{ultimo_ph:.1f}", 
-               delta="Normal" if 5.5 <= ultimo_ph <= 7.0 else "Crítico")
-    
-    col3.metric("Irrigação", "ATIVA" if irrigacao_ativa else "DESATIVADA")
-    
-    col4.metric("Alertas Ativos", alertas_ativos, 
-               delta="Nenhum" if alertas_ativos == 0 else f"{alertas_ativos} alerta(s)")
+    agora = datetime.datetime.now()
+    cartoes = [coluna.empty() for coluna in st.columns(4)]
+    exibir_metricas(cartoes, df_pivot, df_irrigacoes, df_alertas, agora)
     
     # Gráficos
     st.subheader("Monitoramento de Sensores")
@@ -298,47 +571,9 @@ else:
     
     with tab1:
         # Gráfico de umidade com períodos de irrigação
-        fig = make_subplots(specs=[[{"secondary_y": True}]])
-        
-        # Adiciona linha de umidade
-        if 'umidade' in df_pivot:
-            fig.add_trace(
-                go.Scatter(
-                    x=df_pivot['data_hora'], 
-                    y=df_pivot['umidade'],
-                    name="Umidade (%)",
-                    line=dict(color='blue', width=2)
-                ),
-                secondary_y=False
-            )
-        
-        # Adiciona barras para irrigação
-        for _, row in df_irrigacoes.iterrows():
-            fig.add_vrect(
-                x0=row['inicio_timestamp'],
-                x1=row['fim_timestamp'] if not pd.isna(row['fim_timestamp']) else datetime.datetime.now(),
-                fillcolor="rgba(0, 255, 0, 0.2)",
-                opacity=0.5,
-                layer="below",
-                line_width=0,
-                annotation_text="Irrigação",
-                annotation_position="top left"
-            )
-        
-        # Adiciona linhas de limite
-        fig.add_hline(y=30, line_dash="dash", line_color="red", 
-                     annotation_text="Limite inferior", annotation_position="bottom right")
-        fig.add_hline(y=70, line_dash="dash", line_color="red", 
-                     annotation_text="Limite superior", annotation_position="top right")
-        
-        fig.update_layout(
-            title="Umidade do Solo e Períodos de Irrigação",
-            xaxis_title="Data/Hora",
-            yaxis_title="Umidade (%)",
-            height=500
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        grafico_umidade = st.empty()
+        grafico_umidade.plotly_chart(figura_umidade(df_pivot, df_irrigacoes, agora, pontos_grafico),
+                                     use_container_width=True)
         
         # Estatísticas de irrigação
         if not df_irrigacoes.empty:
@@ -368,59 +603,8 @@ else:
     
     with tab2:
         # Gráfico de pH e nutrientes
-        fig = make_subplots(specs=[[{"secondary_y": True}]])
-        
-        # Adiciona linha de pH
-        if 'ph' in df_pivot:
-            fig.add_trace(
-                go.Scatter(
-                    x=df_pivot['data_hora'], 
-                    y=df_pivot['ph'],
-                    name="pH",
-                    line=dict(color='purple', width=2)
-                ),
-                secondary_y=False
-            )
-        
-        # Adiciona linhas de nutrientes
-        if 'fosforo' in df_pivot:
-            fig.add_trace(
-                go.Scatter(
-                    x=df_pivot['data_hora'], 
-                    y=df_pivot['fosforo'],
-                    name="Fósforo (mg/kg)",
-                    line=dict(color='green', width=2)
-                ),
-                secondary_y=True
-            )
-        
-        if 'potassio' in df_pivot:
-            fig.add_trace(
-                go.Scatter(
-                    x=df_pivot['data_hora'], 
-                    y=df_pivot['potassio'],
-                    name="Potássio (mg/kg)",
-                    line=dict(color='orange', width=2)
-                ),
-                secondary_y=True
-            )
-        
-        # Adiciona linhas de limite para pH
-        fig.add_hline(y=5.5, line_dash="dash", line_color="red", 
-                     annotation_text="pH mínimo", annotation_position="bottom right")
-        fig.add_hline(y=7.0, line_dash="dash", line_color="red", 
-                     annotation_text="pH máximo", annotation_position="top right")
-        
-        fig.update_layout(
-            title="pH e Níveis de Nutrientes",
-            xaxis_title="Data/Hora",
-            height=500
-        )
-        
-        fig.update_yaxes(title_text="pH", secondary_y=False)
-        fig.update_yaxes(title_text="Nutrientes (mg/kg)", secondary_y=True)
-        
-        st.plotly_chart(fig, use_container_width=True)
+        grafico_nutrientes = st.empty()
+        grafico_nutrientes.plotly_chart(figura_nutrientes(df_pivot, pontos_grafico), use_container_width=True)
         
         # Estatísticas de nutrientes
         if 'fosforo' in df_pivot and 'potassio' in df_pivot:
@@ -500,59 +684,138 @@ with st.sidebar.expander("Adicionar Leitura Simulada"):
         submitted = st.form_submit_button("Adicionar Leitura")
         
         if submitted:
-            try:
-                # Obtém o ID do sensor correspondente
-                cursor = conn.cursor()
-                cursor.execute("SELECT id_sensor FROM sensor WHERE tipo_sensor = ?", (sensor_tipo,))
-                id_sensor = cursor.fetchone()[0]
-                
-                # Adiciona a leitura
-                data_hora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                cursor.execute(
-                    "INSERT INTO leitura (id_sensor, id_area, valor, data_hora) VALUES (?, ?, ?, ?)",
-                    (id_sensor, area_selecionada, valor, data_hora)
-                )
-                conn.commit()
-                
-                st.success(f"Leitura de {sensor_tipo} adicionada com sucesso!")
-                
-                # Verifica se deve gerar um alerta
-                if sensor_tipo == "umidade" and valor < 30:
-                    cursor.execute(
-                        "INSERT INTO alerta (id_area, id_sensor, timestamp, tipo_alerta, descricao) VALUES (?, ?, ?, ?, ?)",
-                        (area_selecionada, id_sensor, data_hora, "Umidade Baixa", "Umidade abaixo do limite recomendado")
-                    )
-                    conn.commit()
-                    st.warning("Alerta de umidade baixa gerado!")
-                
-                elif sensor_tipo == "ph" and (valor < 5.5 or valor > 7.0):
+            with get_trava_conexao():
+                try:
+                    # Obtém o ID do sensor correspondente
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT id_sensor FROM sensor WHERE tipo_sensor = ?", (sensor_tipo,))
+                    id_sensor = cursor.fetchone()[0]
+                    
+                    # Adiciona a leitura
+                    data_hora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                     cursor.execute(
-                        "INSERT INTO alerta (id_area, id_sensor, timestamp, tipo_alerta, descricao) VALUES (?, ?, ?, ?, ?)",
-                        (area_selecionada, id_sensor, data_hora, "pH Inadequado", f"pH de {valor:.1f} está fora da faixa ideal (5.5-7.0)")
+                        "INSERT INTO leitura (id_sensor, id_area, valor, data_hora) VALUES (?, ?, ?, ?)",
+                        (id_sensor, area_selecionada, valor, data_hora)
                     )
                     conn.commit()
-                    st.warning("Alerta de pH inadequado gerado!")
+                    
+                    st.success(f"Leitura de {sensor_tipo} adicionada com sucesso!")
+                    
+                    # Verifica se deve gerar um alerta
+                    if sensor_tipo == "umidade" and valor < 30:
+                        cursor.execute(
+                            "INSERT INTO alerta (id_area, id_sensor, timestamp, tipo_alerta, descricao) VALUES (?, ?, ?, ?, ?)",
+                            (area_selecionada, id_sensor, data_hora, "Umidade Baixa", "Umidade abaixo do limite recomendado")
+                        )
+                        conn.commit()
+                        st.warning("Alerta de umidade baixa gerado!")
+                    
+                    elif sensor_tipo == "ph" and (valor < 5.5 or valor > 7.0):
+                        cursor.execute(
+                            "INSERT INTO alerta (id_area, id_sensor, timestamp, tipo_alerta, descricao) VALUES (?, ?, ?, ?, ?)",
+                            (area_selecionada, id_sensor, data_hora, "pH Inadequado", f"pH de {valor:.1f} está fora da faixa ideal (5.5-7.0)")
+                        )
+                        conn.commit()
+                        st.warning("Alerta de pH inadequado gerado!")
+                    
+                    elif sensor_tipo in ["fosforo", "potassio"] and valor < 0.5:
+                        cursor.execute(
+                            "INSERT INTO alerta (id_area, id_sensor, timestamp, tipo_alerta, descricao) VALUES (?, ?, ?, ?, ?)",
+                            (area_selecionada, id_sensor, data_hora, f"{sensor_tipo.capitalize()} Baixo", f"Nível de {sensor_tipo} abaixo do recomendado")
+                        )
+                        conn.commit()
+                        st.warning(f"Alerta de {sensor_tipo} baixo gerado!")
+                    
+                    # Verifica se deve iniciar irrigação
+                    if sensor_tipo == "umidade" and valor < 30:
+                        cursor.execute(
+                            "INSERT INTO irrigacao (id_area, inicio_timestamp, modo) VALUES (?, ?, ?)",
+                            (area_selecionada, data_hora, "automatico")
+                        )
+                        conn.commit()
+                        st.success("Irrigação iniciada automaticamente!")
                 
-                elif sensor_tipo in ["fosforo", "potassio"] and valor < 0.5:
-                    cursor.execute(
-                        "INSERT INTO alerta (id_area, id_sensor, timestamp, tipo_alerta, descricao) VALUES (?, ?, ?, ?, ?)",
-                        (area_selecionada, id_sensor, data_hora, f"{sensor_tipo.capitalize()} Baixo", f"Nível de {sensor_tipo} abaixo do recomendado")
-                    )
-                    conn.commit()
-                    st.warning(f"Alerta de {sensor_tipo} baixo gerado!")
-                
-                # Verifica se deve iniciar irrigação
-                if sensor_tipo == "umidade" and valor < 30:
-                    cursor.execute(
-                        "INSERT INTO irrigacao (id_area, inicio_timestamp, modo) VALUES (?, ?, ?)",
-                        (area_selecionada, data_hora, "automatico")
-                    )
-                    conn.commit()
-                    st.success("Irrigação iniciada automaticamente!")
-            
-            except Exception as e:
-                st.error(f"Erro ao adicionar leitura: {e}")
+                except Exception as e:
+                    st.error(f"Erro ao adicionar leitura: {e}")
+
+with st.sidebar.expander("Exportar Leituras"):
+    # As leituras da área e do período selecionados são gravadas em disco em lotes
+    # (CSV ou Parquet), sem passar por um DataFrame; o arquivo é baixado direto do disco
+    formato_exportacao = st.radio("Formato", ["csv", "parquet"], horizontal=True)
+    
+    if st.button("Gerar Arquivo"):
+        os.makedirs(PASTA_EXPORTACOES, exist_ok=True)
+        limite = time.time() - EXPORTACAO_VALIDADE
+        for antigo in os.scandir(PASTA_EXPORTACOES):
+            if antigo.is_file() and antigo.stat().st_mtime < limite:
+                os.remove(antigo.path)
+        
+        nome_arquivo = f"leituras_area{area_selecionada}_{datetime.datetime.now():%Y%m%d_%H%M%S}.{formato_exportacao}"
+        caminho = os.path.join(PASTA_EXPORTACOES, nome_arquivo)
+        inicio = (datetime.datetime.now(datetime.timezone.utc) - timedelta(days=periodo)).strftime("%Y-%m-%d %H:%M:%S")
+        
+        # Conexão própria: a exportação longa não disputa a conexão compartilhada das sessões
+        db_exportacao = SistemaIrrigacaoDB(DB_PATH, cache_referencias=False, aplicar_schema=False)
+        try:
+            with st.spinner("Exportando leituras..."):
+                tamanho = exportar_leituras(db_exportacao, caminho, formato_exportacao,
+                                            id_area=area_selecionada, data_inicio=inicio)
+        except Exception as e:
+            st.error(f"Erro ao exportar leituras: {e}")
+        else:
+            if st.get_option("server.enableStaticServing"):
+                st.markdown(f"[Baixar {nome_arquivo}](app/static/exportacoes/{nome_arquivo}) "
+                            f"({tamanho / 1e6:.1f} MB)")
+            else:
+                # Sem arquivos estáticos o Streamlit precisa carregar o arquivo inteiro em memória
+                with open(caminho, "rb") as arquivo:
+                    st.download_button(f"Baixar {nome_arquivo}", arquivo, file_name=nome_arquivo)
+                st.caption("Para arquivos grandes, inicie o dashboard com --server.enableStaticServing true.")
+        finally:
+            db_exportacao.fechar()
 
 # Rodapé
 st.sidebar.markdown("---")
-st.sidebar.caption("Sistema de Irrigação Inteligente © 2023")
\ No newline at end of file
+st.sidebar.caption("Sistema de Irrigação Inteligente © 2023")
+
+# Modo ao vivo. A cada intervalo a única consulta é a versão dos dados (um PRAGMA); só quando
+# ela muda as leituras são atualizadas de forma incremental (marca d'água da janela) e as
+# irrigações e alertas vêm do cache compartilhado. Entre as verificações a sessão fica parada
+# em time.sleep; o status atualizado a cada segundo passa pelo Streamlit, que encerra o laço
+# assim que o usuário mexer em algum filtro.
+if modo_ao_vivo and not df_pivot.empty:
+    status_ao_vivo = st.sidebar.empty()
+    verificacao = time.monotonic()
+    while True:
+        time.sleep(1)
+        status_ao_vivo.caption(f"Ao vivo: {datetime.datetime.now():%H:%M:%S}")
+        if time.monotonic() - verificacao < intervalo_ao_vivo:
+            continue
+        verificacao = time.monotonic()
+        
+        # A janela de N dias também avança com o tempo, mesmo sem gravações
+        nova_versao, novo_minuto = versao_dados(), minuto_atual()
+        if nova_versao == versao and novo_minuto == minuto:
+            continue
+        versao, minuto = nova_versao, novo_minuto
+        
+        # A janela é compartilhada entre as sessões: outra sessão pode já ter avançado a
+        # marca d'água, então a comparação é com o que esta sessão exibiu
+        novo_pivot = load_leituras(get_db(), area_selecionada, periodo)
+        leituras_mudaram = not novo_pivot.equals(df_pivot)
+        novas_irrigacoes = load_irrigacoes(conn, area_selecionada, periodo, versao, minuto)
+        irrigacoes_mudaram = not novas_irrigacoes.equals(df_irrigacoes)
+        novos_alertas = load_alertas(conn, area_selecionada, periodo, versao, minuto)
+        alertas_mudaram = not novos_alertas.equals(df_alertas)
+        if novo_pivot.empty or not (leituras_mudaram or irrigacoes_mudaram or alertas_mudaram):
+            continue
+        
+        # Redesenha só o que depende dos dados alterados
+        df_pivot, df_irrigacoes, df_alertas = novo_pivot, novas_irrigacoes, novos_alertas
+        agora = datetime.datetime.now()
+        exibir_metricas(cartoes, df_pivot, df_irrigacoes, df_alertas, agora)
+        if leituras_mudaram or irrigacoes_mudaram:
+            grafico_umidade.plotly_chart(figura_umidade(df_pivot, df_irrigacoes, agora, pontos_grafico),
+                                         use_container_width=True)
+        if leituras_mudaram:
+            grafico_nutrientes.plotly_chart(figura_nutrientes(df_pivot, pontos_grafico), use_container_width=True)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Fachada assíncrona (asyncio) para o Sistema de Irrigação Inteligente Expandido
+Expõe versões aguardáveis dos métodos de SistemaIrrigacaoDB sem bloquear o loop de
+eventos: as escritas são serializadas em uma thread dedicada e as leituras são
+distribuídas entre um pequeno conjunto de threads, cada uma com sua própria conexão.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from db_manager_expandido_completo import SistemaIrrigacaoDB, MetricasDB
+
+# Métodos executados na thread de escrita (uma única conexão, em ordem de chegada)
+METODOS_ESCRITA = (
+    'adicionar_fazenda', 'atualizar_fazenda', 'excluir_fazenda',
+    'adicionar_area', 'atualizar_area', 'renomear_areas', 'excluir_area',
+    'adicionar_sensor', 'atualizar_sensor', 'atualizar_sensores', 'excluir_sensor',
+    'associar_sensor_area', 'desassociar_sensor_area', 'reatribuir_sensores',
+    'adicionar_leitura', 'excluir_leitura',
+    'adicionar_tecnico', 'atualizar_tecnico', 'excluir_tecnico',
+    'adicionar_manutencao', 'atualizar_manutencao', 'excluir_manutencao',
+    'expurgar_sensor', 'expurgar_area', 'expurgar_fazenda',
+    'adicionar_irrigacao', 'finalizar_irrigacao', 'finalizar_irrigacoes_abertas',
+    'adicionar_alerta', 'resolver_alerta', 'resolver_alertas', 'excluir_alerta',
+)
+
+# Métodos executados no conjunto de threads de leitura
+METODOS_LEITURA = (
+    'obter_fazenda', 'listar_fazendas',
+    'obter_area', 'listar_areas', 'obter_areas_por_fazendas',
+    'obter_sensor', 'listar_sensores', 'listar_sensores_area', 'listar_sensores_por_areas',
+    'listar_areas_sensor', 'obter_hierarquia', 'obter_versao_topologia',
+    'obter_leitura', 'obter_leituras_por_ids', 'listar_leituras', 'listar_leituras_pagina',
+    'listar_leituras_colunar', 'listar_leituras_pivotadas', 'agregar_leituras',
+    'obter_tecnico', 'listar_tecnicos',
+    'obter_manutencao', 'listar_manutencoes', 'listar_manutencoes_pagina',
+    'obter_irrigacao', 'listar_irrigacoes', 'listar_irrigacoes_pagina',
+    'obter_alerta', 'listar_alertas', 'listar_alertas_pagina',
+    'contar_alertas_ativos', 'listar_alertas_ativos_por_area', 'listar_indicadores_areas',
+    'obter_leituras_compat', 'obter_historico_irrigacao_compat', 'obter_alertas_compat',
+)
+
+class SistemaIrrigacaoDBAsync:
+    """Fachada asyncio sobre SistemaIrrigacaoDB.
+
+    - Escritas: uma thread dedicada com a conexão principal (que aplica o schema).
+    - Leituras: até `leitores` threads, cada uma com sua conexão.
+    - Nenhuma instância usa o cache de referências: as invalidações feitas pelo escritor
+      não alcançariam os leitores, que passariam a devolver registros desatualizados.
+    - Leituras idênticas simultâneas (mesmo método e argumentos) são coalescidas em
+      uma única consulta; todos os chamadores recebem o mesmo objeto de resultado.
+
+    O modo WAL é ativado por padrão para que leitores e o escritor não se bloqueiem.
+    Os geradores iter_* não são expostos; use os métodos *_pagina para percorrer
+    grandes volumes.
+    """
+
+    def __init__(self, db_path: str = "irrigacao_expandido.db", leitores: int = 4,
+                 registros_compactos: bool = False, wal: bool = True,
+                 metricas: Optional[MetricasDB] = None):
+        self.db_path = db_path
+        self.registros_compactos = registros_compactos
+        self.wal = wal
+        self.metricas = metricas  # compartilhado pelas conexões de todas as threads
+        self._local = threading.local()
+        self._instancias = []
+        self._trava_instancias = threading.Lock()
+        self._escritor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-escrita",
+                                            initializer=self._iniciar_thread, initargs=(True,))
+        self._leitores = ThreadPoolExecutor(max_workers=leitores, thread_name_prefix="db-leitura",
+                                            initializer=self._iniciar_thread, initargs=(False,))
+        self._em_andamento = {}
+        self._aberto = False
+
+    def _iniciar_thread(self, escritor: bool):
+        """Cria a instância de SistemaIrrigacaoDB exclusiva da thread atual"""
+        db = SistemaIrrigacaoDB(
+            self.db_path,
+            registros_compactos=self.registros_compactos,
+            cache_referencias=False,
+            check_same_thread=False,  # permite fechar a conexão a partir de fechar()
+            aplicar_schema=escritor,
+            metricas=self.metricas,
+        )
+        if escritor and self.wal:
+            db.conn.execute("PRAGMA journal_mode=WAL")
+        self._local.db = db
+        with self._trava_instancias:
+            self._instancias.append(db)
+
+    def _executar(self, nome: str, args, kwargs):
+        """Executa o método na instância da thread atual (chamado dentro do executor)"""
+        return getattr(self._local.db, nome)(*args, **kwargs)
+
+    async def abrir(self):
+        """Inicializa a conexão de escrita (cria/atualiza o schema antes dos leitores)"""
+        if not self._aberto:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._escritor, lambda: None)
+            self._aberto = True
+        return self
+
+    async def fechar(self):
+        """Aguarda as operações pendentes e fecha todas as conexões"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._encerrar)
+
+    def _encerrar(self):
+        self._escritor.shutdown(wait=True)
+        self._leitores.shutdown(wait=True)
+        with self._trava_instancias:
+            for db in self._instancias:
+                db.fechar()
+            self._instancias.clear()
+
+    async def __aenter__(self):
+        return await self.abrir()
+
+    async def __aexit__(self, *exc):
+        await self.fechar()
+
+    async def _escrever(self, nome: str, *args, **kwargs):
+        await self.abrir()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._escritor, functools.partial(self._executar, nome, args, kwargs)
+        )
+
+    async def _ler(self, nome: str, *args, **kwargs):
+        await self.abrir()
+        loop = asyncio.get_running_loop()
+        try:
+            chave = (nome, args, tuple(sorted(kwargs.items())))
+            hash(chave)
+        except TypeError:
+            chave = None  # argumentos não hasheáveis (ex.: listas): sem coalescência
+
+        if chave is not None and chave in self._em_andamento:
+            return await asyncio.shield(self._em_andamento[chave])
+
+        futuro = loop.run_in_executor(
+            self._leitores, functools.partial(self._executar, nome, args, kwargs)
+        )
+        if chave is None:
+            return await futuro
+
+        self._em_andamento[chave] = futuro
+        futuro.add_done_callback(lambda _: self._em_andamento.pop(chave, None))
+        return await asyncio.shield(futuro)
+
+def _metodo_escrita(nome):
+    async def metodo(self, *args, **kwargs):
+        return await self._escrever(nome, *args, **kwargs)
+    metodo.__name__ = nome
+    metodo.__doc__ = f"Versão assíncrona de SistemaIrrigacaoDB.{nome} (thread de escrita)"
+    return metodo
+
+def _metodo_leitura(nome):
+    async def metodo(self, *args, **kwargs):
+        return await self._ler(nome, *args, **kwargs)
+    metodo.__name__ = nome
+    metodo.__doc__ = f"Versão assíncrona de SistemaIrrigacaoDB.{nome} (threads de leitura)"
+    return metodo
+
+for _nome in METODOS_ESCRITA:
+    setattr(SistemaIrrigacaoDBAsync, _nome, _metodo_escrita(_nome))
+for _nome in METODOS_LEITURA:
+    setattr(SistemaIrrigacaoDBAsync, _nome, _metodo_leitura(_nome))
+
+# Exemplo de uso
+if __name__ == "__main__":
+    async def exemplo():
+        async with SistemaIrrigacaoDBAsync("../db/exemplo_irrigacao.db") as db:
+            # Consultas simultâneas: as duas primeiras são idênticas e viram uma só
+            fazendas, mesmas_fazendas, alertas = await asyncio.gather(
+                db.listar_fazendas(),
+                db.listar_fazendas(),
+                db.listar_alertas(resolvidos=False),
+            )
+            print(f"Fazendas: {len(fazendas)}, alertas não resolvidos: {len(alertas)}")
+
+    asyncio.run(exemplo())
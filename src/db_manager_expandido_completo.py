@@ -1,30 +1,605 @@
 import sqlite3
 import os
+import re
+import sys
+import atexit
+import json
+import base64
+import binascii
 import datetime
-from typing import Dict, List, Any, Optional, Tuple, Union
+import itertools
+import functools
+import collections
+import types
+import time
+import bisect
+import threading
+import weakref
+import numbers
+from typing import Dict, List, Any, Optional, Tuple, Union, Iterator, Iterable, Callable
+
+# Caminho do schema SQL, resolvido a partir deste arquivo (independe do diretório atual)
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'db', 'schema_expandido.sql')
+
+# Versão do schema gravada em PRAGMA user_version depois de aplicado. Incremente-a a cada
+# alteração em schema_expandido.sql para que os bancos existentes sejam migrados uma vez
+VERSAO_SCHEMA = 1
+
+# Nome do tipo de registro compacto, a partir da primeira coluna (chave primária) do SELECT
+TIPOS_REGISTRO = {
+    'id_fazenda': 'Fazenda',
+    'id_area': 'Area',
+    'id_sensor': 'Sensor',
+    'id_sensor_area': 'SensorArea',
+    'id_leitura': 'Leitura',
+    'id_tecnico': 'Tecnico',
+    'id_manutencao': 'Manutencao',
+    'id_irrigacao': 'Irrigacao',
+    'id_alerta': 'Alerta',
+}
+
+@functools.lru_cache(maxsize=None)
+def tipo_registro(colunas: Tuple[str, ...]) -> type:
+    """Retorna (e memoriza) o namedtuple correspondente a um conjunto de colunas"""
+    nome = TIPOS_REGISTRO.get(colunas[0], 'Registro') if colunas else 'Registro'
+    return collections.namedtuple(nome, colunas, rename=True)
+
+class FabricaRegistros:
+    """row_factory que produz namedtuples (sem __dict__, nomes das colunas compartilhados
+    pela classe) em vez de sqlite3.Row convertido em dict.
+    
+    O tipo é resolvido apenas quando cursor.description muda, não a cada linha.
+    """
+    
+    def __init__(self):
+        self._descricao = None
+        self._tipo = None
+    
+    def __call__(self, cursor, row):
+        descricao = cursor.description
+        if descricao is not self._descricao:
+            self._tipo = tipo_registro(tuple(coluna[0] for coluna in descricao))
+            self._descricao = descricao
+        return tuple.__new__(self._tipo, row)
+
+def _identidade(registro):
+    return registro
+
+# Funções de agregação aceitas por agregar_leituras (nome -> expressão SQL sobre o bucket)
+FUNCOES_AGREGACAO = {
+    'min': 'MIN(valor)',
+    'max': 'MAX(valor)',
+    'avg': 'AVG(valor)',
+    'count': 'COUNT(*)',
+    'last': 'MAX(CASE WHEN ordem = 1 THEN valor END)',
+}
+
+# Unidades aceitas nos intervalos de agregação ('30s', '15min', '1h', '1d')
+UNIDADES_INTERVALO = {'s': 1, 'min': 60, 'h': 3600, 'd': 86400}
+
+def segundos_intervalo(intervalo: Union[int, str]) -> int:
+    """Converte um intervalo ('15min', '1h', '1d' ou segundos inteiros) em segundos"""
+    if isinstance(intervalo, int):
+        segundos = intervalo
+    else:
+        texto = str(intervalo).strip().lower()
+        numero = texto.rstrip('abcdefghijklmnopqrstuvwxyz')
+        unidade = texto[len(numero):] or 's'
+        if unidade not in UNIDADES_INTERVALO or not numero.isdigit():
+            raise ValueError(f"Intervalo inválido: {intervalo!r}")
+        segundos = int(numero) * UNIDADES_INTERVALO[unidade]
+    if segundos <= 0:
+        raise ValueError(f"Intervalo inválido: {intervalo!r}")
+    return segundos
+
+# Nós imutáveis da hierarquia fazenda -> área -> sensor (ver obter_hierarquia)
+NoFazenda = collections.namedtuple('NoFazenda', ['id_fazenda', 'nome', 'localizacao', 'tamanho_hectares'])
+NoArea = collections.namedtuple('NoArea', ['id_area', 'id_fazenda', 'nome_area', 'coordenadas'])
+NoSensor = collections.namedtuple('NoSensor', ['id_sensor', 'tipo_sensor', 'modelo', 'unidade_medida'])
+
+# Topologia completa indexada por ID. Os mapeamentos são somente leitura (MappingProxyType)
+# e as listas de filhos são tuplas de IDs, na ordem de exibição (nome / data de instalação).
+Hierarquia = collections.namedtuple('Hierarquia', [
+    'versao',             # valor de versao_topologia quando a hierarquia foi carregada
+    'fazendas',           # id_fazenda -> NoFazenda
+    'areas',              # id_area -> NoArea
+    'sensores',           # id_sensor -> NoSensor (apenas sensores instalados em alguma área)
+    'areas_por_fazenda',  # id_fazenda -> (id_area, ...)
+    'sensores_por_area',  # id_area -> (id_sensor, ...) associações ativas
+    'areas_por_sensor',   # id_sensor -> (id_area, ...) associações ativas
+])
+
+class CacheLRU:
+    """Cache LRU limitado, com contagem de acertos e falhas"""
+    
+    def __init__(self, capacidade: int = 1024):
+        self.capacidade = capacidade
+        self.acertos = 0
+        self.falhas = 0
+        self._itens = collections.OrderedDict()
+    
+    def obter(self, chave):
+        """Retorna o valor em cache (ou None), marcando-o como usado recentemente"""
+        try:
+            valor = self._itens[chave]
+        except KeyError:
+            self.falhas += 1
+            return None
+        self._itens.move_to_end(chave)
+        self.acertos += 1
+        return valor
+    
+    def guardar(self, chave, valor):
+        """Guarda um valor, descartando o menos usado se a capacidade for excedida"""
+        self._itens[chave] = valor
+        self._itens.move_to_end(chave)
+        if len(self._itens) > self.capacidade:
+            self._itens.popitem(last=False)
+    
+    def invalidar(self, chave):
+        """Remove uma chave do cache, se existir"""
+        self._itens.pop(chave, None)
+    
+    def limpar(self):
+        """Remove todos os itens (as estatísticas são mantidas)"""
+        self._itens.clear()
+    
+    def estatisticas(self) -> Dict:
+        """Retorna acertos, falhas, taxa de acerto, tamanho e capacidade"""
+        total = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': self.acertos / total if total else 0.0,
+            'tamanho': len(self._itens),
+            'capacidade': self.capacidade,
+        }
+
+# Duração em minutos de um ciclo de irrigação calculada no SQL (parâmetro :fim),
+# em segundos inteiros como o cálculo anterior em Python. strftime retorna NULL para datas
+# que não reconhece, por isso os UPDATEs só aplicam a expressão em ciclos com início válido
+# (SQL_INICIO_VALIDO) e verificam :fim antes
+SQL_DURACAO_MINUTOS = (
+    "(CAST(strftime('%s', :fim) AS INTEGER) - CAST(strftime('%s', inicio_timestamp) AS INTEGER)) / 60.0"
+)
+SQL_INICIO_VALIDO = "strftime('%s', inicio_timestamp) IS NOT NULL"
+
+# Colunas das tuplas entregues por iter_leituras_lotes (exportação de leituras)
+COLUNAS_LEITURAS_LOTE = ('id_leitura', 'data_hora', 'id_fazenda', 'nome_fazenda', 'id_area', 'nome_area',
+                         'id_sensor', 'tipo_sensor', 'unidade_medida', 'valor')
+
+# Limites (em segundos) dos intervalos do histograma de latência
+LIMITES_HISTOGRAMA = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+def contar_linhas(resultado) -> int:
+    """Número de linhas representadas pelo retorno de um método de consulta"""
+    if isinstance(resultado, list):
+        return len(resultado)
+    if isinstance(resultado, tuple) and len(resultado) == 2 and isinstance(resultado[0], list):
+        return len(resultado[0])  # (página, token) dos métodos *_pagina
+    if hasattr(resultado, 'shape'):
+        return resultado.shape[0]  # DataFrame / ndarray
+    if isinstance(resultado, dict):
+        valores = list(resultado.values())
+        if valores and all(hasattr(v, 'shape') for v in valores):
+            return len(valores[0])  # formato colunar (dict de arrays)
+        return 1 if resultado else 0
+    if isinstance(resultado, tuple) and hasattr(resultado, '_fields'):
+        return 1  # registro compacto
+    return 0
+
+class MetricasDB:
+    """Métricas de uso do banco: chamadas, latência e linhas por método e log de consultas lentas.
+    
+    Pode ser compartilhada entre várias instâncias de SistemaIrrigacaoDB (é thread-safe).
+    Instruções SQL com duração >= limite_lento segundos são guardadas (até max_lentas)
+    com o respectivo EXPLAIN QUERY PLAN.
+    """
+    
+    def __init__(self, limite_lento: float = 0.1, max_lentas: int = 100,
+                 limites: Tuple[float, ...] = LIMITES_HISTOGRAMA):
+        self.limite_lento = limite_lento
+        self.limites = tuple(limites)
+        self._trava = threading.Lock()
+        self._metodos = {}
+        self._lentas = collections.deque(maxlen=max_lentas)
+        self._erros = collections.deque(maxlen=max_lentas)
+        self._total_lentas = 0
+    
+    def registrar_chamada(self, metodo: str, duracao: float, linhas: int = 0, erro: bool = False):
+        """Registra uma chamada de método com sua duração e linhas retornadas"""
+        with self._trava:
+            m = self._metodos.get(metodo)
+            if m is None:
+                m = self._metodos[metodo] = {
+                    'chamadas': 0, 'erros': 0, 'linhas': 0,
+                    'tempo_total': 0.0, 'tempo_max': 0.0,
+                    'intervalos': [0] * (len(self.limites) + 1),
+                }
+            m['chamadas'] += 1
+            m['erros'] += erro
+            m['linhas'] += linhas
+            m['tempo_total'] += duracao
+            m['tempo_max'] = max(m['tempo_max'], duracao)
+            m['intervalos'][bisect.bisect_left(self.limites, duracao)] += 1
+    
+    def registrar_erro(self, sql: str, erro: str):
+        """Guarda uma instrução que falhou (os métodos apenas imprimem o erro)"""
+        with self._trava:
+            self._erros.append({
+                'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+                'sql': ' '.join(sql.split()),
+                'erro': erro,
+            })
+    
+    def registrar_instrucao(self, conn: sqlite3.Connection, sql: str, parametros, duracao: float):
+        """Guarda a instrução no log de consultas lentas se ultrapassar o limite"""
+        if duracao < self.limite_lento:
+            return
+        plano = None
+        if parametros is not None:
+            try:
+                cursor = conn.cursor(sqlite3.Cursor)  # cursor não instrumentado
+                cursor.execute("EXPLAIN QUERY PLAN " + sql, parametros)
+                plano = [linha[3] for linha in cursor.fetchall()]
+            except sqlite3.Error:
+                pass
+        registro = {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'duracao': duracao,
+            'sql': ' '.join(sql.split()),
+            'parametros': repr(parametros) if parametros is not None else None,
+            'plano': plano,
+        }
+        with self._trava:
+            self._lentas.append(registro)
+            self._total_lentas += 1
+    
+    def snapshot(self) -> Dict:
+        """Retorna uma cópia das métricas atuais.
+        
+        Os histogramas são cumulativos: 'histograma'[limite] é o número de chamadas
+        com duração <= limite (chave '+Inf' para o total).
+        """
+        with self._trava:
+            metodos = {}
+            for nome, m in self._metodos.items():
+                acumulado = list(itertools.accumulate(m['intervalos']))
+                histograma = {str(limite): n for limite, n in zip(self.limites, acumulado)}
+                histograma['+Inf'] = acumulado[-1]
+                metodos[nome] = {
+                    'chamadas': m['chamadas'],
+                    'erros': m['erros'],
+                    'linhas': m['linhas'],
+                    'tempo_total': m['tempo_total'],
+                    'tempo_medio': m['tempo_total'] / m['chamadas'],
+                    'tempo_max': m['tempo_max'],
+                    'histograma': histograma,
+                }
+            return {
+                'metodos': metodos,
+                'consultas_lentas': list(self._lentas),
+                'total_consultas_lentas': self._total_lentas,
+                'erros_recentes': list(self._erros),
+                'limite_lento': self.limite_lento,
+            }
+    
+    def limpar(self):
+        """Zera todas as métricas"""
+        with self._trava:
+            self._metodos.clear()
+            self._lentas.clear()
+            self._erros.clear()
+            self._total_lentas = 0
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """Cursor que mede cada instrução (execução + leitura das linhas) para o log de consultas lentas"""
+    
+    _pendente = None
+    
+    def _finalizar(self):
+        """Entrega a instrução em andamento às métricas da conexão"""
+        pendente, self._pendente = self._pendente, None
+        if pendente is not None:
+            self.connection.metricas.registrar_instrucao(self.connection, *pendente)
+    
+    def _medir(self, sql, parametros, executar):
+        self._finalizar()
+        inicio = time.perf_counter()
+        try:
+            executar()
+        except sqlite3.Error as e:
+            self.connection.erros += 1
+            self.connection.metricas.registrar_erro(sql, str(e))
+            raise
+        self._pendente = [sql, parametros, time.perf_counter() - inicio]
+        self.connection.pendentes.add(self)
+        return self
+    
+    def _acumular(self, inicio, esgotado):
+        if self._pendente is not None:
+            self._pendente[2] += time.perf_counter() - inicio
+            if esgotado:
+                self._finalizar()
+    
+    def execute(self, sql, parametros=()):
+        return self._medir(sql, parametros, lambda: super(CursorInstrumentado, self).execute(sql, parametros))
+    
+    def executemany(self, sql, sequencia):
+        # Sem EXPLAIN: a sequência de parâmetros já foi consumida
+        return self._medir(sql, None, lambda: super(CursorInstrumentado, self).executemany(sql, sequencia))
+    
+    def fetchone(self):
+        inicio = time.perf_counter()
+        linha = super().fetchone()
+        self._acumular(inicio, linha is None)
+        return linha
+    
+    def fetchmany(self, size=None):
+        inicio = time.perf_counter()
+        tamanho = self.arraysize if size is None else size
+        linhas = super().fetchmany(tamanho)
+        self._acumular(inicio, len(linhas) < tamanho)
+        return linhas
+    
+    def fetchall(self):
+        inicio = time.perf_counter()
+        linhas = super().fetchall()
+        self._acumular(inicio, True)
+        return linhas
+
+class ConexaoInstrumentada(sqlite3.Connection):
+    """Conexão cujos cursores (inclusive os de execute()) são CursorInstrumentado"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metricas = None
+        self.erros = 0  # instruções que falharam (para contar erros por método)
+        self.pendentes = weakref.WeakSet()
+    
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+    
+    def executemany(self, sql, sequencia):
+        return self.cursor().executemany(sql, sequencia)
+    
+    def finalizar_pendentes(self):
+        """Registra as instruções cujas linhas não foram lidas até o fim (ex.: fetchone)"""
+        for cursor in list(self.pendentes):
+            cursor._finalizar()
+
+# Padrões usados para reduzir uma instrução SQL ao seu formato (literais viram ?)
+_RE_COMENTARIO = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_RE_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMERO = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_RE_LISTA = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_RE_ESPACOS = re.compile(r"\s+")
+
+def normalizar_sql(sql: str) -> str:
+    """Reduz uma instrução SQL ao seu formato: sem comentários, literais trocados por ?,
+    listas IN (?, ?, ...) colapsadas e espaços normalizados"""
+    sql = _RE_COMENTARIO.sub(' ', sql)
+    sql = _RE_TEXTO.sub('?', sql)
+    sql = _RE_NUMERO.sub('?', sql)
+    sql = _RE_LISTA.sub('(...)', sql)
+    return _RE_ESPACOS.sub(' ', sql).strip()
+
+class _InstrucaoAtual:
+    """Instrução em andamento em uma conexão perfilada (formato, início, último tick, ticks).
+    
+    Os callbacks da conexão e o relatório (de outra thread) a acessam sob a trava própria.
+    Quando a conexão é descartada, a instrução pendente vai para a fila do profiler.
+    """
+    
+    def __init__(self, profiler: 'ProfilerSQL'):
+        self.profiler = profiler
+        self.trava = threading.Lock()
+        self.formato = None
+        self.inicio = self.ultimo_tick = 0.0
+        self.ticks = 0
+    
+    def _fechar(self):
+        if self.formato is not None:
+            self.profiler._registrar(self.formato, self.ultimo_tick - self.inicio,
+                                     self.ticks * self.profiler.passos)
+            self.formato = None
+    
+    def fechar(self):
+        with self.trava:
+            self._fechar()
+    
+    def __del__(self):
+        # Pode rodar dentro da coleta de lixo com a trava do profiler tomada: apenas enfileira
+        if self.formato is not None:
+            self.profiler._descartadas.append(
+                (self.formato, self.ultimo_tick - self.inicio, self.ticks * self.profiler.passos))
+    
+    def ao_executar(self, sql):
+        formato = normalizar_sql(sql)
+        with self.trava:
+            self._fechar()
+            self.formato = formato
+            self.inicio = self.ultimo_tick = time.perf_counter()
+            self.ticks = 0
+    
+    def ao_progredir(self):
+        with self.trava:
+            self.ultimo_tick = time.perf_counter()
+            self.ticks += 1
+        return 0  # 0 = continuar a execução
+
+class ProfilerSQL:
+    """Perfil das instruções SQL executadas, via set_trace_callback e set_progress_handler.
+    
+    Agrega por formato de instrução (normalizar_sql) o número de execuções, o tempo e
+    os passos da máquina virtual do SQLite. Os passos têm resolução de `passos` instruções
+    da VM e o tempo é medido do início da instrução até a última chamada do progress
+    handler (instruções com menos de `passos` passos contam tempo zero), por isso ambos
+    são aproximados. Pode ser anexado a várias conexões (é thread-safe).
+    """
+    
+    def __init__(self, passos: int = 100, relatorio_ao_sair: bool = False, limite_relatorio: int = 30):
+        self.passos = passos
+        self.limite_relatorio = limite_relatorio
+        self._trava = threading.Lock()
+        self._formatos = {}
+        # Instrução em andamento de cada conexão; a entrada some quando os callbacks da
+        # conexão são liberados, então anexar muitas conexões não acumula memória
+        self._pendentes = weakref.WeakSet()
+        self._descartadas = collections.deque()  # instruções pendentes de conexões descartadas
+        if relatorio_ao_sair:
+            atexit.register(self.imprimir_relatorio)
+    
+    def anexar(self, conn: sqlite3.Connection):
+        """Ativa o perfil em uma conexão"""
+        atual = _InstrucaoAtual(self)
+        conn.set_trace_callback(atual.ao_executar)
+        conn.set_progress_handler(atual.ao_progredir, self.passos)
+        with self._trava:
+            self._pendentes.add(atual)
+    
+    def _registrar(self, formato: str, duracao: float, passos: int):
+        with self._trava:
+            f = self._formatos.get(formato)
+            if f is None:
+                f = self._formatos[formato] = {'execucoes': 0, 'tempo_total': 0.0, 'passos': 0}
+            f['execucoes'] += 1
+            f['tempo_total'] += duracao
+            f['passos'] += passos
+    
+    def relatorio(self, ordem: str = 'tempo_total') -> List[Dict]:
+        """Formatos de instrução ordenados por 'tempo_total', 'passos' ou 'execucoes'"""
+        with self._trava:
+            pendentes = list(self._pendentes)
+        for atual in pendentes:
+            atual.fechar()
+        while True:
+            try:
+                self._registrar(*self._descartadas.popleft())
+            except IndexError:
+                break
+        with self._trava:
+            linhas = [dict(f, sql=formato) for formato, f in self._formatos.items()]
+        return sorted(linhas, key=lambda f: f[ordem], reverse=True)
+    
+    def imprimir_relatorio(self, ordem: str = 'tempo_total', arquivo=None):
+        """Imprime os formatos de instrução mais custosos"""
+        arquivo = arquivo or sys.stderr
+        linhas = self.relatorio(ordem)
+        if not linhas:
+            return
+        print(f"\n=== Perfil SQL ({len(linhas)} formatos, ordenado por {ordem}) ===", file=arquivo)
+        print(f"{'execuções':>10} {'tempo (s)':>10} {'passos VM':>12}  instrução", file=arquivo)
+        for f in linhas[:self.limite_relatorio]:
+            sql = f['sql'] if len(f['sql']) <= 120 else f['sql'][:117] + '...'
+            print(f"{f['execucoes']:>10} {f['tempo_total']:>10.3f} {f['passos']:>12}  {sql}", file=arquivo)
+    
+    def limpar(self):
+        """Descarta os dados coletados"""
+        with self._trava:
+            self._formatos.clear()
+            self._descartadas.clear()
+
+_profiler_ambiente = None
+
+def profiler_do_ambiente() -> Optional[ProfilerSQL]:
+    """ProfilerSQL compartilhado do processo quando IRRIGACAO_PERFIL_SQL está definida.
+    
+    O valor da variável é a ordem do relatório impresso ao sair ('tempo_total', 'passos'
+    ou 'execucoes'; qualquer outro valor usa 'tempo_total').
+    """
+    global _profiler_ambiente
+    ordem = os.environ.get('IRRIGACAO_PERFIL_SQL')
+    if not ordem:
+        return None
+    if _profiler_ambiente is None:
+        _profiler_ambiente = ProfilerSQL()
+        if ordem not in ('tempo_total', 'passos', 'execucoes'):
+            ordem = 'tempo_total'
+        atexit.register(_profiler_ambiente.imprimir_relatorio, ordem)
+    return _profiler_ambiente
 
 class SistemaIrrigacaoDB:
     """Gerenciador de banco de dados para o Sistema de Irrigação Inteligente Expandido"""
     
-    def __init__(self, db_path: str = "irrigacao_expandido.db"):
-        """Inicializa a conexão com o banco de dados"""
+    def __init__(self, db_path: str = "irrigacao_expandido.db", registros_compactos: bool = False,
+                 cache_referencias: bool = True, tamanho_cache: int = 1024,
+                 check_same_thread: bool = True, aplicar_schema: bool = True,
+                 metricas: Optional[MetricasDB] = None, profiler: Optional[ProfilerSQL] = None,
+                 sincronizar: bool = False):
+        """Inicializa a conexão com o banco de dados.
+        
+        Com registros_compactos=True os métodos de consulta retornam namedtuples por
+        entidade (Leitura, Alerta, Irrigacao, ...) com acesso por atributo, em vez de dicts.
+        
+        Com cache_referencias=True, obter_fazenda/obter_area/obter_sensor/obter_tecnico usam
+        um cache LRU de até tamanho_cache registros, invalidado pelos atualizar_*/excluir_*
+        desta instância. Desative-o quando outros processos alteram essas tabelas.
+        
+        check_same_thread é repassado ao sqlite3.connect. Para compartilhar a instância entre
+        threads (como no dashboard) use check_same_thread=False com sincronizar=True: cada
+        método público passa a ser executado sob uma trava da instância (os geradores iter_*
+        seguram a trava a cada lote), já que o cursor, o cache LRU e a hierarquia em memória
+        são compartilhados.
+        
+        Com aplicar_schema=False um banco existente é aberto sem reaplicar o schema
+        (conexões somente leitura abertas depois de uma conexão principal).
+        
+        Com metricas (um MetricasDB, que pode ser compartilhado), cada método público
+        registra chamadas, latência e linhas retornadas, e as instruções SQL lentas são
+        guardadas com o EXPLAIN QUERY PLAN. Sem metricas não há custo adicional.
+        
+        Com profiler (um ProfilerSQL) as instruções executadas são agregadas por formato.
+        Se a variável de ambiente IRRIGACAO_PERFIL_SQL estiver definida, todas as instâncias
+        do processo usam um profiler compartilhado que imprime o relatório ao sair.
+        """
         self.db_path = db_path
+        self.registros_compactos = registros_compactos
+        self.check_same_thread = check_same_thread
+        self.cache = CacheLRU(tamanho_cache) if cache_referencias else None
+        self._hierarquia = None
+        self._marcadores_hierarquia = None
+        self.metricas = metricas
+        self.profiler = profiler if profiler is not None else profiler_do_ambiente()
         self.conn = None
         self.cursor = None
+        self._trava = threading.RLock() if sincronizar else None
+        if metricas is not None:
+            self._instrumentar_metodos()
+        if sincronizar:
+            self._sincronizar_metodos()
         self.conectar()
         
         # Verifica se o banco de dados já existe
         db_exists = os.path.exists(db_path) and os.path.getsize(db_path) > 0
         
-        # Se não existir, cria as tabelas
+        # Se não existir, cria as tabelas; caso contrário, aplica os objetos novos do
+        # schema (índices, gatilhos, contadores) apenas se o banco estiver em versão anterior
         if not db_exists:
             self.criar_tabelas()
+        elif aplicar_schema and self.obter_versao_schema() < VERSAO_SCHEMA:
+            self.atualizar_schema()
     
     def conectar(self):
         """Estabelece conexão com o banco de dados"""
         try:
-            self.conn = sqlite3.connect(self.db_path)
-            self.conn.row_factory = sqlite3.Row  # Para acessar colunas pelo nome
+            if self.metricas is not None:
+                self.conn = sqlite3.connect(self.db_path, check_same_thread=self.check_same_thread,
+                                            factory=ConexaoInstrumentada)
+                self.conn.metricas = self.metricas
+            else:
+                self.conn = sqlite3.connect(self.db_path, check_same_thread=self.check_same_thread)
+            if self.registros_compactos:
+                self.conn.row_factory = FabricaRegistros()
+                self._registro = _identidade
+            else:
+                self.conn.row_factory = sqlite3.Row  # Para acessar colunas pelo nome
+                self._registro = dict
+            if self.profiler is not None:
+                self.profiler.anexar(self.conn)
             self.cursor = self.conn.cursor()
             return True
         except sqlite3.Error as e:
@@ -34,25 +609,402 @@ class SistemaIrrigacaoDB:
     def criar_tabelas(self):
         """Cria as tabelas do banco de dados a partir do arquivo schema_expandido.sql"""
         try:
-            # Lê o arquivo SQL
-            with open('../db/schema_expandido.sql', 'r') as sql_file:
-                sql_script = sql_file.read()
-            
-            # Executa o script SQL
-            self.conn.executescript(sql_script)
-            self.conn.commit()
+            self._executar_schema()
             print("Tabelas criadas com sucesso")
             return True
         except (sqlite3.Error, IOError) as e:
             print(f"Erro ao criar tabelas: {e}")
             return False
     
+    def atualizar_schema(self):
+        """Aplica o schema em um banco existente (todas as instruções são idempotentes).
+        
+        Chamado na abertura apenas quando PRAGMA user_version é menor que VERSAO_SCHEMA,
+        pois o script recria índices e recalcula os contadores de alertas.
+        """
+        try:
+            self._executar_schema()
+            return True
+        except (sqlite3.Error, IOError) as e:
+            print(f"Erro ao atualizar schema: {e}")
+            return False
+    
+    def _executar_schema(self):
+        """Executa o schema e grava VERSAO_SCHEMA em uma única transação"""
+        # Lê o arquivo SQL
+        with open(SCHEMA_PATH, 'r', encoding='utf-8') as sql_file:
+            sql_script = sql_file.read()
+        
+        try:
+            self.conn.executescript(
+                f"BEGIN;\n{sql_script}\nPRAGMA user_version = {VERSAO_SCHEMA};\nCOMMIT;"
+            )
+        except sqlite3.Error:
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            raise
+    
+    def obter_versao_schema(self) -> int:
+        """Retorna a versão do schema aplicada ao banco (PRAGMA user_version)"""
+        try:
+            return self.conn.execute("PRAGMA user_version").fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Erro ao obter versão do schema: {e}")
+            return 0
+    
     def fechar(self):
         """Fecha a conexão com o banco de dados"""
         if self.conn:
             self.conn.close()
             print("Conexão com o banco de dados fechada")
     
+    # INSTRUMENTAÇÃO
+    
+    # Métodos públicos que não são medidos (infraestrutura e geradores iter_*)
+    _NAO_INSTRUMENTADOS = frozenset({
+        'conectar', 'fechar', 'criar_tabelas', 'atualizar_schema', 'obter_versao_schema',
+        'estatisticas_cache', 'limpar_cache', 'estatisticas_metricas',
+    })
+    
+    def _instrumentar_metodos(self):
+        """Substitui, nesta instância, os métodos públicos por versões medidas"""
+        for nome, funcao in vars(SistemaIrrigacaoDB).items():
+            if (nome.startswith('_') or nome in self._NAO_INSTRUMENTADOS
+                    or not callable(funcao) or nome.startswith('iter_')):
+                continue
+            setattr(self, nome, self._medir_metodo(nome, getattr(self, nome)))
+    
+    def _medir_metodo(self, nome: str, metodo):
+        @functools.wraps(metodo)
+        def medido(*args, **kwargs):
+            # Os métodos tratam sqlite3.Error internamente; o erro é detectado pela conexão
+            erros_antes = self.conn.erros if self.conn is not None else 0
+            inicio = time.perf_counter()
+            try:
+                resultado = metodo(*args, **kwargs)
+            except Exception:
+                self.metricas.registrar_chamada(nome, time.perf_counter() - inicio, erro=True)
+                raise
+            finally:
+                if self.conn is not None:
+                    self.conn.finalizar_pendentes()
+            erro = self.conn is not None and self.conn.erros != erros_antes
+            self.metricas.registrar_chamada(nome, time.perf_counter() - inicio,
+                                            contar_linhas(resultado), erro)
+            return resultado
+        return medido
+    
+    # ACESSO CONCORRENTE (INSTÂNCIA COMPARTILHADA ENTRE THREADS)
+    
+    def _sincronizar_metodos(self):
+        """Substitui, nesta instância, os métodos públicos por versões que seguram a trava.
+        
+        A trava é reentrante: métodos que chamam outros métodos públicos não se bloqueiam.
+        """
+        for nome, funcao in vars(SistemaIrrigacaoDB).items():
+            if nome.startswith('_') or not callable(funcao):
+                continue
+            metodo = getattr(self, nome)  # já medido, se a instrumentação estiver ativa
+            if nome.startswith('iter_'):
+                setattr(self, nome, self._gerador_sincronizado(metodo))
+            else:
+                setattr(self, nome, self._metodo_sincronizado(metodo))
+    
+    def _metodo_sincronizado(self, metodo):
+        @functools.wraps(metodo)
+        def sincronizado(*args, **kwargs):
+            with self._trava:
+                return metodo(*args, **kwargs)
+        return sincronizado
+    
+    def _gerador_sincronizado(self, metodo):
+        @functools.wraps(metodo)
+        def sincronizado(*args, **kwargs):
+            # A trava é mantida a cada passo (um lote do cursor), não entre os passos,
+            # para que outras threads possam usar a instância durante o consumo
+            gerador = metodo(*args, **kwargs)
+            try:
+                while True:
+                    with self._trava:
+                        try:
+                            item = next(gerador)
+                        except StopIteration:
+                            return
+                    yield item
+            finally:
+                with self._trava:
+                    gerador.close()
+        return sincronizado
+    
+    def estatisticas_metricas(self) -> Dict:
+        """Retorna o snapshot das métricas de uso (vazio se a instrumentação estiver desativada)"""
+        return self.metricas.snapshot() if self.metricas is not None else {}
+    
+    # CACHE DE ENTIDADES DE REFERÊNCIA
+    
+    def _cache_obter(self, entidade: str, id_registro: int):
+        """Retorna o registro em cache (uma cópia, no modo dict) ou None"""
+        if self.cache is None:
+            return None
+        registro = self.cache.obter((entidade, id_registro))
+        if registro is not None and not self.registros_compactos:
+            return dict(registro)
+        return registro
+    
+    def _cache_guardar(self, entidade: str, id_registro: int, registro):
+        """Guarda o registro no cache e o retorna (uma cópia, no modo dict)"""
+        if self.cache is not None:
+            self.cache.guardar((entidade, id_registro), registro)
+            if not self.registros_compactos:
+                return dict(registro)
+        return registro
+    
+    def _cache_invalidar(self, entidade: str, id_registro: int):
+        """Remove o registro do cache após uma alteração"""
+        if self.cache is not None:
+            self.cache.invalidar((entidade, id_registro))
+    
+    def estatisticas_cache(self) -> Dict:
+        """Retorna as estatísticas do cache de referências (vazio se desativado)"""
+        return self.cache.estatisticas() if self.cache is not None else {}
+    
+    def limpar_cache(self):
+        """Esvazia o cache de referências e a hierarquia em memória"""
+        if self.cache is not None:
+            self.cache.limpar()
+        self._hierarquia = None
+        self._marcadores_hierarquia = None
+    
+    # HIERARQUIA FAZENDA -> ÁREA -> SENSOR
+    
+    def _marcadores_alteracao(self) -> Tuple[int, int]:
+        """Retorna (PRAGMA data_version, total_changes): se ambos não mudaram, nenhuma
+        conexão (outra ou esta) gravou no banco desde a última verificação"""
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        return data_version, self.conn.total_changes
+    
+    def obter_versao_dados(self) -> Optional[Tuple[int, int]]:
+        """Marcador de versão do banco para chavear caches de resultados.
+        
+        Muda sempre que qualquer conexão (esta ou outra, inclusive de outro processo)
+        confirma uma gravação; enquanto for igual, consultas repetidas retornariam o
+        mesmo resultado. Custa um PRAGMA, sem acessar as tabelas. Só é comparável com
+        valores obtidos desta mesma instância (data_version é próprio de cada conexão).
+        """
+        try:
+            return self._marcadores_alteracao()
+        except sqlite3.Error as e:
+            print(f"Erro ao obter versão dos dados: {e}")
+            return None
+    
+    def obter_versao_topologia(self) -> int:
+        """Retorna o contador de alterações de fazendas, áreas, sensores e associações"""
+        try:
+            self.cursor.execute("SELECT versao FROM versao_topologia WHERE id = 1")
+            resultado = self.cursor.fetchone()
+            return resultado[0] if resultado else 0
+        except sqlite3.Error as e:
+            print(f"Erro ao obter versão da topologia: {e}")
+            return -1
+    
+    def obter_hierarquia(self, forcar: bool = False) -> Optional[Hierarquia]:
+        """Retorna a topologia fazenda -> área -> sensor como uma estrutura imutável.
+        
+        A hierarquia é carregada com uma única consulta e mantida em memória. Chamadas
+        seguintes a reutilizam enquanto PRAGMA data_version e total_changes não mudarem;
+        se mudaram, uma leitura de versao_topologia decide se é preciso recarregar.
+        """
+        try:
+            marcadores = self._marcadores_alteracao()
+            if self._hierarquia is not None and not forcar:
+                if marcadores == self._marcadores_hierarquia:
+                    return self._hierarquia
+                versao = self.obter_versao_topologia()
+                if versao == self._hierarquia.versao:
+                    self._marcadores_hierarquia = marcadores
+                    return self._hierarquia
+            else:
+                versao = self.obter_versao_topologia()
+            
+            # A versão é lida antes da carga: uma alteração concorrente no meio do caminho
+            # causa no máximo uma recarga desnecessária, nunca uma hierarquia desatualizada
+            cursor = self.conn.cursor()
+            cursor.row_factory = None
+            try:
+                cursor.execute("""
+                    SELECT f.id_fazenda, f.nome, f.localizacao, f.tamanho_hectares,
+                           a.id_area, a.nome_area, a.coordenadas,
+                           s.id_sensor, s.tipo_sensor, s.modelo, s.unidade_medida
+                    FROM fazenda f
+                    LEFT JOIN area_monitorada a ON a.id_fazenda = f.id_fazenda
+                    LEFT JOIN sensor_area sa ON sa.id_area = a.id_area AND sa.data_remocao IS NULL
+                    LEFT JOIN sensor s ON s.id_sensor = sa.id_sensor
+                    ORDER BY f.nome, f.id_fazenda, a.nome_area, a.id_area, sa.data_instalacao
+                """)
+                linhas = cursor.fetchall()
+            finally:
+                cursor.close()
+        except sqlite3.Error as e:
+            print(f"Erro ao obter hierarquia: {e}")
+            return self._hierarquia
+        
+        fazendas, areas, sensores = {}, {}, {}
+        areas_por_fazenda, sensores_por_area, areas_por_sensor = {}, {}, {}
+        for linha in linhas:
+            id_fazenda, id_area, id_sensor = linha[0], linha[4], linha[7]
+            if id_fazenda not in fazendas:
+                fazendas[id_fazenda] = NoFazenda(*linha[0:4])
+                areas_por_fazenda[id_fazenda] = []
+            if id_area is not None and id_area not in areas:
+                areas[id_area] = NoArea(id_area, id_fazenda, linha[5], linha[6])
+                areas_por_fazenda[id_fazenda].append(id_area)
+                sensores_por_area[id_area] = []
+            if id_sensor is not None:
+                if id_sensor not in sensores:
+                    sensores[id_sensor] = NoSensor(*linha[7:11])
+                    areas_por_sensor[id_sensor] = []
+                sensores_por_area[id_area].append(id_sensor)
+                areas_por_sensor[id_sensor].append(id_area)
+        
+        def congelar(indice):
+            return types.MappingProxyType({chave: tuple(ids) for chave, ids in indice.items()})
+        
+        self._hierarquia = Hierarquia(
+            versao=versao,
+            fazendas=types.MappingProxyType(fazendas),
+            areas=types.MappingProxyType(areas),
+            sensores=types.MappingProxyType(sensores),
+            areas_por_fazenda=congelar(areas_por_fazenda),
+            sensores_por_area=congelar(sensores_por_area),
+            areas_por_sensor=congelar(areas_por_sensor),
+        )
+        self._marcadores_hierarquia = marcadores
+        return self._hierarquia
+    
+    @staticmethod
+    def _como_dict(registro) -> Dict:
+        """Converte um registro (dict, sqlite3.Row ou namedtuple) em dict"""
+        if hasattr(registro, '_asdict'):
+            return registro._asdict()
+        return dict(registro)
+    
+    def _valor(self, registro, coluna: str):
+        """Lê uma coluna de um registro, em qualquer dos modos de retorno"""
+        return getattr(registro, coluna) if self.registros_compactos else registro[coluna]
+    
+    # CONSULTAS EM LOTE
+    
+    @staticmethod
+    def _lista_ids(ids: Iterable[int]) -> Tuple[List[int], str]:
+        """Normaliza uma coleção de IDs (sem repetição, na ordem recebida) e a serializa
+        em JSON, para uso como parâmetro único em `IN (SELECT value FROM json_each(?))`.
+        
+        Um único parâmetro evita o limite de variáveis do SQLite em listas grandes.
+        Lança ValueError se algum ID não for inteiro.
+        """
+        try:
+            ids = list(dict.fromkeys(int(id_registro) for id_registro in ids))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Lista de IDs inválida: {e}") from e
+        return ids, json.dumps(ids)
+    
+    def _atualizar_campos(self, tabela: str, coluna_id: str, ids: Union[int, Iterable[int]],
+                          campos: Dict[str, Any]) -> int:
+        """Executa um único UPDATE apenas com os campos fornecidos (valores não None).
+        
+        ids pode ser um ID ou uma coleção de IDs (atualização em lote, via json_each).
+        Retorna o número de linhas afetadas; não faz commit nem trata erros.
+        """
+        campos = {coluna: valor for coluna, valor in campos.items() if valor is not None}
+        if not campos:
+            return 0
+        atribuicoes = ", ".join(f"{coluna} = ?" for coluna in campos)
+        if isinstance(ids, numbers.Integral):  # inclui inteiros do NumPy
+            condicao, parametro = f"{coluna_id} = ?", int(ids)
+        else:
+            condicao, parametro = f"{coluna_id} IN (SELECT value FROM json_each(?))", self._lista_ids(ids)[1]
+        self.cursor.execute(
+            f"UPDATE {tabela} SET {atribuicoes} WHERE {condicao}",
+            (*campos.values(), parametro)
+        )
+        return self.cursor.rowcount
+    
+    def _agrupar(self, registros: List, coluna: str, ids: List[int]) -> Dict[int, List]:
+        """Agrupa registros pela coluna informada; todo ID pedido aparece no resultado"""
+        grupos = {id_registro: [] for id_registro in ids}
+        for registro in registros:
+            grupos[self._valor(registro, coluna)].append(registro)
+        return grupos
+    
+    # PAGINAÇÃO POR CURSOR (KEYSET)
+    
+    @staticmethod
+    def _codificar_token(tempo: str, id_registro: int) -> str:
+        """Codifica a chave (timestamp, id) do último registro de uma página"""
+        return base64.urlsafe_b64encode(json.dumps([tempo, id_registro]).encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def _decodificar_token(token: str) -> Tuple[str, int]:
+        """Decodifica um token de continuação; lança ValueError se for inválido"""
+        try:
+            tempo, id_registro = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+            raise ValueError(f"Token de continuação inválido: {token!r}") from e
+        return str(tempo), int(id_registro)
+    
+    def _paginar(self, query: str, params: List, coluna_tempo: str, coluna_id: str,
+                 tamanho_pagina: int, token: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+        """Executa uma consulta paginada em ordem decrescente de (coluna_tempo, coluna_id).
+        
+        A página seguinte começa logo após a chave codificada no token, de modo que o
+        custo de cada página não depende da sua posição no resultado (sem OFFSET).
+        Um token inválido lança ValueError (não é tratado como fim do resultado).
+        """
+        params = list(params)
+        if token is not None:
+            tempo, id_registro = self._decodificar_token(token)
+            query += f" AND ({coluna_tempo}, {coluna_id}) < (?, ?)"
+            params.extend([tempo, id_registro])
+        
+        # Busca um registro a mais para saber se existe uma próxima página
+        query += f" ORDER BY {coluna_tempo} DESC, {coluna_id} DESC LIMIT ?"
+        params.append(tamanho_pagina + 1)
+        
+        self.cursor.execute(query, params)
+        registros = [self._registro(registro) for registro in self.cursor.fetchmany(tamanho_pagina + 1)]
+        
+        if len(registros) <= tamanho_pagina:
+            return registros, None
+        
+        registros = registros[:tamanho_pagina]
+        ultimo = self._como_dict(registros[-1])
+        chave_tempo = coluna_tempo.split('.')[-1]
+        chave_id = coluna_id.split('.')[-1]
+        return registros, self._codificar_token(ultimo[chave_tempo], ultimo[chave_id])
+    
+    # LEITURA EM FLUXO (GERADORES)
+    
+    def _iterar(self, query: str, params: List, tamanho_lote: int) -> Iterator[Dict]:
+        """Executa a consulta em um cursor próprio e entrega os registros em lotes de fetchmany.
+        
+        Apenas um lote fica em memória por vez. O cursor dedicado permite que outros
+        métodos sejam chamados enquanto o gerador é consumido.
+        
+        Ao contrário dos métodos que retornam listas, os geradores não tratam sqlite3.Error:
+        o erro é propagado para que o chamador não confunda uma falha com o fim dos dados.
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(query, params)
+            while True:
+                lote = cursor.fetchmany(tamanho_lote)
+                if not lote:
+                    break
+                for registro in lote:
+                    yield self._registro(registro)
+        finally:
+            cursor.close()
+    
     # OPERAÇÕES CRUD PARA FAZENDA
     
     def adicionar_fazenda(self, nome: str, localizacao: str, tamanho_hectares: float) -> int:
@@ -70,10 +1022,14 @@ class SistemaIrrigacaoDB:
     
     def obter_fazenda(self, id_fazenda: int) -> Dict:
         """Obtém os dados de uma fazenda pelo ID"""
+        registro = self._cache_obter('fazenda', id_fazenda)
+        if registro is not None:
+            return registro
+        
         try:
             self.cursor.execute("SELECT * FROM fazenda WHERE id_fazenda = ?", (id_fazenda,))
             fazenda = self.cursor.fetchone()
-            return dict(fazenda) if fazenda else {}
+            return self._cache_guardar('fazenda', id_fazenda, self._registro(fazenda)) if fazenda else {}
         except sqlite3.Error as e:
             print(f"Erro ao obter fazenda: {e}")
             return {}
@@ -83,35 +1039,28 @@ class SistemaIrrigacaoDB:
         try:
             self.cursor.execute("SELECT * FROM fazenda ORDER BY nome")
             fazendas = self.cursor.fetchall()
-            return [dict(fazenda) for fazenda in fazendas]
+            return [self._registro(fazenda) for fazenda in fazendas]
         except sqlite3.Error as e:
             print(f"Erro ao listar fazendas: {e}")
             return []
     
     def atualizar_fazenda(self, id_fazenda: int, nome: str = None, 
-                         localizacao: str = None, tamanho_hectares: float = None) -> bool:
-        """Atualiza os dados de uma fazenda"""
+                         localizacao: str = None, tamanho_hectares: float = None) -> int:
+        """Atualiza apenas os campos fornecidos de uma fazenda.
+        
+        Retorna o número de linhas afetadas (0 se não encontrada, sem campos ou em caso de erro).
+        """
         try:
-            # Obtém os dados atuais da fazenda
-            fazenda_atual = self.obter_fazenda(id_fazenda)
-            if not fazenda_atual:
-                print(f"Fazenda com ID {id_fazenda} não encontrada")
-                return False
-            
-            # Atualiza apenas os campos fornecidos
-            nome = nome if nome is not None else fazenda_atual['nome']
-            localizacao = localizacao if localizacao is not None else fazenda_atual['localizacao']
-            tamanho_hectares = tamanho_hectares if tamanho_hectares is not None else fazenda_atual['tamanho_hectares']
-            
-            self.cursor.execute(
-                "UPDATE fazenda SET nome = ?, localizacao = ?, tamanho_hectares = ? WHERE id_fazenda = ?",
-                (nome, localizacao, tamanho_hectares, id_fazenda)
-            )
+            linhas = self._atualizar_campos('fazenda', 'id_fazenda', id_fazenda, {
+                'nome': nome, 'localizacao': localizacao, 'tamanho_hectares': tamanho_hectares,
+            })
             self.conn.commit()
-            return True
+            if linhas:
+                self._cache_invalidar('fazenda', id_fazenda)
+            return linhas
         except sqlite3.Error as e:
             print(f"Erro ao atualizar fazenda: {e}")
-            return False
+            return 0
     
     def excluir_fazenda(self, id_fazenda: int) -> bool:
         """Exclui uma fazenda do banco de dados"""
@@ -125,6 +1074,7 @@ class SistemaIrrigacaoDB:
             
             self.cursor.execute("DELETE FROM fazenda WHERE id_fazenda = ?", (id_fazenda,))
             self.conn.commit()
+            self._cache_invalidar('fazenda', id_fazenda)
             return True
         except sqlite3.Error as e:
             print(f"Erro ao excluir fazenda: {e}")
@@ -146,10 +1096,14 @@ class SistemaIrrigacaoDB:
     
     def obter_area(self, id_area: int) -> Dict:
         """Obtém os dados de uma área monitorada pelo ID"""
+        registro = self._cache_obter('area', id_area)
+        if registro is not None:
+            return registro
+        
         try:
             self.cursor.execute("SELECT * FROM area_monitorada WHERE id_area = ?", (id_area,))
             area = self.cursor.fetchone()
-            return dict(area) if area else {}
+            return self._cache_guardar('area', id_area, self._registro(area)) if area else {}
         except sqlite3.Error as e:
             print(f"Erro ao obter área: {e}")
             return {}
@@ -166,33 +1120,72 @@ class SistemaIrrigacaoDB:
                 self.cursor.execute("SELECT * FROM area_monitorada ORDER BY id_fazenda, nome_area")
             
             areas = self.cursor.fetchall()
-            return [dict(area) for area in areas]
+            return [self._registro(area) for area in areas]
         except sqlite3.Error as e:
             print(f"Erro ao listar áreas: {e}")
             return []
     
-    def atualizar_area(self, id_area: int, nome_area: str = None, coordenadas: str = None) -> bool:
-        """Atualiza os dados de uma área monitorada"""
+    def obter_areas_por_fazendas(self, ids_fazendas: Iterable[int]) -> Dict[int, List[Dict]]:
+        """Lista, em uma única consulta, as áreas de várias fazendas agrupadas por id_fazenda"""
         try:
-            # Obtém os dados atuais da área
-            area_atual = self.obter_area(id_area)
-            if not area_atual:
-                print(f"Área com ID {id_area} não encontrada")
-                return False
-            
-            # Atualiza apenas os campos fornecidos
-            nome_area = nome_area if nome_area is not None else area_atual['nome_area']
-            coordenadas = coordenadas if coordenadas is not None else area_atual['coordenadas']
-            
-            self.cursor.execute(
-                "UPDATE area_monitorada SET nome_area = ?, coordenadas = ? WHERE id_area = ?",
-                (nome_area, coordenadas, id_area)
-            )
+            ids, ids_json = self._lista_ids(ids_fazendas)
+            self.cursor.execute("""
+                SELECT * FROM area_monitorada
+                WHERE id_fazenda IN (SELECT value FROM json_each(?))
+                ORDER BY id_fazenda, nome_area
+            """, (ids_json,))
+            areas = [self._registro(area) for area in self.cursor.fetchall()]
+            return self._agrupar(areas, 'id_fazenda', ids)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Erro ao obter áreas por fazendas: {e}")
+            return {}
+    
+    def atualizar_area(self, id_area: int, nome_area: str = None, coordenadas: str = None) -> int:
+        """Atualiza apenas os campos fornecidos de uma área monitorada.
+        
+        Retorna o número de linhas afetadas (0 se não encontrada, sem campos ou em caso de erro).
+        """
+        try:
+            linhas = self._atualizar_campos('area_monitorada', 'id_area', id_area, {
+                'nome_area': nome_area, 'coordenadas': coordenadas,
+            })
             self.conn.commit()
-            return True
+            if linhas:
+                self._cache_invalidar('area', id_area)
+            return linhas
         except sqlite3.Error as e:
             print(f"Erro ao atualizar área: {e}")
-            return False
+            return 0
+    
+    def renomear_areas(self, novos_nomes: Dict[int, str]) -> int:
+        """Renomeia várias áreas em uma única instrução ({id_area: nome_area}).
+        
+        Retorna o número de áreas alteradas (0 em caso de erro).
+        """
+        try:
+            nomes = {int(id_area): nome for id_area, nome in novos_nomes.items()}
+            if not nomes:
+                return 0
+            if sqlite3.sqlite_version_info >= (3, 33, 0):
+                self.cursor.execute("""
+                    UPDATE area_monitorada SET nome_area = j.value
+                    FROM json_each(?) j
+                    WHERE area_monitorada.id_area = CAST(j.key AS INTEGER)
+                """, (json.dumps(nomes),))
+            else:
+                # UPDATE ... FROM só existe a partir do SQLite 3.33
+                self.cursor.executemany(
+                    "UPDATE area_monitorada SET nome_area = ? WHERE id_area = ?",
+                    [(nome, id_area) for id_area, nome in nomes.items()]
+                )
+            linhas = self.cursor.rowcount
+            self.conn.commit()
+            for id_area in nomes:
+                self._cache_invalidar('area', id_area)
+            return linhas
+        except sqlite3.Error as e:
+            print(f"Erro ao renomear áreas: {e}")
+            return 0
     
     def excluir_area(self, id_area: int) -> bool:
         """Exclui uma área monitorada do banco de dados"""
@@ -206,6 +1199,7 @@ class SistemaIrrigacaoDB:
             
             self.cursor.execute("DELETE FROM area_monitorada WHERE id_area = ?", (id_area,))
             self.conn.commit()
+            self._cache_invalidar('area', id_area)
             return True
         except sqlite3.Error as e:
             print(f"Erro ao excluir área: {e}")
@@ -228,10 +1222,14 @@ class SistemaIrrigacaoDB:
     
     def obter_sensor(self, id_sensor: int) -> Dict:
         """Obtém os dados de um sensor pelo ID"""
+        registro = self._cache_obter('sensor', id_sensor)
+        if registro is not None:
+            return registro
+        
         try:
             self.cursor.execute("SELECT * FROM sensor WHERE id_sensor = ?", (id_sensor,))
             sensor = self.cursor.fetchone()
-            return dict(sensor) if sensor else {}
+            return self._cache_guardar('sensor', id_sensor, self._registro(sensor)) if sensor else {}
         except sqlite3.Error as e:
             print(f"Erro ao obter sensor: {e}")
             return {}
@@ -248,34 +1246,47 @@ class SistemaIrrigacaoDB:
                 self.cursor.execute("SELECT * FROM sensor ORDER BY tipo_sensor, modelo")
             
             sensores = self.cursor.fetchall()
-            return [dict(sensor) for sensor in sensores]
+            return [self._registro(sensor) for sensor in sensores]
         except sqlite3.Error as e:
             print(f"Erro ao listar sensores: {e}")
             return []
+    
     def atualizar_sensor(self, id_sensor: int, tipo_sensor: str = None, 
-                          modelo: str = None, unidade_medida: str = None) -> bool:
-        """Atualiza os dados de um sensor"""
+                          modelo: str = None, unidade_medida: str = None) -> int:
+        """Atualiza apenas os campos fornecidos de um sensor.
+        
+        Retorna o número de linhas afetadas (0 se não encontrado, sem campos ou em caso de erro).
+        """
         try:
-            # Obtém os dados atuais do sensor
-            sensor_atual = self.obter_sensor(id_sensor)
-            if not sensor_atual:
-                print(f"Sensor com ID {id_sensor} não encontrado")
-                return False
-            
-            # Atualiza apenas os campos fornecidos
-            tipo_sensor = tipo_sensor if tipo_sensor is not None else sensor_atual['tipo_sensor']
-            modelo = modelo if modelo is not None else sensor_atual['modelo']
-            unidade_medida = unidade_medida if unidade_medida is not None else sensor_atual['unidade_medida']
-            
-            self.cursor.execute(
-                "UPDATE sensor SET tipo_sensor = ?, modelo = ?, unidade_medida = ? WHERE id_sensor = ?",
-                (tipo_sensor, modelo, unidade_medida, id_sensor)
-            )
+            linhas = self._atualizar_campos('sensor', 'id_sensor', id_sensor, {
+                'tipo_sensor': tipo_sensor, 'modelo': modelo, 'unidade_medida': unidade_medida,
+            })
             self.conn.commit()
-            return True
+            if linhas:
+                self._cache_invalidar('sensor', id_sensor)
+            return linhas
         except sqlite3.Error as e:
             print(f"Erro ao atualizar sensor: {e}")
-            return False
+            return 0
+    
+    def atualizar_sensores(self, ids_sensores: Iterable[int], tipo_sensor: str = None,
+                           modelo: str = None, unidade_medida: str = None) -> int:
+        """Aplica os mesmos campos a vários sensores em uma única instrução (ex.: troca de modelo).
+        
+        Retorna o número de sensores alterados (0 em caso de erro).
+        """
+        try:
+            ids = self._lista_ids(ids_sensores)[0]
+            linhas = self._atualizar_campos('sensor', 'id_sensor', ids, {
+                'tipo_sensor': tipo_sensor, 'modelo': modelo, 'unidade_medida': unidade_medida,
+            })
+            self.conn.commit()
+            for id_sensor in ids:
+                self._cache_invalidar('sensor', id_sensor)
+            return linhas
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Erro ao atualizar sensores: {e}")
+            return 0
     
     def excluir_sensor(self, id_sensor: int) -> bool:
         """Exclui um sensor do banco de dados"""
@@ -289,6 +1300,7 @@ class SistemaIrrigacaoDB:
             
             self.cursor.execute("DELETE FROM sensor WHERE id_sensor = ?", (id_sensor,))
             self.conn.commit()
+            self._cache_invalidar('sensor', id_sensor)
             return True
         except sqlite3.Error as e:
             print(f"Erro ao excluir sensor: {e}")
@@ -330,6 +1342,35 @@ class SistemaIrrigacaoDB:
             print(f"Erro ao desassociar sensor da área: {e}")
             return False
     
+    def reatribuir_sensores(self, ids_sensores: Iterable[int], id_area: int, data: str = None) -> int:
+        """Move vários sensores para uma área: encerra as associações ativas e cria as novas
+        em uma única transação, com uma instrução para cada etapa.
+        
+        Retorna o número de associações criadas ou -1 em caso de erro.
+        """
+        try:
+            if data is None:
+                data = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            ids, ids_json = self._lista_ids(ids_sensores)
+            if not ids:
+                return 0
+            
+            self.cursor.execute("""
+                UPDATE sensor_area SET data_remocao = ?
+                WHERE id_sensor IN (SELECT value FROM json_each(?)) AND data_remocao IS NULL
+            """, (data, ids_json))
+            self.cursor.execute("""
+                INSERT INTO sensor_area (id_sensor, id_area, data_instalacao)
+                SELECT value, ?, ? FROM json_each(?)
+            """, (id_area, data, ids_json))
+            linhas = self.cursor.rowcount
+            self.conn.commit()
+            return linhas
+        except (sqlite3.Error, ValueError) as e:
+            self.conn.rollback()  # não deixa as remoções pendentes sem as novas associações
+            print(f"Erro ao reatribuir sensores: {e}")
+            return -1
+    
     def listar_sensores_area(self, id_area: int, ativos_apenas: bool = True) -> List[Dict]:
         """Lista todos os sensores associados a uma área"""
         try:
@@ -351,11 +1392,33 @@ class SistemaIrrigacaoDB:
                 """, (id_area,))
             
             sensores = self.cursor.fetchall()
-            return [dict(sensor) for sensor in sensores]
+            return [self._registro(sensor) for sensor in sensores]
         except sqlite3.Error as e:
             print(f"Erro ao listar sensores da área: {e}")
             return []
     
+    def listar_sensores_por_areas(self, ids_areas: Iterable[int],
+                                  ativos_apenas: bool = True) -> Dict[int, List[Dict]]:
+        """Lista, em uma única consulta, os sensores de várias áreas agrupados por id_area"""
+        try:
+            ids, ids_json = self._lista_ids(ids_areas)
+            query = """
+                SELECT sa.*, s.tipo_sensor, s.modelo, s.unidade_medida
+                FROM sensor_area sa
+                JOIN sensor s ON sa.id_sensor = s.id_sensor
+                WHERE sa.id_area IN (SELECT value FROM json_each(?))
+            """
+            if ativos_apenas:
+                query += " AND sa.data_remocao IS NULL"
+            query += " ORDER BY sa.id_area, sa.data_instalacao"
+            
+            self.cursor.execute(query, (ids_json,))
+            sensores = [self._registro(sensor) for sensor in self.cursor.fetchall()]
+            return self._agrupar(sensores, 'id_area', ids)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Erro ao listar sensores por áreas: {e}")
+            return {}
+    
     def listar_areas_sensor(self, id_sensor: int, ativas_apenas: bool = True) -> List[Dict]:
         """Lista todas as áreas associadas a um sensor"""
         try:
@@ -379,7 +1442,7 @@ class SistemaIrrigacaoDB:
                 """, (id_sensor,))
             
             areas = self.cursor.fetchall()
-            return [dict(area) for area in areas]
+            return [self._registro(area) for area in areas]
         except sqlite3.Error as e:
             print(f"Erro ao listar áreas do sensor: {e}")
             return []
@@ -413,49 +1476,364 @@ class SistemaIrrigacaoDB:
                 WHERE l.id_leitura = ?
             """, (id_leitura,))
             leitura = self.cursor.fetchone()
-            return dict(leitura) if leitura else {}
+            return self._registro(leitura) if leitura else {}
         except sqlite3.Error as e:
             print(f"Erro ao obter leitura: {e}")
             return {}
     
+    def obter_leituras_por_ids(self, ids_leituras: Iterable[int]) -> Dict[int, Dict]:
+        """Obtém várias leituras em uma única consulta, indexadas por id_leitura
+        (IDs inexistentes ficam fora do resultado)"""
+        try:
+            _, ids_json = self._lista_ids(ids_leituras)
+            self.cursor.execute("""
+                SELECT l.*, s.tipo_sensor, s.unidade_medida, a.nome_area
+                FROM leitura l
+                JOIN sensor s ON l.id_sensor = s.id_sensor
+                JOIN area_monitorada a ON l.id_area = a.id_area
+                WHERE l.id_leitura IN (SELECT value FROM json_each(?))
+            """, (ids_json,))
+            leituras = (self._registro(leitura) for leitura in self.cursor.fetchall())
+            return {self._valor(leitura, 'id_leitura'): leitura for leitura in leituras}
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Erro ao obter leituras por IDs: {e}")
+            return {}
+    
+    def _consulta_leituras(self, id_area: Optional[int] = None, id_sensor: Optional[int] = None,
+                           data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                           base: Optional[str] = None) -> Tuple[str, List]:
+        """Monta a consulta filtrada de leituras (sem ORDER BY/LIMIT).
+        
+        `base` substitui o SELECT padrão; deve terminar em WHERE e usar o alias l para leitura.
+        """
+        if base is None:
+            base = """
+                SELECT l.*, s.tipo_sensor, s.unidade_medida, a.nome_area
+                FROM leitura l
+                JOIN sensor s ON l.id_sensor = s.id_sensor
+                JOIN area_monitorada a ON l.id_area = a.id_area
+                WHERE
+            """
+        query = base + " 1=1"
+        params = []
+        
+        if id_area is not None:
+            query += " AND l.id_area = ?"
+            params.append(id_area)
+        
+        if id_sensor is not None:
+            query += " AND l.id_sensor = ?"
+            params.append(id_sensor)
+        
+        if data_inicio is not None:
+            query += " AND l.data_hora >= ?"
+            params.append(data_inicio)
+        
+        if data_fim is not None:
+            query += " AND l.data_hora <= ?"
+            params.append(data_fim)
+        
+        return query, params
+    
     def listar_leituras(self, id_area: Optional[int] = None, id_sensor: Optional[int] = None, 
                        data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
                        limite: int = 100) -> List[Dict]:
         """Lista leituras com diversos filtros"""
         try:
-            query = """
-                SELECT l.*, s.tipo_sensor, s.unidade_medida, a.nome_area
+            query, params = self._consulta_leituras(id_area, id_sensor, data_inicio, data_fim)
+            
+            query += " ORDER BY l.data_hora DESC, l.id_leitura DESC LIMIT ?"
+            params.append(limite)
+            
+            self.cursor.execute(query, params)
+            leituras = self.cursor.fetchall()
+            return [self._registro(leitura) for leitura in leituras]
+        except sqlite3.Error as e:
+            print(f"Erro ao listar leituras: {e}")
+            return []
+    
+    def listar_leituras_pagina(self, id_area: Optional[int] = None, id_sensor: Optional[int] = None,
+                               data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                               tamanho_pagina: int = 100,
+                               token: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Lista uma página de leituras e o token da próxima página (None na última).
+        
+        Lança ValueError se o token for inválido.
+        """
+        try:
+            query, params = self._consulta_leituras(id_area, id_sensor, data_inicio, data_fim)
+            return self._paginar(query, params, "l.data_hora", "l.id_leitura", tamanho_pagina, token)
+        except sqlite3.Error as e:
+            print(f"Erro ao listar leituras: {e}")
+            return [], None
+    
+    def iter_leituras(self, id_area: Optional[int] = None, id_sensor: Optional[int] = None,
+                      data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                      crescente: bool = False, tamanho_lote: int = 1000) -> Iterator[Dict]:
+        """Percorre as leituras filtradas sem carregá-las todas em memória"""
+        query, params = self._consulta_leituras(id_area, id_sensor, data_inicio, data_fim)
+        ordem = "ASC" if crescente else "DESC"
+        query += f" ORDER BY l.data_hora {ordem}, l.id_leitura {ordem}"
+        yield from self._iterar(query, params, tamanho_lote)
+    
+    def iter_leituras_lotes(self, id_area: Optional[int] = None, id_sensor: Optional[int] = None,
+                            data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                            tamanho_lote: int = 10000) -> Iterator[List[Tuple]]:
+        """Percorre as leituras filtradas em lotes de tuplas simples, em ordem cronológica.
+        
+        Cada lote é uma lista de até `tamanho_lote` tuplas com as colunas de
+        COLUNAS_LEITURAS_LOTE, sem dicionário por linha; apenas um lote fica em memória
+        por vez, independentemente do total de leituras (usado na exportação).
+        
+        Erros de banco (ex.: "database is locked" no meio da leitura) são propagados: o fim
+        do gerador significa que todas as leituras foram entregues.
+        """
+        query, params = self._consulta_leituras(
+            id_area, id_sensor, data_inicio, data_fim,
+            base="""
+                SELECT l.id_leitura, l.data_hora, f.id_fazenda, f.nome, l.id_area, a.nome_area,
+                       l.id_sensor, s.tipo_sensor, s.unidade_medida, l.valor
                 FROM leitura l
                 JOIN sensor s ON l.id_sensor = s.id_sensor
                 JOIN area_monitorada a ON l.id_area = a.id_area
+                JOIN fazenda f ON a.id_fazenda = f.id_fazenda
+                WHERE
+            """
+        )
+        query += " ORDER BY l.data_hora, l.id_leitura"
+        
+        cursor = self.conn.cursor()
+        cursor.row_factory = None  # tuplas simples, sem sqlite3.Row
+        try:
+            cursor.execute(query, params)
+            while True:
+                lote = cursor.fetchmany(tamanho_lote)
+                if not lote:
+                    break
+                yield lote
+        finally:
+            cursor.close()
+    
+    def listar_leituras_colunar(self, id_area: Optional[int] = None, id_sensor: Optional[int] = None,
+                                data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                                como_dataframe: bool = True, tamanho_lote: int = 65536):
+        """Lista leituras em formato colunar (arrays NumPy ou DataFrame), em ordem cronológica.
+        
+        As colunas são montadas diretamente a partir de lotes de tuplas do cursor, sem
+        criar um dicionário por linha: id_leitura, id_area e id_sensor (int64), epoch
+        (int64, segundos desde 1970 interpretando data_hora como UTC), valor (float64) e
+        tipo_sensor (categórico no DataFrame; array de strings no modo NumPy).
+        Leituras cuja data_hora o SQLite não reconhece (epoch NULL) são omitidas.
+        Retorna None em caso de erro.
+        """
+        import numpy as np
+        
+        try:
+            query, params = self._consulta_leituras(
+                id_area, id_sensor, data_inicio, data_fim,
+                base="""
+                    SELECT l.id_leitura, l.id_area, l.id_sensor,
+                           CAST(strftime('%s', l.data_hora) AS INTEGER), l.valor
+                    FROM leitura l
+                    WHERE
+                """
+            )
+            query += " AND strftime('%s', l.data_hora) IS NOT NULL ORDER BY l.data_hora, l.id_leitura"
+            
+            # Tipos de sensor são poucos: busca uma vez e mapeia id_sensor -> código
+            self.cursor.execute("SELECT id_sensor, tipo_sensor FROM sensor")
+            tipos_por_sensor = {row[0]: row[1] for row in self.cursor.fetchall()}
+            
+            cursor = self.conn.cursor()
+            cursor.row_factory = None  # tuplas simples, sem sqlite3.Row
+            blocos = []
+            try:
+                cursor.execute(query, params)
+                while True:
+                    lote = cursor.fetchmany(tamanho_lote)
+                    if not lote:
+                        break
+                    blocos.append(np.fromiter(itertools.chain.from_iterable(lote), dtype=np.float64,
+                                              count=len(lote) * 5).reshape(-1, 5))
+            finally:
+                cursor.close()
+        except sqlite3.Error as e:
+            print(f"Erro ao listar leituras (colunar): {e}")
+            return None
+        
+        dados = np.concatenate(blocos) if blocos else np.empty((0, 5), dtype=np.float64)
+        ids_sensor = dados[:, 2].astype(np.int64)
+        
+        categorias = sorted(set(tipos_por_sensor.values()))
+        codigo_por_tipo = {tipo: i for i, tipo in enumerate(categorias)}
+        # Tabela id_sensor -> código; cobre também leituras de sensores já excluídos
+        maior_id = max(max(tipos_por_sensor, default=0), int(ids_sensor.max()) if len(ids_sensor) else 0)
+        tabela_codigos = np.full(maior_id + 1, -1, dtype=np.int64)
+        for id_s, tipo in tipos_por_sensor.items():
+            tabela_codigos[id_s] = codigo_por_tipo[tipo]
+        codigos = tabela_codigos[ids_sensor]
+        
+        colunas = {
+            'id_leitura': dados[:, 0].astype(np.int64),
+            'id_area': dados[:, 1].astype(np.int64),
+            'id_sensor': ids_sensor,
+            'epoch': dados[:, 3].astype(np.int64),
+            'valor': np.ascontiguousarray(dados[:, 4]),
+        }
+        
+        if not como_dataframe:
+            # O código -1 (sensor sem cadastro) indexa a string vazia no fim da lista
+            colunas['tipo_sensor'] = np.asarray(categorias + [''], dtype=str)[codigos]
+            return colunas
+        
+        import pandas as pd
+        
+        colunas['tipo_sensor'] = pd.Categorical.from_codes(codigos, categories=categorias)
+        return pd.DataFrame(colunas)
+    
+    def listar_leituras_pivotadas(self, id_area: Optional[int] = None, data_inicio: Optional[str] = None,
+                                  data_fim: Optional[str] = None, tipos_sensor: Optional[List[str]] = None,
+                                  como_dataframe: bool = False, apos_id_leitura: Optional[int] = None):
+        """Lista leituras no formato largo: uma linha por data_hora e uma coluna por tipo de sensor.
+        
+        A pivotagem é feita no SQLite por agregação condicional (média por tipo em cada
+        data_hora), em ordem cronológica. Sem tipos_sensor, usa todos os tipos cadastrados.
+        Com como_dataframe=True retorna um DataFrame com data_hora já convertida.
+        
+        Com apos_id_leitura, retorna apenas os instantes (data_hora) que receberam leituras
+        com id_leitura maior que esse valor, recalculados com todas as suas leituras, para
+        atualizar incrementalmente um resultado anterior (ver obter_ultimo_id_leitura).
+        """
+        try:
+            if tipos_sensor is None:
+                self.cursor.execute("SELECT DISTINCT tipo_sensor FROM sensor ORDER BY tipo_sensor")
+                tipos_sensor = [linha[0] for linha in self.cursor.fetchall()]
+            
+            # Uma coluna por tipo; os tipos são parâmetros, então o texto da consulta só
+            # depende da quantidade de tipos (não dos IDs dos sensores cadastrados)
+            colunas = ", ".join(
+                "AVG(CASE s.tipo_sensor WHEN ? THEN l.valor END) AS " + '"' + tipo.replace('"', '""') + '"'
+                for tipo in tipos_sensor
+            )
+            query, params = self._consulta_leituras(
+                id_area, None, data_inicio, data_fim,
+                base=f"SELECT l.data_hora{', ' + colunas if colunas else ''} "
+                     f"FROM leitura l JOIN sensor s ON s.id_sensor = l.id_sensor WHERE"
+            )
+            params = list(tipos_sensor) + params
+            query += " AND s.tipo_sensor IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(list(tipos_sensor)))
+            if apos_id_leitura is not None:
+                # Instantes com leituras novas, buscadas pela chave primária a partir da marca
+                # (o + em +id_area impede que o índice por área seja usado no lugar dela)
+                query += " AND l.data_hora IN (SELECT data_hora FROM leitura WHERE id_leitura > ?"
+                params.append(apos_id_leitura)
+                if id_area is not None:
+                    query += " AND +id_area = ?"
+                    params.append(id_area)
+                query += ")"
+            query += " GROUP BY l.data_hora ORDER BY l.data_hora"
+            
+            if not como_dataframe:
+                self.cursor.execute(query, params)
+                return [self._registro(linha) for linha in self.cursor.fetchall()]
+            
+            import pandas as pd
+            
+            cursor = self.conn.cursor()
+            cursor.row_factory = None
+            try:
+                cursor.execute(query, params)
+                df = pd.DataFrame.from_records(cursor.fetchall(), columns=['data_hora'] + list(tipos_sensor))
+            finally:
+                cursor.close()
+            df['data_hora'] = pd.to_datetime(df['data_hora'])
+            # Colunas sem nenhuma leitura viriam como object (None); mantém todas numéricas
+            df[list(tipos_sensor)] = df[list(tipos_sensor)].astype('float64')
+            return df
+        except sqlite3.Error as e:
+            print(f"Erro ao listar leituras pivotadas: {e}")
+            return None if como_dataframe else []
+    
+    def obter_ultimo_id_leitura(self) -> int:
+        """Retorna o maior id_leitura (0 se não houver leituras), usado como marca d'água
+        para buscar apenas as leituras inseridas depois de uma consulta"""
+        try:
+            self.cursor.execute("SELECT COALESCE(MAX(id_leitura), 0) FROM leitura")
+            return self.cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Erro ao obter último ID de leitura: {e}")
+            return -1
+    
+    def agregar_leituras(self, id_area: Optional[int] = None, id_fazenda: Optional[int] = None,
+                         tipo_sensor: Optional[str] = None, inicio: Optional[str] = None,
+                         fim: Optional[str] = None, bucket: Union[int, str] = '1h',
+                         funcs: Iterable[str] = ('avg',)) -> List[Dict]:
+        """Agrega leituras por intervalo de tempo e tipo de sensor dentro do SQLite.
+        
+        bucket aceita segundos ou '30s', '15min', '1h', '1d' (alinhados à época Unix).
+        funcs é qualquer combinação de min, max, avg, count e last (valor mais recente
+        do intervalo). Cada registro retornado tem bucket (início do intervalo, no
+        formato de data_hora), tipo_sensor e uma coluna por função.
+        """
+        try:
+            funcs = list(dict.fromkeys(funcs))
+            invalidas = [f for f in funcs if f not in FUNCOES_AGREGACAO]
+            if not funcs or invalidas:
+                raise ValueError(f"Funções de agregação inválidas: {invalidas or funcs}")
+            segundos = segundos_intervalo(bucket)
+            
+            query = """
+                SELECT (CAST(strftime('%s', l.data_hora) AS INTEGER) / ?) * ? AS inicio_bucket,
+                       s.tipo_sensor, l.valor, l.data_hora, l.id_leitura
+                FROM leitura l
+                JOIN sensor s ON l.id_sensor = s.id_sensor
                 WHERE 1=1
             """
-            params = []
+            params = [segundos, segundos]
             
             if id_area is not None:
                 query += " AND l.id_area = ?"
                 params.append(id_area)
             
-            if id_sensor is not None:
-                query += " AND l.id_sensor = ?"
-                params.append(id_sensor)
+            if id_fazenda is not None:
+                query += " AND l.id_area IN (SELECT id_area FROM area_monitorada WHERE id_fazenda = ?)"
+                params.append(id_fazenda)
+            
+            if tipo_sensor is not None:
+                query += " AND l.id_sensor IN (SELECT id_sensor FROM sensor WHERE tipo_sensor = ?)"
+                params.append(tipo_sensor)
             
-            if data_inicio is not None:
+            if inicio is not None:
                 query += " AND l.data_hora >= ?"
-                params.append(data_inicio)
+                params.append(inicio)
             
-            if data_fim is not None:
+            if fim is not None:
                 query += " AND l.data_hora <= ?"
-                params.append(data_fim)
+                params.append(fim)
             
-            query += " ORDER BY l.data_hora DESC LIMIT ?"
-            params.append(limite)
+            # 'last' precisa numerar as leituras de cada intervalo da mais recente para a mais antiga
+            if 'last' in funcs:
+                query = f"""
+                    SELECT *, ROW_NUMBER() OVER (
+                        PARTITION BY inicio_bucket, tipo_sensor
+                        ORDER BY data_hora DESC, id_leitura DESC
+                    ) AS ordem
+                    FROM ({query})
+                """
+            
+            colunas = ", ".join(f'{FUNCOES_AGREGACAO[f]} AS "{f}"' for f in funcs)
+            query = f"""
+                SELECT datetime(inicio_bucket, 'unixepoch') AS bucket, tipo_sensor, {colunas}
+                FROM ({query})
+                GROUP BY inicio_bucket, tipo_sensor
+                ORDER BY inicio_bucket, tipo_sensor
+            """
             
             self.cursor.execute(query, params)
-            leituras = self.cursor.fetchall()
-            return [dict(leitura) for leitura in leituras]
-        except sqlite3.Error as e:
-            print(f"Erro ao listar leituras: {e}")
+            return [self._registro(ponto) for ponto in self.cursor.fetchall()]
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Erro ao agregar leituras: {e}")
             return []
     
     def excluir_leitura(self, id_leitura: int) -> bool:
@@ -485,10 +1863,14 @@ class SistemaIrrigacaoDB:
     
     def obter_tecnico(self, id_tecnico: int) -> Dict:
         """Obtém os dados de um técnico pelo ID"""
+        registro = self._cache_obter('tecnico', id_tecnico)
+        if registro is not None:
+            return registro
+        
         try:
             self.cursor.execute("SELECT * FROM tecnico WHERE id_tecnico = ?", (id_tecnico,))
             tecnico = self.cursor.fetchone()
-            return dict(tecnico) if tecnico else {}
+            return self._cache_guardar('tecnico', id_tecnico, self._registro(tecnico)) if tecnico else {}
         except sqlite3.Error as e:
             print(f"Erro ao obter técnico: {e}")
             return {}
@@ -505,34 +1887,28 @@ class SistemaIrrigacaoDB:
                 self.cursor.execute("SELECT * FROM tecnico ORDER BY nome")
             
             tecnicos = self.cursor.fetchall()
-            return [dict(tecnico) for tecnico in tecnicos]
+            return [self._registro(tecnico) for tecnico in tecnicos]
         except sqlite3.Error as e:
             print(f"Erro ao listar técnicos: {e}")
             return []
+    
     def atualizar_tecnico(self, id_tecnico: int, nome: str = None, 
-                           email: str = None, especialidade: str = None) -> bool:
-        """Atualiza os dados de um técnico"""
+                           email: str = None, especialidade: str = None) -> int:
+        """Atualiza apenas os campos fornecidos de um técnico.
+        
+        Retorna o número de linhas afetadas (0 se não encontrado, sem campos ou em caso de erro).
+        """
         try:
-            # Obtém os dados atuais do técnico
-            tecnico_atual = self.obter_tecnico(id_tecnico)
-            if not tecnico_atual:
-                print(f"Técnico com ID {id_tecnico} não encontrado")
-                return False
-            
-            # Atualiza apenas os campos fornecidos
-            nome = nome if nome is not None else tecnico_atual['nome']
-            email = email if email is not None else tecnico_atual['email']
-            especialidade = especialidade if especialidade is not None else tecnico_atual['especialidade']
-            
-            self.cursor.execute(
-                "UPDATE tecnico SET nome = ?, email = ?, especialidade = ? WHERE id_tecnico = ?",
-                (nome, email, especialidade, id_tecnico)
-            )
+            linhas = self._atualizar_campos('tecnico', 'id_tecnico', id_tecnico, {
+                'nome': nome, 'email': email, 'especialidade': especialidade,
+            })
             self.conn.commit()
-            return True
+            if linhas:
+                self._cache_invalidar('tecnico', id_tecnico)
+            return linhas
         except sqlite3.Error as e:
             print(f"Erro ao atualizar técnico: {e}")
-            return False
+            return 0
     
     def excluir_tecnico(self, id_tecnico: int) -> bool:
         """Exclui um técnico do banco de dados"""
@@ -546,6 +1922,7 @@ class SistemaIrrigacaoDB:
             
             self.cursor.execute("DELETE FROM tecnico WHERE id_tecnico = ?", (id_tecnico,))
             self.conn.commit()
+            self._cache_invalidar('tecnico', id_tecnico)
             return True
         except sqlite3.Error as e:
             print(f"Erro ao excluir técnico: {e}")
@@ -582,76 +1959,109 @@ class SistemaIrrigacaoDB:
                 WHERE m.id_manutencao = ?
             """, (id_manutencao,))
             manutencao = self.cursor.fetchone()
-            return dict(manutencao) if manutencao else {}
+            return self._registro(manutencao) if manutencao else {}
         except sqlite3.Error as e:
             print(f"Erro ao obter manutenção: {e}")
             return {}
     
+    def _consulta_manutencoes(self, id_sensor: Optional[int] = None, id_tecnico: Optional[int] = None,
+                              tipo_manutencao: Optional[str] = None, data_inicio: Optional[str] = None,
+                              data_fim: Optional[str] = None) -> Tuple[str, List]:
+        """Monta a consulta filtrada de manutenções (sem ORDER BY/LIMIT)"""
+        query = """
+            SELECT m.*, s.tipo_sensor, s.modelo, t.nome as nome_tecnico
+            FROM manutencao m
+            JOIN sensor s ON m.id_sensor = s.id_sensor
+            JOIN tecnico t ON m.id_tecnico = t.id_tecnico
+            WHERE 1=1
+        """
+        params = []
+        
+        if id_sensor is not None:
+            query += " AND m.id_sensor = ?"
+            params.append(id_sensor)
+        
+        if id_tecnico is not None:
+            query += " AND m.id_tecnico = ?"
+            params.append(id_tecnico)
+        
+        if tipo_manutencao is not None:
+            query += " AND m.tipo_manutencao = ?"
+            params.append(tipo_manutencao)
+        
+        if data_inicio is not None:
+            query += " AND m.data_manutencao >= ?"
+            params.append(data_inicio)
+        
+        if data_fim is not None:
+            query += " AND m.data_manutencao <= ?"
+            params.append(data_fim)
+        
+        return query, params
+    
     def listar_manutencoes(self, id_sensor: Optional[int] = None, id_tecnico: Optional[int] = None,
                           tipo_manutencao: Optional[str] = None, data_inicio: Optional[str] = None,
-                          data_fim: Optional[str] = None) -> List[Dict]:
+                          data_fim: Optional[str] = None, limite: Optional[int] = None) -> List[Dict]:
         """Lista manutenções com diversos filtros"""
         try:
-            query = """
-                SELECT m.*, s.tipo_sensor, s.modelo, t.nome as nome_tecnico
-                FROM manutencao m
-                JOIN sensor s ON m.id_sensor = s.id_sensor
-                JOIN tecnico t ON m.id_tecnico = t.id_tecnico
-                WHERE 1=1
-            """
-            params = []
+            query, params = self._consulta_manutencoes(id_sensor, id_tecnico, tipo_manutencao,
+                                                       data_inicio, data_fim)
             
-            if id_sensor is not None:
-                query += " AND m.id_sensor = ?"
-                params.append(id_sensor)
-            
-            if id_tecnico is not None:
-                query += " AND m.id_tecnico = ?"
-                params.append(id_tecnico)
-            
-            if tipo_manutencao is not None:
-                query += " AND m.tipo_manutencao = ?"
-                params.append(tipo_manutencao)
-            
-            if data_inicio is not None:
-                query += " AND m.data_manutencao >= ?"
-                params.append(data_inicio)
-            
-            if data_fim is not None:
-                query += " AND m.data_manutencao <= ?"
-                params.append(data_fim)
-            
-            query += " ORDER BY m.data_manutencao DESC"
+            query += " ORDER BY m.data_manutencao DESC, m.id_manutencao DESC"
+            if limite is not None:
+                query += " LIMIT ?"
+                params.append(limite)
             
             self.cursor.execute(query, params)
             manutencoes = self.cursor.fetchall()
-            return [dict(manutencao) for manutencao in manutencoes]
+            return [self._registro(manutencao) for manutencao in manutencoes]
         except sqlite3.Error as e:
             print(f"Erro ao listar manutenções: {e}")
             return []
+    
+    def listar_manutencoes_pagina(self, id_sensor: Optional[int] = None, id_tecnico: Optional[int] = None,
+                                  tipo_manutencao: Optional[str] = None, data_inicio: Optional[str] = None,
+                                  data_fim: Optional[str] = None, tamanho_pagina: int = 100,
+                                  token: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Lista uma página de manutenções e o token da próxima página (None na última).
+        
+        Lança ValueError se o token for inválido.
+        """
+        try:
+            query, params = self._consulta_manutencoes(id_sensor, id_tecnico, tipo_manutencao,
+                                                       data_inicio, data_fim)
+            return self._paginar(query, params, "m.data_manutencao", "m.id_manutencao",
+                                 tamanho_pagina, token)
+        except sqlite3.Error as e:
+            print(f"Erro ao listar manutenções: {e}")
+            return [], None
+    
+    def iter_manutencoes(self, id_sensor: Optional[int] = None, id_tecnico: Optional[int] = None,
+                         tipo_manutencao: Optional[str] = None, data_inicio: Optional[str] = None,
+                         data_fim: Optional[str] = None, crescente: bool = False,
+                         tamanho_lote: int = 1000) -> Iterator[Dict]:
+        """Percorre as manutenções filtradas sem carregá-las todas em memória"""
+        query, params = self._consulta_manutencoes(id_sensor, id_tecnico, tipo_manutencao,
+                                                   data_inicio, data_fim)
+        ordem = "ASC" if crescente else "DESC"
+        query += f" ORDER BY m.data_manutencao {ordem}, m.id_manutencao {ordem}"
+        yield from self._iterar(query, params, tamanho_lote)
+    
     def atualizar_manutencao(self, id_manutencao: int, tipo_manutencao: str = None,
-                               observacoes: str = None) -> bool:
-        """Atualiza os dados de uma manutenção"""
+                               observacoes: str = None) -> int:
+        """Atualiza apenas os campos fornecidos de uma manutenção.
+        
+        Retorna o número de linhas afetadas (0 se não encontrada, sem campos ou em caso de erro).
+        """
         try:
-            # Obtém os dados atuais da manutenção
-            manutencao_atual = self.obter_manutencao(id_manutencao)
-            if not manutencao_atual:
-                print(f"Manutenção com ID {id_manutencao} não encontrada")
-                return False
-            
-            # Atualiza apenas os campos fornecidos
-            tipo_manutencao = tipo_manutencao if tipo_manutencao is not None else manutencao_atual['tipo_manutencao']
-            observacoes = observacoes if observacoes is not None else manutencao_atual['observacoes']
-            
-            self.cursor.execute(
-                "UPDATE manutencao SET tipo_manutencao = ?, observacoes = ? WHERE id_manutencao = ?",
-                (tipo_manutencao, observacoes, id_manutencao)
-            )
+            linhas = self._atualizar_campos('manutencao', 'id_manutencao', id_manutencao, {
+                'tipo_manutencao': tipo_manutencao, 'observacoes': observacoes,
+            })
             self.conn.commit()
-            return True
+            return linhas
         except sqlite3.Error as e:
             print(f"Erro ao atualizar manutenção: {e}")
-            return False
+            return 0
     
     def excluir_manutencao(self, id_manutencao: int) -> bool:
         """Exclui uma manutenção do banco de dados"""
@@ -683,35 +2093,97 @@ class SistemaIrrigacaoDB:
             print(f"Erro ao adicionar irrigação: {e}")
             return -1
     
+    def _data_valida(self, data_hora: str) -> bool:
+        """Indica se o SQLite reconhece a data (strftime não retorna NULL)"""
+        self.cursor.execute("SELECT strftime('%s', ?) IS NOT NULL", (data_hora,))
+        return bool(self.cursor.fetchone()[0])
+    
     def finalizar_irrigacao(self, id_irrigacao: int, volume_agua: float = None,
                            fim_timestamp: str = None) -> bool:
-        """Finaliza um ciclo de irrigação"""
+        """Finaliza um ciclo de irrigação (a duração é calculada na própria instrução UPDATE)"""
         try:
             # Se a data de fim não for fornecida, usa a data atual
             if fim_timestamp is None:
                 fim_timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            elif not self._data_valida(fim_timestamp):
+                print(f"Data de fim inválida: {fim_timestamp!r}")
+                return False
             
-            # Obtém a data de início para calcular a duração
-            self.cursor.execute("SELECT inicio_timestamp FROM irrigacao WHERE id_irrigacao = ?", (id_irrigacao,))
+            # Verifica antes do UPDATE, para não abrir uma transação de escrita que
+            # ficaria pendente (segurando a trava do banco) quando nada é alterado
+            self.cursor.execute(f"SELECT inicio_timestamp, {SQL_INICIO_VALIDO} FROM irrigacao WHERE id_irrigacao = ?",
+                                (id_irrigacao,))
             resultado = self.cursor.fetchone()
             if not resultado:
                 print(f"Irrigação com ID {id_irrigacao} não encontrada")
                 return False
+            if not resultado[1]:
+                print(f"Irrigação com ID {id_irrigacao} tem data de início inválida: {resultado[0]!r}")
+                return False
             
-            inicio = datetime.datetime.strptime(resultado[0], "%Y-%m-%d %H:%M:%S")
-            fim = datetime.datetime.strptime(fim_timestamp, "%Y-%m-%d %H:%M:%S")
-            duracao_minutos = (fim - inicio).total_seconds() / 60
-            
-            self.cursor.execute(
-                "UPDATE irrigacao SET fim_timestamp = ?, duracao_minutos = ?, volume_agua = ? WHERE id_irrigacao = ?",
-                (fim_timestamp, duracao_minutos, volume_agua, id_irrigacao)
-            )
+            self.cursor.execute(f"""
+                UPDATE irrigacao
+                SET fim_timestamp = :fim, duracao_minutos = {SQL_DURACAO_MINUTOS}, volume_agua = :volume
+                WHERE id_irrigacao = :id
+            """, {'fim': fim_timestamp, 'volume': volume_agua, 'id': id_irrigacao})
             self.conn.commit()
             return True
         except sqlite3.Error as e:
+            self.conn.rollback()
             print(f"Erro ao finalizar irrigação: {e}")
             return False
     
+    def finalizar_irrigacoes_abertas(self, id_area: Optional[int] = None, id_fazenda: Optional[int] = None,
+                                     iniciadas_ate: Optional[str] = None,
+                                     fim_timestamp: Optional[str] = None) -> int:
+        """Finaliza, em uma única instrução, todos os ciclos em andamento que atendem aos filtros.
+        
+        A duração de cada ciclo é calculada no SQL a partir do seu início. Ciclos iniciados
+        depois de fim_timestamp não são alterados. Ciclos cuja data de início o SQLite não
+        reconhece também não são alterados (ficariam com duração NULL): seus IDs são
+        informados em um aviso. Retorna o número de ciclos finalizados ou -1 em caso de erro.
+        """
+        try:
+            if fim_timestamp is None:
+                fim_timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            elif not self._data_valida(fim_timestamp):
+                print(f"Data de fim inválida: {fim_timestamp!r}")
+                return -1
+            
+            # Filtra pelo índice parcial idx_irrigacao_ativa (fim_timestamp IS NULL)
+            condicao = "fim_timestamp IS NULL AND inicio_timestamp <= :fim"
+            params = {'fim': fim_timestamp}
+            
+            if id_area is not None:
+                condicao += " AND id_area = :id_area"
+                params['id_area'] = id_area
+            
+            if id_fazenda is not None:
+                condicao += " AND id_area IN (SELECT id_area FROM area_monitorada WHERE id_fazenda = :id_fazenda)"
+                params['id_fazenda'] = id_fazenda
+            
+            if iniciadas_ate is not None:
+                condicao += " AND inicio_timestamp <= :iniciadas_ate"
+                params['iniciadas_ate'] = iniciadas_ate
+            
+            self.cursor.execute(f"""
+                UPDATE irrigacao
+                SET fim_timestamp = :fim, duracao_minutos = {SQL_DURACAO_MINUTOS}
+                WHERE {condicao} AND {SQL_INICIO_VALIDO}
+            """, params)
+            linhas = self.cursor.rowcount
+            self.conn.commit()
+            
+            self.cursor.execute(f"SELECT id_irrigacao FROM irrigacao WHERE {condicao} AND NOT ({SQL_INICIO_VALIDO})",
+                                params)
+            invalidas = [linha[0] for linha in self.cursor.fetchall()]
+            if invalidas:
+                print(f"Aviso: irrigações com data de início inválida não finalizadas: {invalidas}")
+            return linhas
+        except sqlite3.Error as e:
+            print(f"Erro ao finalizar irrigações abertas: {e}")
+            return -1
+    
     def obter_irrigacao(self, id_irrigacao: int) -> Dict:
         """Obtém os dados de um ciclo de irrigação pelo ID"""
         try:
@@ -723,52 +2195,93 @@ class SistemaIrrigacaoDB:
                 WHERE i.id_irrigacao = ?
             """, (id_irrigacao,))
             irrigacao = self.cursor.fetchone()
-            return dict(irrigacao) if irrigacao else {}
+            return self._registro(irrigacao) if irrigacao else {}
         except sqlite3.Error as e:
             print(f"Erro ao obter irrigação: {e}")
             return {}
     
+    def _consulta_irrigacoes(self, id_area: Optional[int] = None, id_fazenda: Optional[int] = None,
+                             data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                             ativas_apenas: bool = False) -> Tuple[str, List]:
+        """Monta a consulta filtrada de irrigações (sem ORDER BY/LIMIT)"""
+        query = """
+            SELECT i.*, a.nome_area, f.nome as nome_fazenda
+            FROM irrigacao i
+            JOIN area_monitorada a ON i.id_area = a.id_area
+            JOIN fazenda f ON a.id_fazenda = f.id_fazenda
+            WHERE 1=1
+        """
+        params = []
+        
+        if id_area is not None:
+            query += " AND i.id_area = ?"
+            params.append(id_area)
+        
+        if id_fazenda is not None:
+            query += " AND a.id_fazenda = ?"
+            params.append(id_fazenda)
+        
+        if data_inicio is not None:
+            query += " AND i.inicio_timestamp >= ?"
+            params.append(data_inicio)
+        
+        if data_fim is not None:
+            query += " AND i.inicio_timestamp <= ?"
+            params.append(data_fim)
+        
+        if ativas_apenas:
+            query += " AND i.fim_timestamp IS NULL"
+        
+        return query, params
+    
     def listar_irrigacoes(self, id_area: Optional[int] = None, id_fazenda: Optional[int] = None,
                          data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
-                         ativas_apenas: bool = False) -> List[Dict]:
+                         ativas_apenas: bool = False, limite: Optional[int] = None) -> List[Dict]:
         """Lista ciclos de irrigação com diversos filtros"""
         try:
-            query = """
-                SELECT i.*, a.nome_area, f.nome as nome_fazenda
-                FROM irrigacao i
-                JOIN area_monitorada a ON i.id_area = a.id_area
-                JOIN fazenda f ON a.id_fazenda = f.id_fazenda
-                WHERE 1=1
-            """
-            params = []
-            
-            if id_area is not None:
-                query += " AND i.id_area = ?"
-                params.append(id_area)
-            
-            if id_fazenda is not None:
-                query += " AND a.id_fazenda = ?"
-                params.append(id_fazenda)
+            query, params = self._consulta_irrigacoes(id_area, id_fazenda, data_inicio, data_fim,
+                                                      ativas_apenas)
             
-            if data_inicio is not None:
-                query += " AND i.inicio_timestamp >= ?"
-                params.append(data_inicio)
-            
-            if data_fim is not None:
-                query += " AND i.inicio_timestamp <= ?"
-                params.append(data_fim)
-            
-            if ativas_apenas:
-                query += " AND i.fim_timestamp IS NULL"
-            
-            query += " ORDER BY i.inicio_timestamp DESC"
+            query += " ORDER BY i.inicio_timestamp DESC, i.id_irrigacao DESC"
+            if limite is not None:
+                query += " LIMIT ?"
+                params.append(limite)
             
             self.cursor.execute(query, params)
             irrigacoes = self.cursor.fetchall()
-            return [dict(irrigacao) for irrigacao in irrigacoes]
+            return [self._registro(irrigacao) for irrigacao in irrigacoes]
         except sqlite3.Error as e:
             print(f"Erro ao listar irrigações: {e}")
             return []
+    
+    def listar_irrigacoes_pagina(self, id_area: Optional[int] = None, id_fazenda: Optional[int] = None,
+                                 data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                                 ativas_apenas: bool = False, tamanho_pagina: int = 100,
+                                 token: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Lista uma página de irrigações e o token da próxima página (None na última).
+        
+        Lança ValueError se o token for inválido.
+        """
+        try:
+            query, params = self._consulta_irrigacoes(id_area, id_fazenda, data_inicio, data_fim,
+                                                      ativas_apenas)
+            return self._paginar(query, params, "i.inicio_timestamp", "i.id_irrigacao",
+                                 tamanho_pagina, token)
+        except sqlite3.Error as e:
+            print(f"Erro ao listar irrigações: {e}")
+            return [], None
+    
+    def iter_irrigacoes(self, id_area: Optional[int] = None, id_fazenda: Optional[int] = None,
+                        data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                        ativas_apenas: bool = False, crescente: bool = False,
+                        tamanho_lote: int = 1000) -> Iterator[Dict]:
+        """Percorre as irrigações filtradas sem carregá-las todas em memória"""
+        query, params = self._consulta_irrigacoes(id_area, id_fazenda, data_inicio, data_fim,
+                                                  ativas_apenas)
+        ordem = "ASC" if crescente else "DESC"
+        query += f" ORDER BY i.inicio_timestamp {ordem}, i.id_irrigacao {ordem}"
+        yield from self._iterar(query, params, tamanho_lote)
+    
     # OPERAÇÕES CRUD PARA ALERTAS
     
     def adicionar_alerta(self, id_area: int, id_sensor: int, tipo_alerta: str, 
@@ -802,6 +2315,48 @@ class SistemaIrrigacaoDB:
             print(f"Erro ao resolver alerta: {e}")
             return False
     
+    def resolver_alertas(self, id_area: Optional[int] = None, tipo_alerta: Optional[str] = None,
+                         ate: Optional[str] = None, id_sensor: Optional[int] = None,
+                         id_fazenda: Optional[int] = None) -> int:
+        """Marca como resolvidos, em uma única instrução, os alertas pendentes que atendem aos filtros.
+        
+        ate limita aos alertas com timestamp <= ate (ex.: fim de uma queda de sensor).
+        Sem filtros, resolve todos os alertas pendentes. Retorna o número de alertas
+        resolvidos ou -1 em caso de erro.
+        """
+        try:
+            # resolvido = 0 literal para usar o índice parcial idx_alerta_pendente
+            query = "UPDATE alerta SET resolvido = 1 WHERE resolvido = 0"
+            params = []
+            
+            if id_area is not None:
+                query += " AND id_area = ?"
+                params.append(id_area)
+            
+            if id_fazenda is not None:
+                query += " AND id_area IN (SELECT id_area FROM area_monitorada WHERE id_fazenda = ?)"
+                params.append(id_fazenda)
+            
+            if id_sensor is not None:
+                query += " AND id_sensor = ?"
+                params.append(id_sensor)
+            
+            if tipo_alerta is not None:
+                query += " AND tipo_alerta = ?"
+                params.append(tipo_alerta)
+            
+            if ate is not None:
+                query += " AND timestamp <= ?"
+                params.append(ate)
+            
+            self.cursor.execute(query, params)
+            linhas = self.cursor.rowcount
+            self.conn.commit()
+            return linhas
+        except sqlite3.Error as e:
+            print(f"Erro ao resolver alertas: {e}")
+            return -1
+    
     def obter_alerta(self, id_alerta: int) -> Dict:
         """Obtém os dados de um alerta pelo ID"""
         try:
@@ -814,59 +2369,125 @@ class SistemaIrrigacaoDB:
                 WHERE a.id_alerta = ?
             """, (id_alerta,))
             alerta = self.cursor.fetchone()
-            return dict(alerta) if alerta else {}
+            return self._registro(alerta) if alerta else {}
         except sqlite3.Error as e:
             print(f"Erro ao obter alerta: {e}")
             return {}
     
+    def _consulta_alertas(self, id_area: Optional[int] = None, id_sensor: Optional[int] = None,
+                          tipo_alerta: Optional[str] = None, resolvidos: Optional[bool] = None,
+                          data_inicio: Optional[str] = None, data_fim: Optional[str] = None) -> Tuple[str, List]:
+        """Monta a consulta filtrada de alertas (sem ORDER BY/LIMIT)"""
+        query = """
+            SELECT a.*, s.tipo_sensor, ar.nome_area, f.nome as nome_fazenda
+            FROM alerta a
+            JOIN sensor s ON a.id_sensor = s.id_sensor
+            JOIN area_monitorada ar ON a.id_area = ar.id_area
+            JOIN fazenda f ON ar.id_fazenda = f.id_fazenda
+            WHERE 1=1
+        """
+        params = []
+        
+        if id_area is not None:
+            query += " AND a.id_area = ?"
+            params.append(id_area)
+        
+        if id_sensor is not None:
+            query += " AND a.id_sensor = ?"
+            params.append(id_sensor)
+        
+        if tipo_alerta is not None:
+            query += " AND a.tipo_alerta = ?"
+            params.append(tipo_alerta)
+        
+        # O valor é escrito literalmente na consulta para que o planejador
+        # possa usar o índice parcial idx_alerta_pendente (resolvido = 0)
+        if resolvidos is not None:
+            query += " AND a.resolvido = 1" if resolvidos else " AND a.resolvido = 0"
+        
+        if data_inicio is not None:
+            query += " AND a.timestamp >= ?"
+            params.append(data_inicio)
+        
+        if data_fim is not None:
+            query += " AND a.timestamp <= ?"
+            params.append(data_fim)
+        
+        return query, params
+    
     def listar_alertas(self, id_area: Optional[int] = None, id_sensor: Optional[int] = None,
                       tipo_alerta: Optional[str] = None, resolvidos: Optional[bool] = None,
-                      data_inicio: Optional[str] = None, data_fim: Optional[str] = None) -> List[Dict]:
+                      data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                      limite: Optional[int] = None) -> List[Dict]:
         """Lista alertas com diversos filtros"""
         try:
-            query = """
-                SELECT a.*, s.tipo_sensor, ar.nome_area, f.nome as nome_fazenda
-                FROM alerta a
-                JOIN sensor s ON a.id_sensor = s.id_sensor
-                JOIN area_monitorada ar ON a.id_area = ar.id_area
-                JOIN fazenda f ON ar.id_fazenda = f.id_fazenda
-                WHERE 1=1
-            """
-            params = []
-            
-            if id_area is not None:
-                query += " AND a.id_area = ?"
-                params.append(id_area)
-            
-            if id_sensor is not None:
-                query += " AND a.id_sensor = ?"
-                params.append(id_sensor)
-            
-            if tipo_alerta is not None:
-                query += " AND a.tipo_alerta = ?"
-                params.append(tipo_alerta)
-            
-            if resolvidos is not None:
-                query += " AND a.resolvido = ?"
-                params.append(1 if resolvidos else 0)
+            query, params = self._consulta_alertas(id_area, id_sensor, tipo_alerta, resolvidos,
+                                                   data_inicio, data_fim)
             
-            if data_inicio is not None:
-                query += " AND a.timestamp >= ?"
-                params.append(data_inicio)
-            
-            if data_fim is not None:
-                query += " AND a.timestamp <= ?"
-                params.append(data_fim)
-            
-            query += " ORDER BY a.timestamp DESC"
+            query += " ORDER BY a.timestamp DESC, a.id_alerta DESC"
+            if limite is not None:
+                query += " LIMIT ?"
+                params.append(limite)
             
             self.cursor.execute(query, params)
             alertas = self.cursor.fetchall()
-            return [dict(alerta) for alerta in alertas]
+            return [self._registro(alerta) for alerta in alertas]
         except sqlite3.Error as e:
             print(f"Erro ao listar alertas: {e}")
             return []
     
+    def listar_alertas_pagina(self, id_area: Optional[int] = None, id_sensor: Optional[int] = None,
+                              tipo_alerta: Optional[str] = None, resolvidos: Optional[bool] = None,
+                              data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                              tamanho_pagina: int = 100,
+                              token: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Lista uma página de alertas e o token da próxima página (None na última).
+        
+        Lança ValueError se o token for inválido.
+        """
+        try:
+            query, params = self._consulta_alertas(id_area, id_sensor, tipo_alerta, resolvidos,
+                                                   data_inicio, data_fim)
+            return self._paginar(query, params, "a.timestamp", "a.id_alerta", tamanho_pagina, token)
+        except sqlite3.Error as e:
+            print(f"Erro ao listar alertas: {e}")
+            return [], None
+    
+    def iter_alertas(self, id_area: Optional[int] = None, id_sensor: Optional[int] = None,
+                     tipo_alerta: Optional[str] = None, resolvidos: Optional[bool] = None,
+                     data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                     crescente: bool = False, tamanho_lote: int = 1000) -> Iterator[Dict]:
+        """Percorre os alertas filtrados sem carregá-los todos em memória"""
+        query, params = self._consulta_alertas(id_area, id_sensor, tipo_alerta, resolvidos,
+                                               data_inicio, data_fim)
+        ordem = "ASC" if crescente else "DESC"
+        query += f" ORDER BY a.timestamp {ordem}, a.id_alerta {ordem}"
+        yield from self._iterar(query, params, tamanho_lote)
+    
+    def contar_alertas_ativos(self, id_area: int) -> int:
+        """Retorna o número de alertas não resolvidos de uma área (consulta ao contador)"""
+        try:
+            self.cursor.execute(
+                "SELECT alertas_ativos FROM resumo_alertas_area WHERE id_area = ?",
+                (id_area,)
+            )
+            resultado = self.cursor.fetchone()
+            return resultado[0] if resultado else 0
+        except sqlite3.Error as e:
+            print(f"Erro ao contar alertas ativos: {e}")
+            return 0
+    
+    def listar_alertas_ativos_por_area(self) -> Dict[int, int]:
+        """Retorna um dicionário id_area -> número de alertas não resolvidos"""
+        try:
+            self.cursor.execute(
+                "SELECT id_area, alertas_ativos FROM resumo_alertas_area WHERE alertas_ativos > 0"
+            )
+            return {row[0]: row[1] for row in self.cursor.fetchall()}
+        except sqlite3.Error as e:
+            print(f"Erro ao listar alertas ativos por área: {e}")
+            return {}
+    
     def excluir_alerta(self, id_alerta: int) -> bool:
         """Exclui um alerta do banco de dados"""
         try:
@@ -877,6 +2498,185 @@ class SistemaIrrigacaoDB:
             print(f"Erro ao excluir alerta: {e}")
             return False
     
+    # INDICADORES POR ÁREA (VISÃO DA FROTA)
+    
+    def listar_indicadores_areas(self, dias: int = 7, tipos_sensor: Iterable[str] = ('umidade', 'ph'),
+                                 id_fazenda: Optional[int] = None, como_dataframe: bool = False):
+        """Indicadores de todas as áreas em uma única consulta.
+        
+        Para cada área: fazenda, último valor de cada tipo em tipos_sensor (coluna com o nome
+        do tipo), instante da última leitura, alertas ativos (tabela resumo_alertas_area),
+        irrigação em andamento e número de irrigações e volume de água nos últimos `dias`.
+        Os últimos valores usam o índice (id_area, data_hora) de trás para frente, uma busca
+        por área e tipo, sem percorrer o histórico.
+        """
+        try:
+            # Um parâmetro por tipo; CROSS JOIN mantém a leitura como laço externo, percorrendo
+            # o índice (id_area, data_hora) de trás para frente em vez de partir do sensor
+            tipos_sensor = list(dict.fromkeys(tipos_sensor))
+            colunas = []
+            for tipo in tipos_sensor:
+                nome = '"' + tipo.replace('"', '""') + '"'
+                colunas.append(f"""
+                    (SELECT l.valor FROM leitura l CROSS JOIN sensor s ON s.id_sensor = l.id_sensor
+                     WHERE l.id_area = a.id_area AND s.tipo_sensor = ?
+                     ORDER BY l.data_hora DESC LIMIT 1) AS {nome}""")
+            
+            query = f"""
+                WITH irrigacoes_periodo AS (
+                    SELECT id_area, COUNT(*) AS irrigacoes, SUM(volume_agua) AS volume_agua
+                    FROM irrigacao
+                    WHERE inicio_timestamp >= datetime('now', 'localtime', ?)
+                    GROUP BY id_area
+                )
+                SELECT a.id_area, a.nome_area, f.id_fazenda, f.nome AS nome_fazenda,
+                       {''.join(c + ',' for c in colunas)}
+                       (SELECT MAX(l.data_hora) FROM leitura l WHERE l.id_area = a.id_area) AS ultima_leitura,
+                       COALESCE(r.alertas_ativos, 0) AS alertas_ativos,
+                       EXISTS (SELECT 1 FROM irrigacao i
+                               WHERE i.id_area = a.id_area AND i.fim_timestamp IS NULL) AS irrigacao_ativa,
+                       COALESCE(ip.irrigacoes, 0) AS irrigacoes,
+                       COALESCE(ip.volume_agua, 0) AS volume_agua
+                FROM area_monitorada a
+                JOIN fazenda f ON a.id_fazenda = f.id_fazenda
+                LEFT JOIN resumo_alertas_area r ON r.id_area = a.id_area
+                LEFT JOIN irrigacoes_periodo ip ON ip.id_area = a.id_area
+            """
+            params = [f'-{int(dias)} days'] + tipos_sensor
+            if id_fazenda is not None:
+                query += " WHERE a.id_fazenda = ?"
+                params.append(id_fazenda)
+            query += " ORDER BY f.nome, a.nome_area, a.id_area"
+            
+            if not como_dataframe:
+                self.cursor.execute(query, params)
+                return [self._registro(linha) for linha in self.cursor.fetchall()]
+            
+            import pandas as pd
+            
+            cursor = self.conn.cursor()
+            cursor.row_factory = None
+            try:
+                cursor.execute(query, params)
+                nomes = [coluna[0] for coluna in cursor.description]
+                df = pd.DataFrame.from_records(cursor.fetchall(), columns=nomes)
+            finally:
+                cursor.close()
+            df[tipos_sensor] = df[tipos_sensor].astype('float64')
+            df['ultima_leitura'] = pd.to_datetime(df['ultima_leitura'])
+            df['irrigacao_ativa'] = df['irrigacao_ativa'].astype(bool)
+            return df
+        except sqlite3.Error as e:
+            print(f"Erro ao listar indicadores das áreas: {e}")
+            return None if como_dataframe else []
+    
+    # EXPURGO EM LOTES (DESATIVAÇÃO DE SENSORES, ÁREAS E FAZENDAS)
+    
+    def _expurgar(self, descricao: str, etapas: List[Tuple[str, str, Tuple]], tamanho_lote: int,
+                  pausa: float, progresso: Optional[Callable[[str, int, float], None]]) -> Dict:
+        """Executa as etapas (tabela, condição, parâmetros) em ordem, excluindo até tamanho_lote
+        linhas por transação, e retorna as linhas excluídas por tabela e a vazão.
+        
+        Cada lote é confirmado imediatamente, de modo que a trava de escrita é mantida
+        apenas durante um lote e a ingestão continua entre eles. Como cada etapa apenas
+        exclui o que ainda existe e o registro principal é a última etapa, uma execução
+        interrompida é retomada simplesmente chamando o método de novo.
+        """
+        linhas_por_tabela = {}
+        inicio = time.perf_counter()
+        try:
+            for tabela, condicao, params in etapas:
+                inicio_etapa = time.perf_counter()
+                total = 0
+                while True:
+                    self.cursor.execute(f"""
+                        DELETE FROM {tabela} WHERE rowid IN (
+                            SELECT rowid FROM {tabela} WHERE {condicao} LIMIT ?
+                        )
+                    """, (*params, tamanho_lote))
+                    excluidas = self.cursor.rowcount
+                    self.conn.commit()
+                    total += excluidas
+                    if progresso is not None:
+                        progresso(tabela, total, time.perf_counter() - inicio_etapa)
+                    if excluidas < tamanho_lote:
+                        break
+                    if pausa:
+                        time.sleep(pausa)
+                linhas_por_tabela[tabela] = linhas_por_tabela.get(tabela, 0) + total
+                duracao_etapa = time.perf_counter() - inicio_etapa
+                if total:
+                    print(f"Expurgo de {descricao}: {total} linhas de {tabela} em {duracao_etapa:.1f} s "
+                          f"({total / duracao_etapa if duracao_etapa else 0:.0f} linhas/s)")
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"Erro no expurgo de {descricao} (execute novamente para retomar): {e}")
+            return {}
+        
+        duracao = time.perf_counter() - inicio
+        total = sum(linhas_por_tabela.values())
+        return {
+            'linhas': linhas_por_tabela,
+            'total': total,
+            'duracao': duracao,
+            'linhas_por_segundo': total / duracao if duracao else 0.0,
+        }
+    
+    def expurgar_sensor(self, id_sensor: int, tamanho_lote: int = 5000, pausa: float = 0.0,
+                        progresso: Optional[Callable[[str, int, float], None]] = None) -> Dict:
+        """Exclui um sensor com suas leituras, alertas, manutenções e associações, em lotes.
+        
+        progresso(tabela, linhas_excluidas, segundos) é chamado após cada lote; pausa
+        (segundos) entre lotes cede ainda mais espaço à ingestão. Retorna {'linhas':
+        {tabela: n}, 'total', 'duracao', 'linhas_por_segundo'} ou {} em caso de erro.
+        """
+        condicao = ("id_sensor = ?", (id_sensor,))
+        resultado = self._expurgar(f"sensor {id_sensor}", [
+            ('leitura', *condicao),
+            ('alerta', *condicao),
+            ('manutencao', *condicao),
+            ('sensor_area', *condicao),
+            ('sensor', *condicao),
+        ], tamanho_lote, pausa, progresso)
+        self._cache_invalidar('sensor', id_sensor)
+        return resultado
+    
+    def expurgar_area(self, id_area: int, tamanho_lote: int = 5000, pausa: float = 0.0,
+                      progresso: Optional[Callable[[str, int, float], None]] = None) -> Dict:
+        """Exclui uma área com suas leituras, alertas, irrigações e associações, em lotes
+        (os sensores são mantidos). Parâmetros e retorno como em expurgar_sensor."""
+        condicao = ("id_area = ?", (id_area,))
+        resultado = self._expurgar(f"área {id_area}", [
+            ('leitura', *condicao),
+            ('alerta', *condicao),
+            ('irrigacao', *condicao),
+            ('sensor_area', *condicao),
+            ('resumo_alertas_area', *condicao),
+            ('area_monitorada', *condicao),
+        ], tamanho_lote, pausa, progresso)
+        self._cache_invalidar('area', id_area)
+        return resultado
+    
+    def expurgar_fazenda(self, id_fazenda: int, tamanho_lote: int = 5000, pausa: float = 0.0,
+                         progresso: Optional[Callable[[str, int, float], None]] = None) -> Dict:
+        """Exclui uma fazenda, suas áreas e todos os dados das áreas, em lotes (os sensores
+        são mantidos). Parâmetros e retorno como em expurgar_sensor."""
+        areas = "id_area IN (SELECT id_area FROM area_monitorada WHERE id_fazenda = ?)"
+        ids_areas = [self._valor(area, 'id_area') for area in self.listar_areas(id_fazenda)]
+        resultado = self._expurgar(f"fazenda {id_fazenda}", [
+            ('leitura', areas, (id_fazenda,)),
+            ('alerta', areas, (id_fazenda,)),
+            ('irrigacao', areas, (id_fazenda,)),
+            ('sensor_area', areas, (id_fazenda,)),
+            ('resumo_alertas_area', areas, (id_fazenda,)),
+            ('area_monitorada', "id_fazenda = ?", (id_fazenda,)),
+            ('fazenda', "id_fazenda = ?", (id_fazenda,)),
+        ], tamanho_lote, pausa, progresso)
+        for id_area in ids_areas:
+            self._cache_invalidar('area', id_area)
+        self._cache_invalidar('fazenda', id_fazenda)
+        return resultado
+    
     # MÉTODOS DE COMPATIBILIDADE COM O MODELO ANTERIOR
     
     def obter_leituras_compat(self, limite: int = 10) -> List[Dict]:
@@ -884,7 +2684,7 @@ class SistemaIrrigacaoDB:
         try:
             self.cursor.execute("SELECT * FROM leituras_compat ORDER BY timestamp DESC LIMIT ?", (limite,))
             leituras = self.cursor.fetchall()
-            return [dict(leitura) for leitura in leituras]
+            return [self._registro(leitura) for leitura in leituras]
         except sqlite3.Error as e:
             print(f"Erro ao obter leituras compatíveis: {e}")
             return []
@@ -894,7 +2694,7 @@ class SistemaIrrigacaoDB:
         try:
             self.cursor.execute("SELECT * FROM historico_irrigacao_compat ORDER BY inicio_timestamp DESC")
             historico = self.cursor.fetchall()
-            return [dict(registro) for registro in historico]
+            return [self._registro(registro) for registro in historico]
         except sqlite3.Error as e:
             print(f"Erro ao obter histórico de irrigação compatível: {e}")
             return []
@@ -904,7 +2704,7 @@ class SistemaIrrigacaoDB:
         try:
             self.cursor.execute("SELECT * FROM alertas_compat ORDER BY timestamp DESC")
             alertas = self.cursor.fetchall()
-            return [dict(alerta) for alerta in alertas]
+            return [self._registro(alerta) for alerta in alertas]
         except sqlite3.Error as e:
             print(f"Erro ao obter alertas compatíveis: {e}")
             return []
@@ -63,11 +63,11 @@ def main():
     )
     print(f"Área 3 criada com ID: {id_area3}")
     
-    # Lista as áreas por fazenda
+    # Lista as áreas por fazenda (uma única consulta para todas as fazendas)
+    areas_por_fazenda = db.obter_areas_por_fazendas(f['id_fazenda'] for f in fazendas)
     for fazenda in fazendas:
-        areas = db.listar_areas(fazenda['id_fazenda'])
         print(f"\nÁreas da {fazenda['nome']}:")
-        for area in areas:
+        for area in areas_por_fazenda.get(fazenda['id_fazenda'], []):
             print(f"  - {area['nome_area']}")
     
     # 3. Cadastro de sensores
@@ -104,6 +104,12 @@ def main():
         db.associar_sensor_area(ids_sensores[tipo], id_area3)
         print(f"Sensor {tipo} associado à Estufa de Hortaliças")
     
+    # Lista os sensores instalados em cada área (uma única consulta para todas as áreas)
+    sensores_por_area = db.listar_sensores_por_areas([id_area1, id_area2, id_area3])
+    for id_area, sensores_area in sensores_por_area.items():
+        tipos = ", ".join(sensor['tipo_sensor'] for sensor in sensores_area)
+        print(f"Área {id_area}: {tipos}")
+    
     # 5. Cadastro de técnicos
     print("\n--- Cadastro de Técnicos ---")
     id_tecnico1 = db.adicionar_tecnico(
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Exportação de leituras do Sistema de Irrigação Inteligente para CSV ou Parquet
+As leituras filtradas são lidas do banco em lotes e convertidas em blocos de bytes
+por geradores, de modo que a memória usada não depende do total de linhas: os blocos
+podem ser gravados em arquivo (linha de comando) ou servidos pelo dashboard.
+
+Uso:
+    python exportacao.py leituras.csv --area 1 --inicio "2024-01-01 00:00:00"
+    python exportacao.py leituras.parquet --db ../db/exemplo_irrigacao.db
+"""
+
+import io
+import os
+import csv
+import contextlib
+import time
+import argparse
+from typing import Iterable, Iterator, List, Optional, Tuple
+from db_manager_expandido_completo import SistemaIrrigacaoDB, COLUNAS_LEITURAS_LOTE
+
+DB_PATH = "../db/exemplo_irrigacao.db"
+
+# Formatos aceitos (extensão do arquivo -> formato)
+FORMATOS = {'.csv': 'csv', '.parquet': 'parquet'}
+
+def gerar_csv(lotes: Iterable[List[Tuple]], colunas: Tuple[str, ...] = COLUNAS_LEITURAS_LOTE,
+              separador: str = ',') -> Iterator[bytes]:
+    """Converte lotes de tuplas em blocos de texto CSV (UTF-8), um bloco por lote,
+    o primeiro com o cabeçalho"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=separador, lineterminator='\n')
+    escritor.writerow(colunas)
+    for lote in lotes:
+        escritor.writerows(lote)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')  # apenas o cabeçalho (nenhuma leitura)
+
+class _SaidaEmBlocos(io.RawIOBase):
+    """Arquivo somente de escrita que acumula os bytes até serem retirados"""
+
+    def __init__(self):
+        self._blocos = []
+        self._posicao = 0
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        dados = bytes(dados)
+        self._blocos.append(dados)
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def retirar(self) -> bytes:
+        dados = b''.join(self._blocos)
+        self._blocos.clear()
+        return dados
+
+def gerar_parquet(lotes: Iterable[List[Tuple]], colunas: Tuple[str, ...] = COLUNAS_LEITURAS_LOTE,
+                  compressao: str = 'zstd') -> Iterator[bytes]:
+    """Converte lotes de tuplas em blocos de um arquivo Parquet, um grupo de linhas por lote.
+
+    Requer pyarrow (dependência opcional, usada apenas na exportação em Parquet).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = pa.schema([
+        ('id_leitura', pa.int64()), ('data_hora', pa.timestamp('s')),
+        ('id_fazenda', pa.int64()), ('nome_fazenda', pa.string()),
+        ('id_area', pa.int64()), ('nome_area', pa.string()),
+        ('id_sensor', pa.int64()), ('tipo_sensor', pa.string()),
+        ('unidade_medida', pa.string()), ('valor', pa.float64()),
+    ]) if tuple(colunas) == COLUNAS_LEITURAS_LOTE else None
+
+    saida = _SaidaEmBlocos()
+    escritor = None
+    try:
+        for lote in lotes:
+            arrays = [list(coluna) for coluna in zip(*lote)]
+            if esquema is not None:
+                # data_hora chega como texto "AAAA-MM-DD HH:MM:SS"
+                arrays[1] = pa.array(arrays[1], pa.string()).cast(pa.timestamp('s'))
+                tabela = pa.Table.from_arrays(arrays, schema=esquema)
+            else:
+                tabela = pa.Table.from_arrays(arrays, names=list(colunas))
+            if escritor is None:
+                escritor = pq.ParquetWriter(saida, tabela.schema, compression=compressao)
+            escritor.write_table(tabela)
+            yield saida.retirar()
+        if escritor is None:
+            # Nenhuma leitura: arquivo válido e vazio com o esquema
+            vazia = esquema.empty_table() if esquema is not None else pa.table({c: [] for c in colunas})
+            escritor = pq.ParquetWriter(saida, vazia.schema, compression=compressao)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    yield saida.retirar()
+
+def gerar_exportacao(db: SistemaIrrigacaoDB, formato: str = 'csv', id_area: Optional[int] = None,
+                     id_sensor: Optional[int] = None, data_inicio: Optional[str] = None,
+                     data_fim: Optional[str] = None, tamanho_lote: int = 50000) -> Iterator[bytes]:
+    """Blocos de bytes do arquivo de leituras filtradas no formato 'csv' ou 'parquet'"""
+    if formato not in ('csv', 'parquet'):
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    return _gerar_exportacao(db, formato, id_area, id_sensor, data_inicio, data_fim, tamanho_lote)
+
+def _gerar_exportacao(db, formato, id_area, id_sensor, data_inicio, data_fim, tamanho_lote):
+    lotes = db.iter_leituras_lotes(id_area=id_area, id_sensor=id_sensor, data_inicio=data_inicio,
+                                   data_fim=data_fim, tamanho_lote=tamanho_lote)
+    try:
+        yield from (gerar_csv(lotes) if formato == 'csv' else gerar_parquet(lotes))
+    finally:
+        lotes.close()  # libera o cursor mesmo se a exportação for interrompida
+
+def exportar_leituras(db: SistemaIrrigacaoDB, caminho: str, formato: Optional[str] = None,
+                      **filtros) -> int:
+    """Grava as leituras filtradas em `caminho` e retorna o número de bytes gravados.
+
+    O formato é deduzido da extensão quando não informado. O arquivo é escrito em um
+    temporário ao lado do destino e renomeado no fim, para que uma exportação
+    interrompida não deixe um arquivo incompleto com o nome final.
+    """
+    if formato is None:
+        formato = FORMATOS.get(os.path.splitext(caminho)[1].lower(), 'csv')
+    temporario = caminho + '.parcial'
+    total = 0
+    try:
+        blocos = gerar_exportacao(db, formato, **filtros)
+        with open(temporario, 'wb') as arquivo, contextlib.closing(blocos):
+            for bloco in blocos:
+                arquivo.write(bloco)
+                total += len(bloco)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description='Exporta leituras filtradas para CSV ou Parquet sem carregá-las em memória')
+    parser.add_argument('saida', help='Arquivo de saída (.csv ou .parquet)')
+    parser.add_argument('--db', default=DB_PATH, help=f'Caminho do banco de dados (padrão: {DB_PATH})')
+    parser.add_argument('--formato', choices=sorted(set(FORMATOS.values())), help='Formato (padrão: pela extensão do arquivo)')
+    parser.add_argument('--area', type=int, help='ID da área monitorada')
+    parser.add_argument('--sensor', type=int, help='ID do sensor')
+    parser.add_argument('--inicio', help='Data/hora inicial (AAAA-MM-DD HH:MM:SS)')
+    parser.add_argument('--fim', help='Data/hora final (AAAA-MM-DD HH:MM:SS)')
+    parser.add_argument('--lote', type=int, default=50000, help='Leituras por lote (padrão: 50000)')
+    args = parser.parse_args()
+
+    db = SistemaIrrigacaoDB(args.db, aplicar_schema=False)
+    try:
+        inicio = time.perf_counter()
+        total = exportar_leituras(db, args.saida, args.formato, id_area=args.area, id_sensor=args.sensor,
+                                  data_inicio=args.inicio, data_fim=args.fim, tamanho_lote=args.lote)
+        print(f"Exportação concluída: {args.saida} ({total / 1e6:.1f} MB em {time.perf_counter() - inicio:.1f} s)")
+    finally:
+        db.fechar()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Métricas no formato texto do Prometheus para o Sistema de Irrigação Inteligente
+Endpoint HTTP leve (somente biblioteca padrão) que os processos de ingestão
+(serial_to_sql, mqtt_client) e o gerenciador de banco podem ativar para
+expor taxas, latências e erros para coleta pelo gateway.
+"""
+
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Limites padrão (em segundos) dos histogramas de latência
+LIMITES_LATENCIA = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+def _formatar(valor: float) -> str:
+    """Formata um número como no formato texto do Prometheus"""
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+def _rotulos(rotulos: Dict[str, str]) -> str:
+    if not rotulos:
+        return ''
+    pares = ','.join(
+        '{}="{}"'.format(chave, str(valor).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for chave, valor in rotulos.items()
+    )
+    return '{' + pares + '}'
+
+class Contador:
+    """Valor que só cresce (ex.: leituras gravadas, erros de parse)"""
+
+    tipo = 'counter'
+
+    def __init__(self, nome: str, ajuda: str):
+        self.nome = nome
+        self.ajuda = ajuda
+        self._valor = 0.0
+        self._trava = threading.Lock()
+
+    def incrementar(self, quantidade: float = 1):
+        with self._trava:
+            self._valor += quantidade
+
+    def amostras(self) -> List[str]:
+        return [f"{self.nome} {_formatar(self._valor)}"]
+
+class Medidor:
+    """Valor que sobe e desce (ex.: profundidade da fila, instante da última leitura)"""
+
+    tipo = 'gauge'
+
+    def __init__(self, nome: str, ajuda: str):
+        self.nome = nome
+        self.ajuda = ajuda
+        self._valor = 0.0
+        self._trava = threading.Lock()
+
+    def definir(self, valor: float):
+        with self._trava:
+            self._valor = valor
+
+    def incrementar(self, quantidade: float = 1):
+        with self._trava:
+            self._valor += quantidade
+
+    def definir_agora(self):
+        """Define o valor como o instante atual (segundos desde a época)"""
+        self.definir(time.time())
+
+    def amostras(self) -> List[str]:
+        return [f"{self.nome} {_formatar(self._valor)}"]
+
+class Histograma:
+    """Distribuição de observações em intervalos cumulativos (ex.: latência do commit)"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nome: str, ajuda: str, limites: Tuple[float, ...] = LIMITES_LATENCIA):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.limites = tuple(limites)
+        self._intervalos = [0] * (len(self.limites) + 1)
+        self._soma = 0.0
+        self._trava = threading.Lock()
+
+    def observar(self, valor: float):
+        with self._trava:
+            self._intervalos[bisect.bisect_left(self.limites, valor)] += 1
+            self._soma += valor
+
+    def medir(self):
+        """Gerenciador de contexto que observa a duração do bloco"""
+        return _Cronometro(self)
+
+    def amostras(self) -> List[str]:
+        with self._trava:
+            intervalos, soma = list(self._intervalos), self._soma
+        linhas, acumulado = [], 0
+        for limite, n in zip(self.limites + (float('inf'),), intervalos):
+            acumulado += n
+            linhas.append(f'{self.nome}_bucket{{le="{_formatar(limite)}"}} {acumulado}')
+        linhas.append(f"{self.nome}_sum {_formatar(soma)}")
+        linhas.append(f"{self.nome}_count {acumulado}")
+        return linhas
+
+class _Cronometro:
+    def __init__(self, histograma: Histograma):
+        self.histograma = histograma
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histograma.observar(time.perf_counter() - self.inicio)
+
+class RegistroMetricas:
+    """Conjunto de métricas de um processo, renderizado no formato texto do Prometheus"""
+
+    def __init__(self):
+        self._metricas = {}
+        self._coletores = []
+        self._trava = threading.Lock()
+
+    def _registrar(self, metrica):
+        with self._trava:
+            existente = self._metricas.get(metrica.nome)
+            if existente is not None:
+                return existente  # o mesmo nome retorna a mesma métrica
+            self._metricas[metrica.nome] = metrica
+            return metrica
+
+    def contador(self, nome: str, ajuda: str) -> Contador:
+        return self._registrar(Contador(nome, ajuda))
+
+    def medidor(self, nome: str, ajuda: str) -> Medidor:
+        return self._registrar(Medidor(nome, ajuda))
+
+    def histograma(self, nome: str, ajuda: str, limites: Tuple[float, ...] = LIMITES_LATENCIA) -> Histograma:
+        return self._registrar(Histograma(nome, ajuda, limites))
+
+    def adicionar_coletor(self, coletor: Callable[[], List[str]]):
+        """Adiciona uma função que gera linhas (com # HELP/# TYPE) a cada coleta"""
+        with self._trava:
+            self._coletores.append(coletor)
+
+    def renderizar(self) -> str:
+        """Texto de exposição com todas as métricas e coletores"""
+        with self._trava:
+            metricas = list(self._metricas.values())
+            coletores = list(self._coletores)
+        linhas = []
+        for metrica in metricas:
+            linhas.append(f"# HELP {metrica.nome} {metrica.ajuda}")
+            linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+            linhas.extend(metrica.amostras())
+        for coletor in coletores:
+            try:
+                linhas.extend(coletor())
+            except Exception as e:
+                print(f"Erro ao coletar métricas: {e}")
+        return '\n'.join(linhas) + '\n'
+
+# Registro padrão do processo
+REGISTRO = RegistroMetricas()
+
+def coletor_metricas_db(metricas, prefixo: str = 'irrigacao_db') -> Callable[[], List[str]]:
+    """Coletor que expõe um MetricasDB (db_manager_expandido_completo) por método"""
+
+    def coletar() -> List[str]:
+        snapshot = metricas.snapshot()
+        latencia, chamadas, erros, linhas = [], [], [], []
+        for metodo, m in sorted(snapshot['metodos'].items()):
+            rotulo = {'metodo': metodo}
+            for limite, n in m['histograma'].items():
+                latencia.append(f"{prefixo}_consulta_segundos_bucket{_rotulos(dict(rotulo, le=limite))} {n}")
+            latencia.append(f"{prefixo}_consulta_segundos_sum{_rotulos(rotulo)} {_formatar(m['tempo_total'])}")
+            latencia.append(f"{prefixo}_consulta_segundos_count{_rotulos(rotulo)} {m['chamadas']}")
+            erros.append(f"{prefixo}_erros_total{_rotulos(rotulo)} {m['erros']}")
+            linhas.append(f"{prefixo}_linhas_total{_rotulos(rotulo)} {m['linhas']}")
+        return [
+            f"# HELP {prefixo}_consulta_segundos Latência dos métodos do gerenciador de banco",
+            f"# TYPE {prefixo}_consulta_segundos histogram",
+            *latencia,
+            f"# HELP {prefixo}_erros_total Chamadas que terminaram com erro de banco",
+            f"# TYPE {prefixo}_erros_total counter",
+            *erros,
+            f"# HELP {prefixo}_linhas_total Linhas retornadas pelos métodos",
+            f"# TYPE {prefixo}_linhas_total counter",
+            *linhas,
+            f"# HELP {prefixo}_consultas_lentas_total Instruções SQL acima do limite de lentidão",
+            f"# TYPE {prefixo}_consultas_lentas_total counter",
+            f"{prefixo}_consultas_lentas_total {snapshot['total_consultas_lentas']}",
+        ]
+
+    return coletar
+
+class _ManipuladorMetricas(BaseHTTPRequestHandler):
+    registro = REGISTRO
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        corpo = self.registro.renderizar().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass  # não polui a saída do processo a cada coleta
+
+def iniciar_servidor_metricas(porta: int, host: str = '0.0.0.0',
+                              registro: Optional[RegistroMetricas] = None) -> ThreadingHTTPServer:
+    """Inicia o endpoint /metrics em uma thread daemon e retorna o servidor (use shutdown() para parar)"""
+    manipulador = type('ManipuladorMetricas', (_ManipuladorMetricas,), {'registro': registro or REGISTRO})
+    servidor = ThreadingHTTPServer((host, porta), manipulador)
+    servidor.daemon_threads = True
+    thread = threading.Thread(target=servidor.serve_forever, name='servidor-metricas', daemon=True)
+    thread.start()
+    print(f"Métricas disponíveis em http://{host}:{servidor.server_address[1]}/metrics")
+    return servidor
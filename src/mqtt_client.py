@@ -4,6 +4,7 @@ import time
 import random
 import argparse
 from datetime import datetime
+from metricas_http import REGISTRO, iniciar_servidor_metricas
 
 # Configurações MQTT
 MQTT_BROKER = "broker.hivemq.com"  # Broker público gratuito
@@ -19,6 +20,16 @@ LIMITE_UMIDADE_ALTA = 70.0
 PH_IDEAL_MIN = 5.5
 PH_IDEAL_MAX = 7.0
 
+# Métricas do cliente (expostas com --metricas-porta)
+CONECTADO = REGISTRO.medidor('irrigacao_mqtt_conectado', '1 se conectado ao broker MQTT')
+MENSAGENS_RECEBIDAS = REGISTRO.contador('irrigacao_mqtt_mensagens_recebidas_total', 'Mensagens recebidas do broker')
+ERROS_PARSE = REGISTRO.contador('irrigacao_mqtt_erros_parse_total', 'Mensagens recebidas com JSON inválido')
+ERROS_PROCESSAMENTO = REGISTRO.contador('irrigacao_mqtt_erros_processamento_total', 'Falhas ao processar mensagens recebidas')
+MENSAGENS_PUBLICADAS = REGISTRO.contador('irrigacao_mqtt_mensagens_publicadas_total', 'Mensagens entregues ao cliente para publicação')
+PUBLICACOES_PENDENTES = REGISTRO.medidor('irrigacao_mqtt_publicacoes_pendentes', 'Publicações ainda não enviadas ao broker (fila de saída)')
+ULTIMA_PUBLICACAO = REGISTRO.medidor('irrigacao_mqtt_ultima_leitura_timestamp_segundos',
+                                     'Instante (época) da última leitura de sensores publicada')
+
 # Variáveis globais
 dados_sensores = {
     "umidade": 50.0,
@@ -38,11 +49,20 @@ status_sistema = {
 # Callbacks MQTT
 def on_connect(client, userdata, flags, rc):
     print(f"Conectado ao broker MQTT com código: {rc}")
+    CONECTADO.definir(1 if rc == 0 else 0)
     # Inscreve-se no tópico de comandos
     client.subscribe(MQTT_TOPIC_COMANDOS)
     print(f"Inscrito no tópico: {MQTT_TOPIC_COMANDOS}")
 
+def on_disconnect(client, userdata, rc):
+    CONECTADO.definir(0)
+    print(f"Desconectado do broker MQTT com código: {rc}")
+
+def on_publish(client, userdata, mid):
+    PUBLICACOES_PENDENTES.incrementar(-1)
+
 def on_message(client, userdata, msg):
+    MENSAGENS_RECEBIDAS.incrementar()
     try:
         payload = json.loads(msg.payload.decode())
         print(f"Mensagem recebida no tópico {msg.topic}: {payload}")
@@ -50,8 +70,10 @@ def on_message(client, userdata, msg):
         if msg.topic == MQTT_TOPIC_COMANDOS:
             processar_comando(client, payload)
     except json.JSONDecodeError:
+        ERROS_PARSE.incrementar()
         print(f"Erro ao decodificar mensagem JSON: {msg.payload}")
     except Exception as e:
+        ERROS_PROCESSAMENTO.incrementar()
         print(f"Erro ao processar mensagem: {e}")
 
 def processar_comando(client, comando):
@@ -124,16 +146,23 @@ def simular_leitura_sensores():
     print(f"Fósforo: {'Adequado' if dados_sensores['fosforo'] else 'Baixo'}")
     print(f"Potássio: {'Adequado' if dados_sensores['potassio'] else 'Baixo'}")
 
+def publicar(client, topico, payload):
+    # Publica contabilizando a mensagem como pendente até o on_publish
+    PUBLICACOES_PENDENTES.incrementar()
+    client.publish(topico, payload)
+    MENSAGENS_PUBLICADAS.incrementar()
+
 def publicar_sensores(client):
     # Publica os dados dos sensores no tópico MQTT
     payload = json.dumps(dados_sensores)
-    client.publish(MQTT_TOPIC_SENSORES, payload)
+    publicar(client, MQTT_TOPIC_SENSORES, payload)
+    ULTIMA_PUBLICACAO.definir_agora()
     print(f"Dados dos sensores publicados em {MQTT_TOPIC_SENSORES}")
 
 def publicar_status(client):
     # Publica o status do sistema no tópico MQTT
     payload = json.dumps(status_sistema)
-    client.publish(MQTT_TOPIC_STATUS, payload)
+    publicar(client, MQTT_TOPIC_STATUS, payload)
     print(f"Status do sistema publicado em {MQTT_TOPIC_STATUS}")
 
 def main():
@@ -141,13 +170,19 @@ def main():
     parser.add_argument('--broker', default=MQTT_BROKER, help='Endereço do broker MQTT')
     parser.add_argument('--port', type=int, default=MQTT_PORT, help='Porta do broker MQTT')
     parser.add_argument('--intervalo', type=int, default=10, help='Intervalo entre leituras (segundos)')
+    parser.add_argument('--metricas-porta', type=int, help='Porta do endpoint /metrics no formato Prometheus (desativado por padrão)')
     
     args = parser.parse_args()
     
+    if args.metricas_porta:
+        iniciar_servidor_metricas(args.metricas_porta)
+    
     # Configura o cliente MQTT
     client = mqtt.Client(MQTT_CLIENT_ID)
     client.on_connect = on_connect
     client.on_message = on_message
+    client.on_disconnect = on_disconnect
+    client.on_publish = on_publish
     
     try:
         # Conecta ao broker MQTT
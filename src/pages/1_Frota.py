@@ -0,0 +1,117 @@
+import time
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from db_manager_expandido_completo import SistemaIrrigacaoDB
+
+# Caminho do banco de dados usado pelo dashboard
+DB_PATH = "../db/exemplo_irrigacao.db"
+
+# Configuração da página
+st.set_page_config(
+    page_title="Visão da Frota - Sistema de Irrigação Inteligente",
+    page_icon="💧",
+    layout="wide"
+)
+
+# Gerenciador do banco compartilhado entre as sessões
+@st.cache_resource
+def get_db():
+    return SistemaIrrigacaoDB(DB_PATH, check_same_thread=False, sincronizar=True)
+
+# Indicadores de todas as áreas em uma única consulta (último valor de umidade e pH,
+# alertas ativos, irrigação em andamento, irrigações e água usada no período).
+# O resultado é compartilhado entre as sessões e recalculado quando a versão dos dados muda
+# ou, como o período é relativo a datetime('now'), quando muda o minuto
+@st.cache_data(max_entries=64)
+def load_indicadores(_db, dias=7, versao=None, minuto=None):
+    df = _db.listar_indicadores_areas(dias=dias, como_dataframe=True)
+    if df is None:
+        return pd.DataFrame()
+    return df
+
+# Mapa de calor com cada indicador normalizado entre 0 e 1 na própria coluna,
+# para que umidade, pH, alertas e volume fiquem na mesma escala de cores
+def mapa_calor(df, indicadores):
+    valores = df[indicadores].astype('float64')
+    minimos, maximos = valores.min(), valores.max()
+    normalizados = (valores - minimos) / (maximos - minimos).replace(0, 1)
+    rotulos = df['nome_fazenda'] + " / " + df['nome_area']
+    return go.Figure(go.Heatmap(
+        z=normalizados.to_numpy(),
+        x=indicadores,
+        y=rotulos,
+        customdata=valores.to_numpy(),
+        hovertemplate="%{y}<br>%{x}: %{customdata:.2f}<extra></extra>",
+        colorscale="RdYlGn_r",
+        showscale=False
+    ))
+
+# Título do dashboard
+st.title("💧 Visão da Frota")
+st.markdown("### Indicadores de todas as áreas monitoradas")
+
+# Sidebar para filtros
+st.sidebar.header("Filtros")
+
+periodo = st.sidebar.slider(
+    "Período de irrigações (dias)",
+    min_value=1,
+    max_value=30,
+    value=7
+)
+
+with st.spinner("Carregando indicadores..."):
+    db = get_db()
+    df = load_indicadores(db, periodo, db.obter_versao_dados(), int(time.time() // 60))
+
+if df.empty:
+    st.warning("Não há áreas cadastradas.")
+    st.stop()
+
+fazendas = ["Todas"] + sorted(df['nome_fazenda'].unique())
+fazenda_selecionada = st.sidebar.selectbox("Selecione a Fazenda", fazendas)
+if fazenda_selecionada != "Todas":
+    df = df[df['nome_fazenda'] == fazenda_selecionada]
+
+# Métricas gerais
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Áreas", len(df))
+col2.metric("Alertas Ativos", int(df['alertas_ativos'].sum()))
+col3.metric("Irrigações em Andamento", int(df['irrigacao_ativa'].sum()))
+col4.metric("Água Utilizada", f"{df['volume_agua'].sum():,.0f} L")
+
+# Tabela ordenável (clique no cabeçalho da coluna para ordenar)
+st.subheader("Indicadores por Área")
+st.dataframe(
+    df.drop(columns=['id_fazenda']).rename(columns={
+        'id_area': 'ID',
+        'nome_area': 'Área',
+        'nome_fazenda': 'Fazenda',
+        'umidade': 'Umidade (%)',
+        'ph': 'pH',
+        'ultima_leitura': 'Última Leitura',
+        'alertas_ativos': 'Alertas Ativos',
+        'irrigacao_ativa': 'Irrigando',
+        'irrigacoes': 'Irrigações',
+        'volume_agua': 'Água (L)'
+    }),
+    use_container_width=True,
+    hide_index=True
+)
+
+# Mapa de calor das áreas mais relevantes segundo o indicador escolhido
+st.subheader("Mapa de Calor")
+indicadores = ['umidade', 'ph', 'alertas_ativos', 'irrigacoes', 'volume_agua']
+col1, col2, col3 = st.columns(3)
+ordenar_por = col1.selectbox("Ordenar por", indicadores, index=2)
+crescente = col2.radio("Ordem", ["Decrescente", "Crescente"], horizontal=True) == "Crescente"
+quantidade = col3.slider("Número de áreas", min_value=10, max_value=200, value=50, step=10)
+
+df_mapa = df.sort_values(ordenar_por, ascending=crescente, na_position='last').head(quantidade)
+fig = mapa_calor(df_mapa, indicadores)
+fig.update_layout(
+    height=max(300, 20 * len(df_mapa)),
+    yaxis=dict(autorange="reversed")
+)
+st.plotly_chart(fig, use_container_width=True)
@@ -4,6 +4,7 @@ import re
 import time
 import argparse
 from datetime import datetime
+from metricas_http import REGISTRO, iniciar_servidor_metricas
 
 # Configurações do banco de dados
 DB_NAME = "../db/irrigacao_dados.db"
@@ -16,6 +17,19 @@ RE_POTASSIO = r"Potássio: (Adequado|Baixo)"
 RE_IRRIGACAO = r"Status da irrigação: (ATIVA|DESATIVADA)"
 RE_CONDICAO = r"ATENÇÃO: Condições críticas detectadas!"
 
+# Métricas de ingestão (expostas com --metricas-porta)
+LEITURAS_GRAVADAS = REGISTRO.contador('irrigacao_serial_leituras_total', 'Leituras completas gravadas no banco')
+LINHAS_POR_LEITURA = REGISTRO.histograma('irrigacao_serial_linhas_por_leitura',
+                                         'Linhas seriais agregadas em cada bloco de leitura',
+                                         limites=(1, 2, 4, 6, 8, 12, 16, 32))
+LATENCIA_COMMIT = REGISTRO.histograma('irrigacao_serial_commit_segundos', 'Latência do commit de cada leitura')
+FILA_SERIAL = REGISTRO.medidor('irrigacao_serial_fila_bytes', 'Bytes aguardando no buffer de entrada da porta serial')
+ERROS_PARSE = REGISTRO.contador('irrigacao_serial_erros_parse_total',
+                                'Blocos seriais descartados por dados incompletos ou não decodificáveis')
+ERROS_BANCO = REGISTRO.contador('irrigacao_serial_erros_banco_total', 'Falhas ao gravar leituras no banco')
+ULTIMA_LEITURA = REGISTRO.medidor('irrigacao_serial_ultima_leitura_timestamp_segundos',
+                                  'Instante (época) da última leitura gravada')
+
 class BancoDadosIrrigacao:
     def __init__(self, db_name=DB_NAME):
         """Inicializa a conexão com o banco de dados"""
@@ -97,7 +111,10 @@ class BancoDadosIrrigacao:
             ''', (timestamp, umidade, ph, fosforo_int, potassio_int, irrigacao_int, condicao_critica))
             
             leitura_id = self.cursor.lastrowid
-            self.conn.commit()
+            with LATENCIA_COMMIT.medir():
+                self.conn.commit()
+            LEITURAS_GRAVADAS.incrementar()
+            ULTIMA_LEITURA.definir_agora()
             print(f"Leitura inserida com ID: {leitura_id}")
             
             # Verifica se deve registrar um alerta
@@ -109,6 +126,7 @@ class BancoDadosIrrigacao:
             
             return leitura_id
         except sqlite3.Error as e:
+            ERROS_BANCO.incrementar()
             print(f"Erro ao inserir leitura: {e}")
             return None
     
@@ -398,17 +416,22 @@ def ler_serial(porta, baudrate, db):
             # Lê uma linha da porta serial
             try:
                 linha = ser.readline().decode('utf-8').strip()
+                FILA_SERIAL.definir(ser.in_waiting)
                 if linha:
                     print(f"Serial: {linha}")
                     buffer += linha + "\n"
                     
                     # Verifica se temos uma leitura completa
                     if "Status da irrigação:" in linha:
+                        LINHAS_POR_LEITURA.observar(buffer.count("\n"))
                         if processar_linha_serial(buffer, db):
                             leituras_completas += 1
                             print(f"Leitura completa processada: {leituras_completas}")
+                        else:
+                            ERROS_PARSE.incrementar()
                         buffer = ""
             except UnicodeDecodeError:
+                ERROS_PARSE.incrementar()
                 print("Erro ao decodificar dados da serial")
             
             time.sleep(0.1)
@@ -535,11 +558,15 @@ def main():
     parser.add_argument('--baudrate', type=int, default=115200, help='Taxa de transmissão (padrão: 115200)')
     parser.add_argument('--simular', action='store_true', help='Simular dados em vez de ler da porta serial')
     parser.add_argument('--db', default=DB_NAME, help=f'Nome do banco de dados (padrão: {DB_NAME})')
+    parser.add_argument('--metricas-porta', type=int, help='Porta do endpoint /metrics no formato Prometheus (desativado por padrão)')
     
     args = parser.parse_args()
     
     print("=== Sistema de Armazenamento de Dados de Irrigação ===")
     
+    if args.metricas_porta:
+        iniciar_servidor_metricas(args.metricas_porta)
+    
     # Inicializa o banco de dados
     db = BancoDadosIrrigacao(args.db)
     
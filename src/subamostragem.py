@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Subamostragem de séries temporais para os gráficos do dashboard
+Reduz cada série a um número de pontos compatível com a largura do gráfico,
+preservando picos e vales (min/máx por intervalo + Largest-Triangle-Three-Buckets).
+"""
+
+import numpy as np
+
+# Pontos pré-selecionados pelo min/máx para cada ponto final do LTTB (MinMaxLTTB)
+FATOR_PRESELECAO = 4
+
+def _como_float(x: np.ndarray) -> np.ndarray:
+    """Converte o eixo x (números ou datetime64) para float64"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+def indices_minmax(y: np.ndarray, intervalos: int) -> np.ndarray:
+    """Índices (ordenados) do mínimo e do máximo de y em cada um de `intervalos`
+    intervalos consecutivos de tamanho quase igual; totalmente vetorizado"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if intervalos <= 0 or n <= 2 * intervalos:
+        return np.arange(n)
+
+    # Intervalo de cada ponto e posição dentro dele, para montar uma matriz
+    # (intervalos x tamanho máximo) completada com NaN
+    intervalo = (np.arange(n) * intervalos) // n
+    inicios = np.searchsorted(intervalo, np.arange(intervalos))
+    posicao = np.arange(n) - inicios[intervalo]
+    matriz = np.full((intervalos, posicao.max() + 1), np.nan)
+    matriz[intervalo, posicao] = y
+
+    minimos = inicios + np.nanargmin(matriz, axis=1)
+    maximos = inicios + np.nanargmax(matriz, axis=1)
+    return np.unique(np.concatenate([minimos, maximos]))
+
+def indices_lttb(x: np.ndarray, y: np.ndarray, pontos: int) -> np.ndarray:
+    """Índices escolhidos pelo Largest-Triangle-Three-Buckets (primeiro e último incluídos).
+
+    O laço percorre apenas os intervalos (um por ponto de saída); a área dos triângulos
+    de todos os candidatos de um intervalo é calculada de uma vez com NumPy.
+    """
+    x = _como_float(x)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if pontos >= n or pontos < 3:
+        return np.arange(n)
+
+    # Limites dos pontos-1 intervalos internos (o primeiro e o último ponto são fixos)
+    limites = np.linspace(1, n - 1, pontos - 1).astype(np.int64)
+    selecionados = np.empty(pontos, dtype=np.int64)
+    selecionados[0], selecionados[-1] = 0, n - 1
+
+    # Média de cada intervalo (o terceiro vértice do triângulo é a média do intervalo seguinte)
+    somas_x = np.add.reduceat(x[1:n - 1], limites[:-1] - 1)
+    somas_y = np.add.reduceat(y[1:n - 1], limites[:-1] - 1)
+    tamanhos = np.diff(limites)
+    medias_x = np.append(somas_x / tamanhos, x[-1])
+    medias_y = np.append(somas_y / tamanhos, y[-1])
+
+    a = 0
+    for i in range(pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        cx, cy = medias_x[i + 1], medias_y[i + 1]
+        ax, ay = x[a], y[a]
+        areas = np.abs((ax - cx) * (y[inicio:fim] - ay) - (ax - x[inicio:fim]) * (cy - ay))
+        a = inicio + int(np.argmax(areas))
+        selecionados[i + 1] = a
+    return selecionados
+
+def subamostrar(x, y, pontos: int = 1000):
+    """Reduz a série (x, y) a no máximo `pontos` pontos para plotagem.
+
+    Valores ausentes (NaN) são descartados antes. Séries grandes passam primeiro pela
+    pré-seleção min/máx vetorizada (FATOR_PRESELECAO * pontos) e depois pelo LTTB, que
+    mantém a forma da curva; os extremos de cada intervalo continuam visíveis.
+    Retorna (x, y) como arrays NumPy.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    validos = ~np.isnan(y)
+    if not validos.all():
+        x, y = x[validos], y[validos]
+    if len(y) <= pontos:
+        return x, y
+
+    if len(y) > FATOR_PRESELECAO * pontos:
+        pre = indices_minmax(y, FATOR_PRESELECAO * pontos // 2)
+        x, y = x[pre], y[pre]
+
+    indices = indices_lttb(x, y, pontos)
+    return x[indices], y[indices]
@@ -0,0 +1,41 @@
+import os
+import sys
+import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from db_manager_expandido_completo import SistemaIrrigacaoDB  # noqa: E402
+
+INICIO = datetime.datetime(2024, 1, 1)
+
+def data_hora(minutos):
+    return (INICIO + datetime.timedelta(minutes=minutos)).strftime("%Y-%m-%d %H:%M:%S")
+
+@pytest.fixture
+def db_vazio(tmp_path):
+    db = SistemaIrrigacaoDB(str(tmp_path / "teste.db"))
+    db.conn.execute("PRAGMA synchronous = OFF")  # os testes fazem muitos commits pequenos
+    yield db
+    db.fechar()
+
+@pytest.fixture
+def db(db_vazio):
+    """Banco com uma fazenda, duas áreas, quatro sensores e 10 instantes de leituras por área"""
+    db = db_vazio
+    id_fazenda = db.adicionar_fazenda("Fazenda Teste", "Latitude: 0, Longitude: 0", 10.0)
+    areas = [db.adicionar_area(id_fazenda, f"Área {i}", "Polígono: []") for i in (1, 2)]
+    sensores = {tipo: db.adicionar_sensor(tipo, "Modelo", unidade)
+                for tipo, unidade in (("umidade", "%"), ("ph", "pH"), ("fosforo", "mg/kg"), ("potassio", "mg/kg"))}
+    for id_area in areas:
+        for id_sensor in sensores.values():
+            db.associar_sensor_area(id_sensor, id_area, data_hora(0))
+    db.conn.executemany(
+        "INSERT INTO leitura (id_sensor, id_area, valor, data_hora) VALUES (?, ?, ?, ?)",
+        [(id_sensor, id_area, float(10 * id_area + i), data_hora(i * 10))
+         for id_area in areas for i in range(10) for id_sensor in sensores.values()]
+    )
+    db.conn.commit()
+    db.ids = {'fazenda': id_fazenda, 'areas': areas, 'sensores': sensores}
+    return db
@@ -0,0 +1,32 @@
+import pytest
+
+from db_manager_expandido_completo import segundos_intervalo
+
+@pytest.mark.parametrize("intervalo, segundos", [(90, 90), ('30s', 30), ('15min', 900), ('1h', 3600), (' 2D ', 172800)])
+def test_segundos_intervalo(intervalo, segundos):
+    assert segundos_intervalo(intervalo) == segundos
+
+@pytest.mark.parametrize("intervalo", [0, -5, '1sem', 'h', '1.5h', ''])
+def test_segundos_intervalo_invalido(intervalo):
+    with pytest.raises(ValueError):
+        segundos_intervalo(intervalo)
+
+def test_agregar_por_intervalo(db):
+    pontos = db.agregar_leituras(id_area=db.ids['areas'][0], tipo_sensor='umidade', bucket='30min',
+                                 funcs=('min', 'max', 'avg', 'count', 'last'))
+    assert [(p['bucket'], p['min'], p['max'], p['avg'], p['count'], p['last']) for p in pontos] == [
+        ('2024-01-01 00:00:00', 10.0, 12.0, 11.0, 3, 12.0),
+        ('2024-01-01 00:30:00', 13.0, 15.0, 14.0, 3, 15.0),
+        ('2024-01-01 01:00:00', 16.0, 18.0, 17.0, 3, 18.0),
+        ('2024-01-01 01:30:00', 19.0, 19.0, 19.0, 1, 19.0),
+    ]
+    assert {p['tipo_sensor'] for p in pontos} == {'umidade'}
+
+def test_agregar_por_fazenda_e_periodo(db):
+    pontos = db.agregar_leituras(id_fazenda=db.ids['fazenda'], bucket='1d', funcs=['count'],
+                                 inicio='2024-01-01 00:30:00')
+    assert [(p['tipo_sensor'], p['count']) for p in pontos] == [
+        ('fosforo', 14), ('ph', 14), ('potassio', 14), ('umidade', 14)]
+
+def test_agregar_funcao_invalida(db):
+    assert db.agregar_leituras(funcs=('mediana',)) == []
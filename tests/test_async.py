@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from db_manager_async import SistemaIrrigacaoDBAsync, METODOS_ESCRITA, METODOS_LEITURA
+from db_manager_expandido_completo import SistemaIrrigacaoDB
+
+def test_metodos_expostos_existem():
+    for nome in METODOS_ESCRITA + METODOS_LEITURA:
+        assert callable(getattr(SistemaIrrigacaoDB, nome)), nome
+
+def test_escritas_e_leituras(tmp_path):
+    async def cenario():
+        async with SistemaIrrigacaoDBAsync(str(tmp_path / "async.db"), leitores=2) as db:
+            id_fazenda = await db.adicionar_fazenda("Fazenda Async", "Latitude: 0", 5.0)
+            ids = await asyncio.gather(*(db.adicionar_area(id_fazenda, f"Área {i}", "[]") for i in range(5)))
+            areas = await db.obter_areas_por_fazendas([id_fazenda])
+            fazendas, mesmas_fazendas = await asyncio.gather(db.listar_fazendas(), db.listar_fazendas())
+            with pytest.raises(ValueError):
+                await db.listar_leituras_pagina(token="invalido")
+            return ids, areas[id_fazenda], fazendas, mesmas_fazendas
+
+    ids, areas, fazendas, mesmas_fazendas = asyncio.run(cenario())
+    assert len(set(ids)) == 5
+    assert sorted(a['id_area'] for a in areas) == sorted(ids)
+    assert fazendas is mesmas_fazendas  # leituras idênticas simultâneas são coalescidas
+    assert fazendas[0]['nome'] == "Fazenda Async"
+
+def test_leitura_apos_escrita_nao_usa_registro_desatualizado(tmp_path):
+    async def cenario():
+        async with SistemaIrrigacaoDBAsync(str(tmp_path / "async.db"), leitores=1) as db:
+            id_fazenda = await db.adicionar_fazenda("Fazenda Async", "Latitude: 0", 5.0)
+            id_area = await db.adicionar_area(id_fazenda, "Área Antiga", "[]")
+            antes = await db.obter_area(id_area)
+            await db.atualizar_area(id_area, nome_area="Área Nova")
+            depois = await db.obter_area(id_area)
+            return antes['nome_area'], depois['nome_area']
+
+    assert asyncio.run(cenario()) == ("Área Antiga", "Área Nova")
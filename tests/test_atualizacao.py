@@ -0,0 +1,39 @@
+import sqlite3
+
+import numpy as np
+
+def test_atualizar_area_apenas_campos_fornecidos(db):
+    id_area = db.ids['areas'][0]
+    assert db.atualizar_area(np.int64(id_area), nome_area="Talhão Norte") == 1
+    area = db.obter_area(id_area)
+    assert area['nome_area'] == "Talhão Norte"
+    assert area['coordenadas'] == "Polígono: []"
+    assert db.atualizar_area(id_area) == 0
+    assert db.atualizar_area(9999, nome_area="Inexistente") == 0
+
+def test_atualizar_sensores_em_lote(db):
+    ids = [np.int64(i) for i in db.ids['sensores'].values()][:2]
+    assert db.atualizar_sensores(ids, modelo="Modelo 2") == 2
+    assert [db.obter_sensor(int(i))['modelo'] for i in ids] == ["Modelo 2", "Modelo 2"]
+
+def test_atualizar_com_erro_retorna_zero(db):
+    db.conn.execute("""
+        CREATE TRIGGER bloqueia_fazenda BEFORE UPDATE ON fazenda
+        BEGIN SELECT RAISE(ABORT, 'bloqueado'); END
+    """)
+    assert db.atualizar_fazenda(db.ids['fazenda'], nome="Outra") == 0
+    db.conn.execute("ALTER TABLE area_monitorada RENAME TO area_antiga")
+    assert db.renomear_areas({db.ids['areas'][0]: "Outra"}) == 0
+
+def test_renomear_areas(db):
+    id_1, id_2 = db.ids['areas']
+    db.obter_area(id_1)  # coloca a área no cache
+    assert db.renomear_areas({id_1: "A", np.int64(id_2): "B", 9999: "C"}) == 2
+    assert [db.obter_area(i)['nome_area'] for i in (id_1, id_2)] == ["A", "B"]
+    assert db.renomear_areas({}) == 0
+
+def test_renomear_areas_sqlite_antigo(db, monkeypatch):
+    monkeypatch.setattr(sqlite3, 'sqlite_version_info', (3, 32, 0))
+    id_1, id_2 = db.ids['areas']
+    assert db.renomear_areas({id_1: "A", id_2: "B"}) == 2
+    assert [db.obter_area(i)['nome_area'] for i in (id_1, id_2)] == ["A", "B"]
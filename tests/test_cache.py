@@ -0,0 +1,39 @@
+from db_manager_expandido_completo import CacheLRU, SistemaIrrigacaoDB
+
+def test_cache_lru_descarta_o_menos_usado():
+    cache = CacheLRU(capacidade=2)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    assert cache.obter('a') == 1  # 'b' passa a ser o menos usado
+    cache.guardar('c', 3)
+    assert cache.obter('b') is None
+    assert (cache.obter('a'), cache.obter('c')) == (1, 3)
+    cache.invalidar('a')
+    cache.invalidar('inexistente')
+    assert cache.obter('a') is None
+    estatisticas = cache.estatisticas()
+    assert (estatisticas['acertos'], estatisticas['falhas'], estatisticas['tamanho']) == (3, 2, 1)
+    assert estatisticas['taxa_acerto'] == 0.6
+    cache.limpar()
+    assert cache.estatisticas()['tamanho'] == 0 and cache.acertos == 3
+
+def test_obter_usa_cache_e_invalida_na_alteracao(db):
+    id_fazenda = db.ids['fazenda']
+    primeira = db.obter_fazenda(id_fazenda)
+    primeira['nome'] = "Alterado pelo chamador"  # o cache entrega cópias
+    assert db.obter_fazenda(id_fazenda)['nome'] == "Fazenda Teste"
+    assert db.estatisticas_cache()['acertos'] == 1
+
+    db.atualizar_fazenda(id_fazenda, nome="Fazenda Nova")
+    assert db.obter_fazenda(id_fazenda)['nome'] == "Fazenda Nova"
+    assert db.obter_fazenda(9999) == {}
+
+def test_cache_desativado(db):
+    outro = SistemaIrrigacaoDB(db.db_path, cache_referencias=False)
+    try:
+        outro.obter_sensor(db.ids['sensores']['ph'])
+        assert outro.estatisticas_cache() == {}
+        db.atualizar_sensor(db.ids['sensores']['ph'], modelo="Novo")
+        assert outro.obter_sensor(db.ids['sensores']['ph'])['modelo'] == "Novo"
+    finally:
+        outro.fechar()
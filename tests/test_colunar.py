@@ -0,0 +1,29 @@
+import numpy as np
+
+from conftest import data_hora
+
+def test_colunar_dataframe(db):
+    df = db.listar_leituras_colunar(id_area=db.ids['areas'][0])
+    assert len(df) == 40
+    assert df['epoch'].is_monotonic_increasing
+    assert df['epoch'].iloc[0] == 1704067200  # 2024-01-01 00:00:00 UTC
+    assert set(df['tipo_sensor']) == set(db.ids['sensores'])
+    assert str(df['id_sensor'].dtype) == 'int64'
+
+def test_colunar_ignora_data_invalida(db):
+    id_area = db.ids['areas'][0]
+    db.conn.execute("INSERT INTO leitura (id_sensor, id_area, valor, data_hora) VALUES (?, ?, 1.0, 'ontem')",
+                    (db.ids['sensores']['ph'], id_area))
+    colunas = db.listar_leituras_colunar(id_area=id_area, como_dataframe=False)
+    assert len(colunas['id_leitura']) == 40
+
+def test_colunar_sensor_sem_cadastro(db):
+    id_area = db.ids['areas'][0]
+    db.conn.execute("INSERT INTO leitura (id_sensor, id_area, valor, data_hora) VALUES (999, ?, 1.0, ?)",
+                    (id_area, data_hora(1000)))
+    colunas = db.listar_leituras_colunar(id_area=id_area, como_dataframe=False)
+    assert colunas['id_sensor'][-1] == 999
+    assert colunas['tipo_sensor'][-1] == ''
+    df = db.listar_leituras_colunar(id_area=id_area)
+    assert df['tipo_sensor'].isna().iloc[-1]
+    assert np.array_equal(df['valor'].to_numpy()[:-1], colunas['valor'][:-1])
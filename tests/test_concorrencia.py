@@ -0,0 +1,30 @@
+import threading
+
+from db_manager_expandido_completo import SistemaIrrigacaoDB
+
+def test_instancia_sincronizada_entre_threads(db):
+    compartilhado = SistemaIrrigacaoDB(db.db_path, check_same_thread=False, sincronizar=True,
+                                       aplicar_schema=False)
+    try:
+        esperado = {id_area: compartilhado.listar_leituras(id_area=id_area, limite=40)
+                    for id_area in db.ids['areas']}
+        divergencias = []
+
+        def consultar(id_area):
+            for _ in range(50):
+                if compartilhado.listar_leituras(id_area=id_area, limite=40) != esperado[id_area]:
+                    divergencias.append(id_area)
+                lotes = list(compartilhado.iter_leituras_lotes(id_area=id_area, tamanho_lote=3))
+                if sum(len(lote) for lote in lotes) != 40:
+                    divergencias.append(id_area)
+                compartilhado.obter_hierarquia()
+
+        threads = [threading.Thread(target=consultar, args=(id_area,))
+                   for id_area in db.ids['areas'] * 4]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert divergencias == []
+    finally:
+        compartilhado.fechar()
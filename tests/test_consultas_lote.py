@@ -0,0 +1,28 @@
+import numpy as np
+
+def test_areas_por_fazendas(db):
+    id_fazenda = db.ids['fazenda']
+    areas = db.obter_areas_por_fazendas([id_fazenda, np.int64(id_fazenda), 999])
+    assert list(areas) == [id_fazenda, 999]
+    assert [a['id_area'] for a in areas[id_fazenda]] == db.ids['areas']
+    assert areas[999] == []
+
+def test_sensores_por_areas(db):
+    id_1, id_2 = db.ids['areas']
+    db.reatribuir_sensores([db.ids['sensores']['ph']], id_2)
+    sensores = db.listar_sensores_por_areas([id_1, id_2])
+    assert len(sensores[id_1]) == 3
+    assert len(sensores[id_2]) == 4
+    assert len(db.listar_sensores_por_areas([id_1], ativos_apenas=False)[id_1]) == 4
+
+def test_leituras_por_ids(db):
+    ids = [1, 5, 10_000]
+    leituras = db.obter_leituras_por_ids(ids)
+    assert sorted(leituras) == [1, 5]
+    assert leituras[5]['tipo_sensor'] in db.ids['sensores']
+
+def test_ids_invalidos_retornam_vazio(db):
+    assert db.obter_leituras_por_ids([1, "x"]) == {}
+    assert db.obter_areas_por_fazendas([None]) == {}
+    assert db.listar_sensores_por_areas(["1.5"]) == {}
+    assert db.atualizar_sensores(["x"], modelo="M") == 0
@@ -0,0 +1,66 @@
+import csv
+import io
+import os
+import sqlite3
+
+import pytest
+
+from db_manager_expandido_completo import COLUNAS_LEITURAS_LOTE
+from exportacao import exportar_leituras, gerar_csv, gerar_exportacao, gerar_parquet
+
+def test_gerar_csv_um_bloco_por_lote():
+    lotes = [[(1, 'a'), (2, 'b')], [(3, 'c,d')]]
+    blocos = list(gerar_csv(lotes, colunas=('id', 'texto')))
+    assert len(blocos) == 2
+    linhas = list(csv.reader(io.StringIO(b''.join(blocos).decode('utf-8'))))
+    assert linhas == [['id', 'texto'], ['1', 'a'], ['2', 'b'], ['3', 'c,d']]
+
+def test_gerar_csv_sem_lotes_tem_apenas_cabecalho():
+    assert b''.join(gerar_csv([], colunas=('id',))) == b'id\n'
+
+def test_exportar_csv_filtrado(db, tmp_path):
+    caminho = str(tmp_path / "leituras.csv")
+    id_area = db.ids['areas'][1]
+    exportar_leituras(db, caminho, id_area=id_area, tamanho_lote=7)
+    with open(caminho, newline='', encoding='utf-8') as arquivo:
+        linhas = list(csv.DictReader(arquivo))
+    assert tuple(linhas[0].keys()) == COLUNAS_LEITURAS_LOTE
+    assert len(linhas) == 40
+    assert {linha['id_area'] for linha in linhas} == {str(id_area)}
+    assert [linha['data_hora'] for linha in linhas] == sorted(linha['data_hora'] for linha in linhas)
+
+def test_exportar_parquet(db, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    caminho = str(tmp_path / "leituras.parquet")
+    exportar_leituras(db, caminho, tamanho_lote=25)
+    arquivo = pq.ParquetFile(caminho)
+    assert arquivo.metadata.num_rows == 80
+    assert arquivo.num_row_groups == 4
+    assert arquivo.schema_arrow.names == list(COLUNAS_LEITURAS_LOTE)
+
+def test_gerar_parquet_sem_leituras(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    caminho = tmp_path / "vazio.parquet"
+    caminho.write_bytes(b''.join(gerar_parquet([])))
+    assert pq.read_table(str(caminho)).num_rows == 0
+
+def test_formato_desconhecido(db):
+    with pytest.raises(ValueError):
+        gerar_exportacao(db, 'xlsx')
+
+def test_falha_no_meio_nao_publica_arquivo(db, tmp_path):
+    caminho = str(tmp_path / "leituras.csv")
+    chamadas = []
+
+    def interromper():
+        # Deixa a leitura começar e a interrompe depois de alguns passos da VM
+        chamadas.append(1)
+        return len(chamadas) > 3
+
+    db.conn.set_progress_handler(interromper, 10)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            exportar_leituras(db, caminho, tamanho_lote=5)
+    finally:
+        db.conn.set_progress_handler(None, 0)
+    assert os.listdir(tmp_path) == ['teste.db']
@@ -0,0 +1,44 @@
+def contar(db, tabela):
+    return db.conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+
+def test_expurgar_sensor_em_lotes(db):
+    id_sensor = db.ids['sensores']['ph']
+    db.adicionar_alerta(db.ids['areas'][0], id_sensor, "ph_alto", "pH alto")
+    chamadas = []
+    resultado = db.expurgar_sensor(id_sensor, tamanho_lote=7,
+                                   progresso=lambda tabela, linhas, segundos: chamadas.append((tabela, linhas)))
+    assert resultado['linhas'] == {'leitura': 20, 'alerta': 1, 'manutencao': 0, 'sensor_area': 2, 'sensor': 1}
+    assert resultado['total'] == 24
+    assert [linhas for tabela, linhas in chamadas if tabela == 'leitura'] == [7, 14, 20]
+    assert contar(db, "leitura") == 60
+    assert db.obter_sensor(id_sensor) == {}
+    assert dict(db.conn.execute("SELECT id_area, alertas_ativos FROM resumo_alertas_area")) == {db.ids['areas'][0]: 0}
+
+def test_expurgo_interrompido_e_retomado(db):
+    id_area = db.ids['areas'][0]
+    chamadas = []
+
+    def interromper():
+        chamadas.append(1)
+        return len(chamadas) > 30
+
+    db.conn.set_progress_handler(interromper, 10)
+    try:
+        assert db.expurgar_area(id_area, tamanho_lote=5) == {}
+    finally:
+        db.conn.set_progress_handler(None, 0)
+    assert 0 < contar(db, "leitura") < 80
+    assert db.obter_area(id_area)
+
+    resultado = db.expurgar_area(id_area, tamanho_lote=5)
+    assert resultado['linhas']['area_monitorada'] == 1
+    assert contar(db, "leitura") == 40
+    assert db.obter_area(id_area) == {}
+
+def test_expurgar_fazenda(db):
+    resultado = db.expurgar_fazenda(db.ids['fazenda'])
+    assert resultado['linhas']['leitura'] == 80
+    assert resultado['linhas']['area_monitorada'] == 2
+    assert resultado['linhas']['fazenda'] == 1
+    assert contar(db, "sensor") == 4
+    assert db.obter_fazenda(db.ids['fazenda']) == {}
@@ -0,0 +1,36 @@
+from db_manager_expandido_completo import SistemaIrrigacaoDB
+
+def test_hierarquia_completa(db):
+    hierarquia = db.obter_hierarquia()
+    id_1, id_2 = db.ids['areas']
+    sensores = tuple(db.ids['sensores'].values())
+    assert hierarquia.areas_por_fazenda == {db.ids['fazenda']: (id_1, id_2)}
+    assert set(hierarquia.sensores_por_area[id_1]) == set(sensores)
+    assert hierarquia.areas_por_sensor[sensores[0]] == (id_1, id_2)
+    assert hierarquia.areas[id_2].nome_area == "Área 2"
+    assert hierarquia.sensores[sensores[1]].tipo_sensor == "ph"
+
+def test_hierarquia_reutilizada_sem_alteracoes_de_topologia(db):
+    hierarquia = db.obter_hierarquia()
+    assert db.obter_hierarquia() is hierarquia
+    db.adicionar_leitura(db.ids['sensores']['ph'], db.ids['areas'][0], 7.0)
+    assert db.obter_hierarquia() is hierarquia  # leituras não mudam a topologia
+
+def test_hierarquia_recarregada_apos_alteracao_de_outra_conexao(db):
+    hierarquia = db.obter_hierarquia()
+    outro = SistemaIrrigacaoDB(db.db_path)
+    try:
+        nova_area = outro.adicionar_area(db.ids['fazenda'], "Área 3", "Polígono: []")
+    finally:
+        outro.fechar()
+    atualizada = db.obter_hierarquia()
+    assert atualizada is not hierarquia
+    assert atualizada.versao > hierarquia.versao
+    assert atualizada.areas_por_fazenda[db.ids['fazenda']][-1] == nova_area
+    assert atualizada.sensores_por_area.get(nova_area, ()) == ()
+
+def test_versao_dados_muda_com_gravacoes(db):
+    versao = db.obter_versao_dados()
+    assert db.obter_versao_dados() == versao
+    db.adicionar_leitura(db.ids['sensores']['ph'], db.ids['areas'][0], 7.0)
+    assert db.obter_versao_dados() != versao
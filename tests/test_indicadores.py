@@ -0,0 +1,40 @@
+import datetime
+import time
+
+def test_indicadores_por_area(db):
+    id_1, id_2 = db.ids['areas']
+    db.adicionar_alerta(id_1, db.ids['sensores']['umidade'], "umidade_baixa", "Umidade baixa")
+    db.conn.executescript(f"""
+        INSERT INTO irrigacao (id_area, inicio_timestamp, volume_agua, modo)
+        VALUES ({id_1}, datetime('now', 'localtime', '-1 hours'), 100.0, 'manual'),
+               ({id_1}, datetime('now', 'localtime', '-20 days'), 300.0, 'manual');
+    """)
+    indicadores = {linha['id_area']: linha for linha in db.listar_indicadores_areas(dias=7)}
+    assert indicadores[id_1]['umidade'] == indicadores[id_1]['ph'] == 19.0
+    assert indicadores[id_2]['umidade'] == 29.0
+    assert indicadores[id_1]['alertas_ativos'] == 1 and indicadores[id_2]['alertas_ativos'] == 0
+    assert indicadores[id_1]['irrigacao_ativa'] == 1
+    assert (indicadores[id_1]['irrigacoes'], indicadores[id_1]['volume_agua']) == (1, 100.0)
+    assert db.listar_indicadores_areas(dias=30)[0]['irrigacoes'] == 2
+
+def test_indicadores_tipo_sem_sensor(db):
+    df = db.listar_indicadores_areas(tipos_sensor=['ph', 'vento'], id_fazenda=db.ids['fazenda'],
+                                     como_dataframe=True)
+    assert list(df['ph']) == [19.0, 29.0]
+    assert df['vento'].isna().all()
+
+def test_periodo_em_hora_local(db, monkeypatch):
+    # Fuso com deslocamento: a janela deve ser calculada na mesma hora local das gravações
+    monkeypatch.setenv('TZ', 'America/Sao_Paulo')
+    time.tzset()
+    try:
+        id_area = db.ids['areas'][0]
+        agora = datetime.datetime.now()
+        for horas, volume in ((-1, 10.0), (1, 20.0)):  # fora e dentro dos últimos 7 dias
+            inicio = agora - datetime.timedelta(days=7) + datetime.timedelta(hours=horas)
+            db.adicionar_irrigacao(id_area, "manual", volume, inicio.strftime("%Y-%m-%d %H:%M:%S"))
+        indicadores = {linha['id_area']: linha for linha in db.listar_indicadores_areas(dias=7)}
+        assert (indicadores[id_area]['irrigacoes'], indicadores[id_area]['volume_agua']) == (1, 20.0)
+    finally:
+        monkeypatch.undo()
+        time.tzset()
@@ -0,0 +1,50 @@
+from conftest import data_hora
+
+def test_finalizar_irrigacao_calcula_duracao(db):
+    id_irrigacao = db.adicionar_irrigacao(db.ids['areas'][0], "manual", inicio_timestamp=data_hora(0))
+    assert db.finalizar_irrigacao(id_irrigacao, 250.0, data_hora(90))
+    irrigacao = db.obter_irrigacao(id_irrigacao)
+    assert (irrigacao['duracao_minutos'], irrigacao['volume_agua']) == (90.0, 250.0)
+    assert not db.finalizar_irrigacao(9999, fim_timestamp=data_hora(90))
+    assert not db.conn.in_transaction
+    assert not db.finalizar_irrigacao(id_irrigacao, fim_timestamp="amanhã")
+
+def test_finalizar_irrigacao_com_inicio_invalido(db, capsys):
+    id_irrigacao = db.adicionar_irrigacao(db.ids['areas'][0], "manual", inicio_timestamp="01/01/2024 08:00")
+    assert not db.finalizar_irrigacao(id_irrigacao, fim_timestamp=data_hora(90))
+    assert "data de início inválida" in capsys.readouterr().out
+    assert not db.conn.in_transaction
+    assert db.obter_irrigacao(id_irrigacao)['fim_timestamp'] is None
+
+def test_finalizar_irrigacoes_abertas(db, capsys):
+    id_1, id_2 = db.ids['areas']
+    abertas = [db.adicionar_irrigacao(id_area, "automatico", inicio_timestamp=data_hora(minutos))
+               for id_area, minutos in ((id_1, 0), (id_1, 30), (id_2, 0), (id_2, 200))]
+    invalida = db.adicionar_irrigacao(id_1, "manual", inicio_timestamp="01/01/2024 08:00")
+    capsys.readouterr()
+
+    assert db.finalizar_irrigacoes_abertas(id_area=id_1, fim_timestamp=data_hora(60)) == 2
+    assert str([invalida]) in capsys.readouterr().out
+    assert [db.obter_irrigacao(i)['duracao_minutos'] for i in abertas[:2]] == [60.0, 30.0]
+
+    # O ciclo iniciado depois do fim informado continua em andamento
+    assert db.finalizar_irrigacoes_abertas(id_fazenda=db.ids['fazenda'], fim_timestamp=data_hora(60)) == 1
+    assert db.obter_irrigacao(abertas[3])['fim_timestamp'] is None
+    assert db.finalizar_irrigacoes_abertas(fim_timestamp="ontem") == -1
+
+def test_resolver_alertas_atualiza_contadores(db):
+    id_1, id_2 = db.ids['areas']
+    umidade, ph = db.ids['sensores']['umidade'], db.ids['sensores']['ph']
+    for id_area, id_sensor, minutos in ((id_1, umidade, 0), (id_1, ph, 10), (id_1, umidade, 20), (id_2, ph, 0)):
+        db.adicionar_alerta(id_area, id_sensor, "fora_da_faixa", "Valor fora da faixa", data_hora(minutos))
+
+    def contadores():
+        return dict(db.conn.execute("SELECT id_area, alertas_ativos FROM resumo_alertas_area"))
+
+    assert contadores() == {id_1: 3, id_2: 1}
+    assert db.resolver_alertas(id_area=id_1, ate=data_hora(10)) == 2
+    assert contadores() == {id_1: 1, id_2: 1}
+    assert db.resolver_alertas(id_sensor=ph) == 1
+    assert contadores() == {id_1: 1, id_2: 0}
+    db.conn.execute("DELETE FROM alerta WHERE resolvido = 0")
+    assert contadores() == {id_1: 0, id_2: 0}
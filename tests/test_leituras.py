@@ -0,0 +1,26 @@
+import sqlite3
+
+import pytest
+
+def test_iter_leituras_percorre_tudo_em_ordem(db):
+    id_area = db.ids['areas'][0]
+    leituras = list(db.iter_leituras(id_area=id_area, crescente=True, tamanho_lote=3))
+    assert len(leituras) == 40
+    chaves = [(l['data_hora'], l['id_leitura']) for l in leituras]
+    assert chaves == sorted(chaves)
+    assert list(db.iter_leituras(id_area=id_area, tamanho_lote=7)) == leituras[::-1]
+
+def test_iter_leituras_propaga_erro_de_banco(db):
+    gerador = db.iter_leituras(tamanho_lote=2)
+    assert next(gerador)
+    db.conn.set_progress_handler(lambda: 1, 1)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            list(gerador)
+    finally:
+        db.conn.set_progress_handler(None, 0)
+
+def test_iter_alertas_sem_tabela_propaga_erro(db):
+    db.conn.execute("ALTER TABLE alerta RENAME TO alerta_antiga")
+    with pytest.raises(sqlite3.OperationalError):
+        list(db.iter_alertas())
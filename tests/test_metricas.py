@@ -0,0 +1,29 @@
+from db_manager_expandido_completo import MetricasDB, SistemaIrrigacaoDB
+
+def test_metricas_por_metodo(db):
+    metricas = MetricasDB(limite_lento=0.0, limites=(0.001, 10.0))
+    instrumentado = SistemaIrrigacaoDB(db.db_path, metricas=metricas, cache_referencias=False)
+    try:
+        assert len(instrumentado.listar_leituras(limite=15)) == 15
+        instrumentado.obter_area(db.ids['areas'][0])
+        instrumentado.obter_area(db.ids['areas'][1])
+        pagina, _ = instrumentado.listar_leituras_pagina(tamanho_pagina=4)
+        instrumentado.conn.execute("ALTER TABLE alerta RENAME TO alerta_antiga")
+        assert instrumentado.listar_alertas() == []
+    finally:
+        instrumentado.fechar()
+
+    snapshot = metricas.snapshot()
+    metodos = snapshot['metodos']
+    assert (metodos['listar_leituras']['chamadas'], metodos['listar_leituras']['linhas']) == (1, 15)
+    assert metodos['obter_area']['chamadas'] == 2
+    assert metodos['listar_leituras_pagina']['linhas'] == 4
+    assert metodos['listar_alertas']['erros'] == 1
+    assert metodos['obter_area']['histograma']['+Inf'] == 2
+    assert snapshot['total_consultas_lentas'] > 0
+    assert any(lenta['plano'] for lenta in snapshot['consultas_lentas'])
+    assert any('alerta' in erro['sql'] for erro in snapshot['erros_recentes'])
+
+def test_sem_metricas(db):
+    assert db.estatisticas_metricas() == {}
+    assert db.listar_leituras.__func__ is SistemaIrrigacaoDB.listar_leituras
@@ -0,0 +1,53 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from db_manager_expandido_completo import MetricasDB
+from metricas_http import RegistroMetricas, coletor_metricas_db, iniciar_servidor_metricas
+
+def test_renderizacao_no_formato_prometheus():
+    registro = RegistroMetricas()
+    leituras = registro.contador("leituras_total", "Leituras gravadas")
+    leituras.incrementar(3)
+    assert registro.contador("leituras_total", "outra ajuda") is leituras
+    registro.medidor("fila", "Profundidade da fila").definir(2)
+    latencia = registro.histograma("commit_segundos", "Latência do commit", limites=(0.1, 1.0))
+    for valor in (0.05, 0.5, 5.0):
+        latencia.observar(valor)
+
+    linhas = registro.renderizar().splitlines()
+    assert "# TYPE leituras_total counter" in linhas
+    assert "leituras_total 3.0" in linhas
+    assert "fila 2" in linhas
+    assert [l for l in linhas if l.startswith("commit_segundos")] == [
+        'commit_segundos_bucket{le="0.1"} 1',
+        'commit_segundos_bucket{le="1.0"} 2',
+        'commit_segundos_bucket{le="+Inf"} 3',
+        'commit_segundos_sum 5.55',
+        'commit_segundos_count 3',
+    ]
+
+def test_coletor_metricas_db():
+    metricas = MetricasDB(limites=(0.01,))
+    metricas.registrar_chamada('listar_leituras', 0.002, linhas=10)
+    metricas.registrar_chamada('listar_leituras', 0.5, erro=True)
+    linhas = coletor_metricas_db(metricas)()
+    assert 'irrigacao_db_consulta_segundos_bucket{metodo="listar_leituras",le="0.01"} 1' in linhas
+    assert 'irrigacao_db_consulta_segundos_bucket{metodo="listar_leituras",le="+Inf"} 2' in linhas
+    assert 'irrigacao_db_erros_total{metodo="listar_leituras"} 1' in linhas
+    assert 'irrigacao_db_linhas_total{metodo="listar_leituras"} 10' in linhas
+
+def test_servidor_metricas():
+    registro = RegistroMetricas()
+    registro.contador("pedidos_total", "Pedidos").incrementar()
+    servidor = iniciar_servidor_metricas(0, host='127.0.0.1', registro=registro)
+    try:
+        endereco = f"http://127.0.0.1:{servidor.server_address[1]}"
+        with urllib.request.urlopen(endereco + "/metrics") as resposta:
+            assert "pedidos_total 1.0" in resposta.read().decode('utf-8')
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(endereco + "/outro")
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
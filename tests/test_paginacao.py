@@ -0,0 +1,30 @@
+import pytest
+
+def test_paginas_cobrem_o_resultado_sem_repeticao(db):
+    id_area = db.ids['areas'][0]
+    todas, token, paginas = [], None, 0
+    while True:
+        pagina, token = db.listar_leituras_pagina(id_area=id_area, tamanho_pagina=7, token=token)
+        todas.extend(pagina)
+        paginas += 1
+        if token is None:
+            break
+    assert paginas == 6
+    chaves = [(l['data_hora'], l['id_leitura']) for l in todas]
+    assert len(set(chaves)) == 40
+    assert chaves == sorted(chaves, reverse=True)
+
+def test_pagina_exata_nao_gera_token(db):
+    pagina, token = db.listar_leituras_pagina(id_area=db.ids['areas'][0], tamanho_pagina=40)
+    assert len(pagina) == 40 and token is None
+
+def test_token_codifica_ultima_chave(db):
+    pagina, token = db.listar_leituras_pagina(tamanho_pagina=3)
+    assert db._decodificar_token(token) == (pagina[-1]['data_hora'], pagina[-1]['id_leitura'])
+
+@pytest.mark.parametrize("token", ["nao-e-um-token", "", "bnVsbA=="])
+def test_token_invalido_lanca_value_error(db, token):
+    with pytest.raises(ValueError):
+        db.listar_leituras_pagina(token=token)
+    with pytest.raises(ValueError):
+        db.listar_alertas_pagina(token=token)
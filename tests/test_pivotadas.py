@@ -0,0 +1,34 @@
+from conftest import data_hora
+
+def test_pivotadas_uma_coluna_por_tipo(db):
+    id_area = db.ids['areas'][0]
+    linhas = db.listar_leituras_pivotadas(id_area=id_area)
+    assert len(linhas) == 10
+    assert list(linhas[0].keys()) == ['data_hora', 'fosforo', 'ph', 'potassio', 'umidade']
+    assert [l['data_hora'] for l in linhas] == [data_hora(i * 10) for i in range(10)]
+    assert all(l['ph'] == l['umidade'] == 10 + i for i, l in enumerate(linhas))
+
+def test_pivotadas_media_entre_sensores_do_mesmo_tipo(db):
+    id_area = db.ids['areas'][0]
+    outro = db.adicionar_sensor("umidade", "Modelo 2", "%")
+    db.adicionar_leitura(outro, id_area, 30.0, data_hora(0))
+    linhas = db.listar_leituras_pivotadas(id_area=id_area, tipos_sensor=['umidade', 'vento'])
+    assert list(linhas[0].keys()) == ['data_hora', 'umidade', 'vento']
+    assert linhas[0]['umidade'] == 20.0
+    assert linhas[0]['vento'] is None
+
+def test_pivotadas_apos_id_leitura(db):
+    id_area = db.ids['areas'][1]
+    marca = db.obter_ultimo_id_leitura()
+    assert db.listar_leituras_pivotadas(id_area=id_area, apos_id_leitura=marca) == []
+    db.adicionar_leitura(db.ids['sensores']['ph'], id_area, 7.0, data_hora(10))
+    linhas = db.listar_leituras_pivotadas(id_area=id_area, apos_id_leitura=marca)
+    assert [l['data_hora'] for l in linhas] == [data_hora(10)]
+    assert linhas[0]['ph'] == (21 + 7.0) / 2
+
+def test_pivotadas_dataframe(db):
+    df = db.listar_leituras_pivotadas(id_area=db.ids['areas'][0], tipos_sensor=['ph', 'vento'],
+                                      como_dataframe=True)
+    assert list(df.columns) == ['data_hora', 'ph', 'vento']
+    assert len(df) == 10
+    assert str(df['vento'].dtype) == 'float64'
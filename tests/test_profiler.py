@@ -0,0 +1,55 @@
+import gc
+import sqlite3
+import threading
+
+from db_manager_expandido_completo import ProfilerSQL
+
+def test_profiler_agrega_por_formato():
+    profiler = ProfilerSQL(passos=10)
+    conn = sqlite3.connect(":memory:")
+    profiler.anexar(conn)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    for i in range(5):
+        conn.execute("INSERT INTO t VALUES (?)", (i,))
+    conn.execute("SELECT SUM(x) FROM t").fetchone()
+    formatos = {f['sql']: f for f in profiler.relatorio('execucoes')}
+    insercao = [f for sql, f in formatos.items() if sql.startswith('INSERT')]
+    assert len(insercao) == 1 and insercao[0]['execucoes'] == 5
+    conn.close()
+
+def test_profiler_nao_acumula_conexoes():
+    profiler = ProfilerSQL()
+    for _ in range(20):
+        conn = sqlite3.connect(":memory:")
+        profiler.anexar(conn)
+        conn.execute("SELECT 1").fetchone()
+        conn.close()
+        del conn
+    gc.collect()
+    assert len(profiler._pendentes) == 0
+    assert profiler.relatorio()[0]['execucoes'] == 20
+
+def test_profiler_relatorio_concorrente():
+    profiler = ProfilerSQL(passos=1)
+    parar = threading.Event()
+
+    def executar():
+        conn = sqlite3.connect(":memory:")
+        profiler.anexar(conn)
+        while not parar.is_set():
+            conn.execute("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100) "
+                         "SELECT SUM(i) FROM n").fetchone()
+        conn.close()
+
+    threads = [threading.Thread(target=executar) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(200):
+            profiler.relatorio()
+    finally:
+        parar.set()
+        for thread in threads:
+            thread.join()
+    linhas = profiler.relatorio()
+    assert len(linhas) == 1 and linhas[0]['passos'] > 0
@@ -0,0 +1,20 @@
+from db_manager_expandido_completo import SistemaIrrigacaoDB
+
+def test_registros_compactos(db):
+    compacto = SistemaIrrigacaoDB(db.db_path, registros_compactos=True)
+    try:
+        leituras = compacto.listar_leituras(id_area=db.ids['areas'][0], limite=5)
+        assert type(leituras[0]).__name__ == 'Leitura'
+        assert leituras[0].tipo_sensor in db.ids['sensores']
+        assert leituras[0]._asdict() == db.listar_leituras(id_area=db.ids['areas'][0], limite=1)[0]
+
+        area = compacto.obter_area(db.ids['areas'][0])
+        assert (type(area).__name__, area.nome_area) == ('Area', "Área 1")
+        assert compacto.obter_area(db.ids['areas'][0]) is area  # imutável: o cache entrega o mesmo objeto
+
+        pagina, token = compacto.listar_leituras_pagina(tamanho_pagina=3)
+        assert len(pagina) == 3 and token is not None
+        seguinte = compacto.listar_leituras_pagina(tamanho_pagina=3, token=token)[0][0]
+        assert (seguinte.data_hora, seguinte.id_leitura) < (pagina[-1].data_hora, pagina[-1].id_leitura)
+    finally:
+        compacto.fechar()
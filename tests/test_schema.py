@@ -0,0 +1,26 @@
+from db_manager_expandido_completo import SistemaIrrigacaoDB, VERSAO_SCHEMA
+
+def test_banco_novo_recebe_versao_do_schema(db_vazio):
+    assert db_vazio.obter_versao_schema() == VERSAO_SCHEMA
+
+def test_schema_nao_e_reaplicado_na_abertura(db, monkeypatch):
+    aplicacoes = []
+    monkeypatch.setattr(SistemaIrrigacaoDB, 'atualizar_schema', lambda self: aplicacoes.append(self))
+    outro = SistemaIrrigacaoDB(db.db_path)
+    outro.fechar()
+    assert aplicacoes == []
+
+def test_banco_antigo_e_migrado_uma_vez(db):
+    id_area = db.ids['areas'][0]
+    db.adicionar_alerta(id_area, db.ids['sensores']['umidade'], "umidade_baixa", "Umidade baixa")
+    # Simula um banco anterior aos contadores de alertas
+    db.conn.executescript("DROP TABLE resumo_alertas_area; PRAGMA user_version = 0;")
+    db.fechar()
+
+    migrado = SistemaIrrigacaoDB(db.db_path)
+    try:
+        assert migrado.obter_versao_schema() == VERSAO_SCHEMA
+        contadores = dict(migrado.conn.execute("SELECT id_area, alertas_ativos FROM resumo_alertas_area"))
+        assert contadores == {id_area: 1}
+    finally:
+        migrado.fechar()
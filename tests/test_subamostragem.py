@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from subamostragem import indices_lttb, indices_minmax, subamostrar
+
+def lttb_referencia(x, y, pontos):
+    """LTTB ponto a ponto, com os mesmos limites de intervalo de indices_lttb"""
+    n = len(y)
+    limites = np.linspace(1, n - 1, pontos - 1).astype(np.int64)
+    selecionados, a = [0], 0
+    for i in range(pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        if i + 2 < pontos - 1:
+            proximo = slice(limites[i + 1], limites[i + 2])
+            cx, cy = x[proximo].mean(), y[proximo].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        melhor, maior = inicio, -1.0
+        for j in range(inicio, fim):
+            area = abs((x[a] - cx) * (y[j] - y[a]) - (x[a] - x[j]) * (cy - y[a]))
+            if area > maior:
+                melhor, maior = j, area
+        selecionados.append(melhor)
+        a = melhor
+    return np.array(selecionados + [n - 1])
+
+@pytest.mark.parametrize("n, pontos", [(100, 10), (1000, 37), (5000, 500)])
+def test_lttb_igual_a_referencia(n, pontos):
+    rng = np.random.default_rng(n)
+    x = np.arange(n, dtype=np.float64)
+    y = np.cumsum(rng.normal(size=n))
+    assert np.array_equal(indices_lttb(x, y, pontos), lttb_referencia(x, y, pontos))
+
+def test_lttb_serie_curta_mantem_tudo():
+    assert np.array_equal(indices_lttb(np.arange(5), np.arange(5), 10), np.arange(5))
+
+def test_minmax_extremos_de_cada_intervalo():
+    rng = np.random.default_rng(1)
+    y = rng.normal(size=1003)
+    indices = indices_minmax(y, 10)
+    intervalo = (np.arange(len(y)) * 10) // len(y)
+    for k in range(10):
+        trecho = np.flatnonzero(intervalo == k)
+        assert trecho[np.argmin(y[trecho])] in indices
+        assert trecho[np.argmax(y[trecho])] in indices
+    assert len(indices) <= 20
+
+def test_subamostrar_preserva_picos_e_descarta_nan():
+    n = 100_000
+    x = np.datetime64('2024-01-01T00:00') + np.arange(n).astype('timedelta64[m]')
+    y = np.sin(np.arange(n) / 500.0)
+    y[12_345], y[67_890], y[5] = 10.0, -10.0, np.nan
+    xs, ys = subamostrar(x, y, 500)
+    assert len(ys) <= 500
+    assert ys.max() == 10.0 and ys.min() == -10.0
+    assert not np.isnan(ys).any()
+    assert xs.dtype == x.dtype and (np.diff(xs.astype(np.int64)) > 0).all()
+
+def test_subamostrar_serie_pequena_inalterada():
+    x, y = np.arange(10), np.arange(10.0)
+    xs, ys = subamostrar(x, y, 100)
+    assert np.array_equal(xs, x) and np.array_equal(ys, y)